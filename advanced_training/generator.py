@@ -3,6 +3,14 @@ import pandas as pd
 import os
 import json
 import time
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.gemini_client import get_gemini_client
+from core.rate_limit import is_rate_limit_error
+
+# Urutan preferensi model (fallback + circuit breaker diurus client bersama)
+GENERATOR_MODELS = ['gemini-2.0-flash', 'gemini-flash-latest', 'gemini-2.0-flash-lite']
 
 # Konfigurasi API Key (Dynamic)
 def configure_api(api_key=None):
@@ -32,7 +40,7 @@ def generate_edge_cases(n=10, api_key=None):
     if api_key:
         genai.configure(api_key=api_key)
     
-    model = genai.GenerativeModel('gemini-2.0-flash')
+    model = get_gemini_client().using(GENERATOR_MODELS)
     
     prompt = f"""
     Bertindaklah sebagai "Adversarial AI Tester". Tugasmu adalah membuat {n} data sampel keamanan pangan yang "Tricky" atau "Menjebak".
@@ -71,7 +79,7 @@ def generate_edge_cases(n=10, api_key=None):
             df = pd.DataFrame(data)
             return df
         except Exception as e:
-            if "429" in str(e) or "Quota exceeded" in str(e):
+            if is_rate_limit_error(e):
                 wait_time = base_delay * (attempt + 1)
                 print(f"⚠️ Quota Exceeded. Menunggu {wait_time} detik sebelum retry...")
                 time.sleep(wait_time)
@@ -1,7 +1,26 @@
 import google.generativeai as genai
 import pandas as pd
 import os
+import random
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.rate_limit import TokenBucket, backoff_delay, is_rate_limit_error
+from core.gemini_client import AllModelsFailed, get_gemini_client
+
+# Kuota default Gemini Flash (free tier): 15 request/menit
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_MAX_CONCURRENCY = 4
+# Batas total menunggu circuit breaker terbuka per baris (detik); lewat dari ini baris diberi label fail safe
+DEFAULT_MAX_CIRCUIT_WAIT = 600
+# Kolom label_status: asal label tiap baris
+STATUS_OK = "ok"                      # Jawaban model
+STATUS_FAIL_SAFE = "fail_safe"        # Retry habis / error -> 0
+STATUS_CIRCUIT_OPEN = "circuit_open"  # Semua model di-circuit-break terlalu lama -> 0, jangan dipakai training
+# Urutan preferensi model untuk labeling (kesehatan model dibagi dengan client bersama)
+LABELER_MODELS = ['gemini-2.0-flash', 'gemini-2.0-flash-lite', 'gemini-flash-latest']
 
 # Konfigurasi API (Dynamic)
 def configure_api(api_key=None):
@@ -23,82 +42,133 @@ def configure_api(api_key=None):
     if key:
         genai.configure(api_key=key)
 
-def label_data(input_file="generated_samples.csv", api_key=None):
-    if api_key:
-        genai.configure(api_key=api_key)
-
-    if not os.path.exists(input_file):
-        print("⚠️ File input tidak ada.")
-        return pd.DataFrame()
-
-    df = pd.read_csv(input_file)
-    print(f"🔍 Melabeli {len(df)} data...")
-    
-    labels = []
-    reasons = []
-
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    
-    for index, row in df.iterrows():
-        # Prompt Strict Auditor
-        prompt = f"""
+def build_prompt(row):
+    # Prompt Strict Auditor
+    return f"""
         Bertindaklah sebagai "Profesor Keamanan Pangan" yang SANGAT KETAT.
         Tentukan apakah sampel makanan ini AMAN (1) atau BERBAHAYA (0).
-        
+
         Kondisi:
         - Bahan: {row['bahan_baku']} ({row['kategori']})
         - Fisik: Warna {row['warna']}, Bau {row['bau']}, Tekstur {row['tekstur']}
         - Lingkungan: Suhu {row['suhu']} C, Lama {row['lama_simpan']} jam
         - pH: {row['ph']}
-        
+
         Aturan Fatal:
         - Suhu > 5C dan < 60C selama > 2-4 jam untuk daging/susu = BAHAYA (0).
         - Bau busuk/asem = BAHAYA (0).
         - pH tidak sesuai spek bahan = BAHAYA (0).
-        
+
         Jawab hanya dengan angka: 1 (Aman) atau 0 (Bahaya).
         """
-        
-        max_retries = 3
-        base_delay = 5
-        
-        success = False
-        for attempt in range(max_retries):
-            try:
-                response = model.generate_content(prompt)
-                verdict = response.text.strip()
-                
-                # Parsing jawaban kasar (kadang AI cerewet)
-                if "0" in verdict:
-                    lbl = 0
-                elif "1" in verdict:
-                    lbl = 1
-                else:
-                    lbl = 0 # Default Paranoid
-                
-                labels.append(lbl)
-                print(f"[{index+1}] {row['bahan_baku']} ({row['suhu']}C/{row['lama_simpan']}h) -> Label: {lbl}")
-                time.sleep(2) # Normal rate limit buffer
-                success = True
-                break # Berhasil, keluar dari loop retry
-                
-            except Exception as e:
-                if "429" in str(e) or "Quota exceeded" in str(e):
-                    wait_time = base_delay * (attempt + 1)
-                    print(f"⏳ Kena Limit (429). Tunggu {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"Error labeling: {e}")
-                    break
-        
-        if not success:
-            labels.append(0) # Fail safe jika retry habis
-
-    df['aman_dimakan'] = labels
+
+def parse_verdict(verdict):
+    # Parsing jawaban kasar (kadang AI cerewet)
+    if "0" in verdict:
+        return 0
+    elif "1" in verdict:
+        return 1
+    return 0 # Default Paranoid
+
+def label_row(model, position, row, limiter, max_retries=3, base_delay=5, max_circuit_wait=DEFAULT_MAX_CIRCUIT_WAIT):
+    """
+    Label satu baris dengan rate limit + exponential backoff ber-jitter. Return (label, label_status).
+    Gagal total -> 0 (fail safe). Jika semua model sedang di-circuit-break, tunggu sampai circuit dibuka
+    lagi tanpa memakai jatah retry; jika total tunggu melewati max_circuit_wait -> (0, STATUS_CIRCUIT_OPEN).
+    """
+    prompt = build_prompt(row)
+    circuit_waited = 0.0
+
+    attempt = 0
+    while attempt < max_retries:
+        limiter.acquire() # Tunggu giliran sesuai kuota (request/menit)
+        try:
+            response = model.generate_content(prompt)
+            lbl = parse_verdict(response.text.strip())
+            print(f"[{position+1}] {row['bahan_baku']} ({row['suhu']}C/{row['lama_simpan']}h) -> Label: {lbl}")
+            return lbl, STATUS_OK
+        except Exception as e:
+            if isinstance(e, AllModelsFailed) and e.retry_at is not None:
+                # Circuit terbuka (mis. 429 + retry-after): bukan jawaban model, jadi jangan dihitung sebagai retry
+                wait_time = max(0.0, e.retry_at - time.time()) + random.uniform(0, 1)
+                if circuit_waited + wait_time > max_circuit_wait:
+                    print(f"⏭️ [{position+1}] Semua model di-circuit-break terlalu lama, label fail safe 0.")
+                    return 0, STATUS_CIRCUIT_OPEN
+                print(f"⏳ [{position+1}] Circuit terbuka. Tunggu {wait_time:.1f}s...")
+                circuit_waited += wait_time
+                time.sleep(wait_time)
+                continue
+            if is_rate_limit_error(e):
+                wait_time = backoff_delay(attempt, base_delay)
+                print(f"⏳ [{position+1}] Kena Limit (429). Tunggu {wait_time:.1f}s...")
+                time.sleep(wait_time)
+            else:
+                print(f"Error labeling: {e}")
+                break
+        attempt += 1
+
+    return 0, STATUS_FAIL_SAFE # Fail safe jika retry habis
+
+def label_data(input_file="generated_samples.csv", api_key=None, df=None, model=None,
+               requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+               max_retries=3, base_delay=5, limiter=None, max_circuit_wait=DEFAULT_MAX_CIRCUIT_WAIT):
+    """
+    Label data secara paralel (thread pool) dengan rate limiter token bucket.
+    - df    : DataFrame langsung (jika None, dibaca dari input_file)
+    - model : objek dengan generate_content(prompt), mis. core.llm_stub.StubGenerativeModel untuk testing
+    - limiter : TokenBucket bersama (mis. dari pipeline_loop); jika None dibuat baru per panggilan
+    Urutan & jumlah baris output sama dengan input. Kolom label_status menandai asal label
+    (STATUS_OK / STATUS_FAIL_SAFE / STATUS_CIRCUIT_OPEN); trainer tidak memakai baris STATUS_CIRCUIT_OPEN.
+    """
+    if api_key:
+        genai.configure(api_key=api_key)
+
+    if df is None:
+        if not os.path.exists(input_file):
+            print("⚠️ File input tidak ada.")
+            return pd.DataFrame()
+        df = pd.read_csv(input_file)
+    else:
+        df = df.copy()
+
+    print(f"🔍 Melabeli {len(df)} data (maks {max_concurrency} paralel, {requests_per_minute} req/menit)...")
+
+    if model is None:
+        model = get_gemini_client().using(LABELER_MODELS)
+    if limiter is None:
+        limiter = TokenBucket.per_minute(requests_per_minute, burst=max_concurrency)
+
+    # Jumlah request in-flight dibatasi oleh ukuran pool
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = [
+            executor.submit(label_row, model, position, row, limiter, max_retries, base_delay, max_circuit_wait)
+            for position, (_, row) in enumerate(df.iterrows())
+        ]
+        results = [f.result() for f in futures] # Urutan tetap sesuai input
+
+    df['aman_dimakan'] = [lbl for lbl, _ in results]
+    df['label_status'] = [status for _, status in results]
+    unlabeled = (df['label_status'] == STATUS_CIRCUIT_OPEN).sum()
+    if unlabeled:
+        print(f"⚠️ {unlabeled} baris tidak terjawab model (circuit breaker terbuka), ditandai '{STATUS_CIRCUIT_OPEN}'.")
     return df
 
 if __name__ == "__main__":
-    df_labeled = label_data()
-    if not df_labeled.empty:
-        df_labeled.to_csv("labeled_samples.csv", index=False)
-        print("✅ Data berhasil dilabeli dan disimpan ke labeled_samples.csv")
+    if "--stub" in sys.argv:
+        # Uji lokal tanpa API: latency 0.3-0.8s dan 20% request kena 429
+        from core.llm_stub import StubGenerativeModel
+        stub = StubGenerativeModel(responder=lambda p: "1" if "normal" in p else "0",
+                                   latency=(0.3, 0.8), error_rate=0.2, seed=42)
+        df_test = pd.DataFrame([{
+            "kategori": "Daging", "bahan_baku": f"Sampel {i}", "warna": "merah segar",
+            "bau": "normal" if i % 2 else "busuk", "tekstur": "kenyal", "suhu": 4, "lama_simpan": 2, "ph": 6.0
+        } for i in range(20)])
+        start = time.perf_counter()
+        df_labeled = label_data(df=df_test, model=stub, requests_per_minute=600, base_delay=0.5)
+        print(f"✅ {len(df_labeled)} baris dalam {time.perf_counter() - start:.1f}s ({stub.calls} panggilan ke stub)")
+        print(df_labeled[['bahan_baku', 'bau', 'aman_dimakan']].to_string())
+    else:
+        df_labeled = label_data()
+        if not df_labeled.empty:
+            df_labeled.to_csv("labeled_samples.csv", index=False)
+            print("✅ Data berhasil dilabeli dan disimpan ke labeled_samples.csv")
@@ -6,11 +6,163 @@ import trainer
 import sys
 import getpass
 import os
+import queue
+import random
+import threading
 
-def main_loop(max_iterations=50):
-    print("🚀 MEMULAI SISTEM ACTIVE LEARNING LOOP (AI-DRIVEN)")
-    
-    # 0. Setup API Key (Auto-Detect)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.rate_limit import TokenBucket
+
+# Pipeline bertahap: [generator] -> antrian -> [labeler] -> antrian -> [trainer]
+# Ketiga stage jalan bersamaan di thread masing-masing, jadi kuota API tetap terpakai saat
+# trainer sedang melatih, dan CPU tidak menganggur saat menunggu jawaban Gemini.
+DEFAULT_BATCH_SIZE = 10          # Sampel per panggilan generator
+DEFAULT_RETRAIN_THRESHOLD = 30   # Retrain setelah sekian baris berlabel baru terkumpul
+STATS_INTERVAL = 30              # Detik antar laporan statistik
+
+_DONE = object() # Sentinel: stage sebelumnya sudah selesai
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.busy = 0.0     # Detik mengerjakan batch
+        self.blocked = 0.0  # Detik menunggu antrian hilir yang penuh (backpressure)
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, rows, busy):
+        with self._lock:
+            self.batches += 1
+            self.rows += rows
+            self.busy += busy
+
+    def record_error(self):
+        # Dipanggil dari thread stage masing-masing, dibaca thread utama lewat snapshot()
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.perf_counter() - self.started, 1e-9)
+            return {
+                "stage": self.name,
+                "batches": self.batches,
+                "rows": self.rows,
+                "errors": self.errors,
+                "rows_per_min": round(self.rows / elapsed * 60, 1),
+                "busy_pct": round(100 * self.busy / elapsed, 1),
+                "blocked_pct": round(100 * self.blocked / elapsed, 1),
+            }
+
+def _put(q, item, abort, stats):
+    # Blok selama antrian penuh (backpressure), tapi tetap bisa dibatalkan
+    start = time.perf_counter()
+    while not abort.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            break
+        except queue.Full:
+            continue
+    with stats._lock:
+        stats.blocked += time.perf_counter() - start
+    return not abort.is_set()
+
+def _get(q, abort):
+    while not abort.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
+
+def generator_stage(generate_fn, out_q, stop, abort, stats, max_batches, limiter):
+    produced = 0
+    while not stop.is_set() and produced < max_batches:
+        limiter.acquire() # Kuota API dibagi dengan labeler
+        start = time.perf_counter()
+        try:
+            df_gen = generate_fn()
+        except Exception as e:
+            print(f"⚠️ [generator] {e}")
+            df_gen = None
+        if df_gen is None or df_gen.empty:
+            stats.record_error()
+            stop.wait(5) # Coba lagi nanti (tetap responsif terhadap Ctrl+C)
+            continue
+        stats.record(len(df_gen), time.perf_counter() - start)
+        if not _put(out_q, df_gen, abort, stats):
+            return
+        produced += 1
+    _put(out_q, _DONE, abort, stats)
+
+def labeler_stage(label_fn, in_q, out_q, abort, stats):
+    # Tetap jalan setelah Ctrl+C pertama sampai antrian generator habis (draining)
+    while True:
+        df_gen = _get(in_q, abort)
+        if df_gen is _DONE:
+            break
+        start = time.perf_counter()
+        try:
+            df_labeled = label_fn(df_gen)
+        except Exception as e:
+            print(f"⚠️ [labeler] {e}")
+            stats.record_error()
+            continue
+        stats.record(len(df_labeled), time.perf_counter() - start)
+        if not _put(out_q, df_labeled, abort, stats):
+            return
+    _put(out_q, _DONE, abort, stats)
+
+def trainer_stage(retrain_fn, in_q, abort, stats, retrain_threshold, results, done):
+    try:
+        _train_until_done(retrain_fn, in_q, abort, stats, retrain_threshold, results)
+    finally:
+        done.set()
+
+def _train_until_done(retrain_fn, in_q, abort, stats, retrain_threshold, results):
+    pending = []
+
+    def flush():
+        df_new = pd.concat(pending, ignore_index=True)
+        pending.clear()
+        print(f"🏋️ [trainer] Retrain dengan {len(df_new)} baris baru...")
+        start = time.perf_counter()
+        try:
+            accuracy = retrain_fn(df_new)
+        except Exception as e:
+            print(f"⚠️ [trainer] {e}")
+            stats.record_error()
+            return
+        stats.record(len(df_new), time.perf_counter() - start)
+        if accuracy:
+            results.append(accuracy)
+            print(f"✅ Retrain ke-{stats.batches} selesai. Akurasi saat ini: {accuracy:.2%}")
+
+    while True:
+        df_labeled = _get(in_q, abort)
+        if df_labeled is _DONE:
+            break
+        pending.append(df_labeled)
+        if sum(len(df) for df in pending) >= retrain_threshold:
+            flush()
+
+    # Data berlabel yang sudah dibayar dengan kuota API jangan dibuang saat berhenti
+    if pending and not abort.is_set():
+        flush()
+
+def print_stats(all_stats, queues):
+    depth = " | ".join(f"antrian {name}: {q.qsize()}/{q.maxsize}" for name, q in queues)
+    print(f"\n📊 Statistik pipeline ({depth})")
+    for stats in all_stats:
+        s = stats.snapshot()
+        print(f"   {s['stage']:<9} batch={s['batches']:<4} baris={s['rows']:<5} {s['rows_per_min']:>7} baris/menit "
+              f"sibuk={s['busy_pct']}% tertahan={s['blocked_pct']}% error={s['errors']}")
+
+def get_api_key():
+    # Setup API Key (Auto-Detect)
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         try:
@@ -22,66 +174,112 @@ def main_loop(max_iterations=50):
                         break
         except:
             pass
-            
+
     if not api_key:
         print("\n🔑 Masukkan Google Gemini API Key Anda:")
         api_key = getpass.getpass(prompt="API Key: ") # Aman, hidden input
         if not api_key:
              api_key = input("API Key (Visible): ") # Fallback
+    return api_key
+
+def run_pipeline(generate_fn, label_fn, retrain_fn, max_batches=50, retrain_threshold=DEFAULT_RETRAIN_THRESHOLD,
+                 batch_size=DEFAULT_BATCH_SIZE, limiter=None, stats_interval=STATS_INTERVAL):
+    """
+    Jalankan generator, labeler, dan trainer sebagai stage paralel dengan antrian terbatas.
+    Ctrl+C pertama: berhenti generate, sisa antrian tetap dilabeli & dilatih (draining).
+    Ctrl+C kedua: berhenti seketika.
+    """
+    limiter = limiter or TokenBucket.per_minute(labeler.DEFAULT_REQUESTS_PER_MINUTE, burst=labeler.DEFAULT_MAX_CONCURRENCY)
+    stop = threading.Event()
+    abort = threading.Event()
+
+    # Antrian terbatas = backpressure: stage hulu berhenti sebentar jika hilir tertinggal.
+    # Antrian berlabel cukup untuk satu putaran retrain, jadi labeler tetap jalan saat trainer sibuk.
+    gen_q = queue.Queue(maxsize=2)
+    labeled_q = queue.Queue(maxsize=-(-retrain_threshold // batch_size) + 1)
+
+    stats = [StageStats("generator"), StageStats("labeler"), StageStats("trainer")]
+    accuracies = []
+    done = threading.Event() # Di-set trainer (stage terakhir) setelah semua antrian habis
+    threads = [
+        threading.Thread(target=generator_stage, args=(generate_fn, gen_q, stop, abort, stats[0], max_batches, limiter), daemon=True),
+        threading.Thread(target=labeler_stage, args=(label_fn, gen_q, labeled_q, abort, stats[1]), daemon=True),
+        threading.Thread(target=trainer_stage, args=(retrain_fn, labeled_q, abort, stats[2], retrain_threshold, accuracies, done), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    last_report = time.perf_counter()
+    # Tunggu lewat Event, bukan Thread.join(): Ctrl+C di tengah join() bisa membuat thread
+    # yang masih jalan dianggap sudah berhenti (bpo-45274), sehingga draining terpotong.
+    while not done.is_set():
+        try:
+            done.wait(timeout=1.0)
+            if time.perf_counter() - last_report >= stats_interval:
+                print_stats(stats, [("gen", gen_q), ("label", labeled_q)])
+                last_report = time.perf_counter()
+        except KeyboardInterrupt:
+            if not stop.is_set():
+                stop.set()
+                print("\n🛑 Berhenti generate. Menyelesaikan antrian (Ctrl+C lagi untuk keluar paksa)...")
+            else:
+                abort.set()
+                print("\n⛔ Keluar paksa, antrian dibuang.")
+                break
+
+    print_stats(stats, [("gen", gen_q), ("label", labeled_q)])
+    return accuracies
 
+def main_loop(max_iterations=50):
+    print("🚀 MEMULAI SISTEM ACTIVE LEARNING LOOP (AI-DRIVEN)")
+
+    api_key = get_api_key()
     if not api_key:
         print("❌ API Key wajib diisi untuk menjalankan AI Loop.")
         return
 
-    print("✅ API Key terdeteksi. Memulai Loop...")
+    generator.configure_api(api_key)
+    print("✅ API Key terdeteksi. Memulai Pipeline...")
     print("Tekan CTRL+C untuk menghentikan loop.")
-    
-    iteration = 1
-    total_acc = 0
-    
-    try:
-        while True:
-            if iteration > max_iterations:
-                print("🏁 Batas iterasi tercapai.")
-                break
-                
-            print(f"\n{'='*40}")
-            print(f"🔄 ITERASI KE-{iteration}")
-            print(f"{'='*40}")
-            
-            # 1. Generate Samples
-            print("1. 🧠 Minta Gemini buat soal susah...")
-            df_gen = generator.generate_edge_cases(n=10, api_key=api_key)
-            if df_gen.empty:
-                print("⚠️ Gagal generate, coba lagi nanti...")
-                time.sleep(5)
-                continue
-            df_gen.to_csv("generated_samples.csv", index=False)
-            
-            # 2. Label Samples
-            print("2. ⚖️ Minta AI Auditor mengoreksi jawaban...")
-            df_labeled = labeler.label_data("generated_samples.csv", api_key=api_key)
-            if df_labeled.empty:
-                print("⚠️ Gagal labeling.")
-                continue
-            df_labeled.to_csv("labeled_samples.csv", index=False)
-            
-            # 3. Retrain Model
-            print("3. 🏋️ Melatih ulang model dengan data baru...")
-            accuracy = trainer.retrain_model()
-            
-            if accuracy:
-                total_acc = accuracy
-                print(f"✅ Iterasi {iteration} Selesai. Akurasi saat ini: {accuracy:.2%}")
-            
-            iteration += 1
-            print("⏳ Istirahat 60 detik (Cooling Down)...")
-            time.sleep(60)
-            
-    except KeyboardInterrupt:
-        print("\n🛑 Loop dihentikan oleh User.")
-        print("Sistem telah menyimpan model terakhir yang paling pintar.")
-        sys.exit()
+
+    # Satu token bucket untuk generator & labeler: kuota API per menit dibagi bersama
+    limiter = TokenBucket.per_minute(labeler.DEFAULT_REQUESTS_PER_MINUTE, burst=labeler.DEFAULT_MAX_CONCURRENCY)
+    accuracies = run_pipeline(
+        generate_fn=lambda: generator.generate_edge_cases(n=DEFAULT_BATCH_SIZE),
+        label_fn=lambda df: labeler.label_data(df=df, limiter=limiter),
+        retrain_fn=lambda df: trainer.retrain_model(df_new=df),
+        max_batches=max_iterations,
+        limiter=limiter,
+    )
+    if accuracies:
+        print(f"🏁 Selesai. Akurasi terakhir: {accuracies[-1]:.2%}")
+    print("Sistem telah menyimpan model terakhir yang paling pintar.")
+
+def stub_demo():
+    # Uji lokal tanpa API & tanpa menyentuh dataset/model: semua stage disimulasikan
+    from core.llm_stub import StubGenerativeModel
+    rng = random.Random(42)
+    stub = StubGenerativeModel(responder=lambda p: "1" if "normal" in p else "0", latency=(0.05, 0.2), seed=42)
+
+    def fake_generate():
+        time.sleep(0.3)
+        return pd.DataFrame([{
+            "kategori": "Daging", "bahan_baku": "Sampel", "warna": "merah segar",
+            "bau": rng.choice(["normal", "busuk"]), "tekstur": "kenyal",
+            "suhu": rng.randint(0, 40), "lama_simpan": rng.randint(1, 48), "ph": 6.0
+        } for _ in range(DEFAULT_BATCH_SIZE)])
+
+    def fake_retrain(df_new):
+        time.sleep(1.0)
+        return rng.uniform(0.85, 0.95)
+
+    limiter = TokenBucket.per_minute(1200, burst=8)
+    return run_pipeline(fake_generate,
+                        lambda df: labeler.label_data(df=df, model=stub, limiter=limiter),
+                        fake_retrain, max_batches=12, limiter=limiter, stats_interval=2)
 
 if __name__ == "__main__":
-    main_loop(100) # Bisa jalan sampai 100x putaran otomatis
+    if "--stub" in sys.argv:
+        stub_demo()
+    else:
+        main_loop(100) # Bisa jalan sampai 100 batch generator
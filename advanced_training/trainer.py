@@ -1,86 +1,248 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import accuracy_score
 import joblib
+import json
 import os
-import shutil
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.csv_logger import get_writer
+from core.dataset_store import get_dataset_store
+from core.model_registry import ModelRegistry, atomic_dump
 
 # Path Configuration
-BASE_CSV = "../csv/dataset_pangan.csv"
 NEW_DATA_CSV = "labeled_samples.csv"
 MODEL_PATH = "../model.pkl"
+STATE_PATH = "trainer_state.json"          # Hitungan langkah incremental & akurasi acuan
+RETRAIN_LOG = "../csv/retrain_log.csv"     # Wall-clock per retrain (full vs incremental)
+RETRAIN_LOG_COLUMNS = ["timestamp", "mode", "reason", "data_version", "rows_total", "rows_new", "n_trees", "fit_seconds",
+                       "publish_seconds", "distill_seconds", "total_seconds", "accuracy"]
+
+# Kebijakan retrain incremental
+INCREMENTAL_TREES = 10      # Pohon baru per langkah incremental
+MAX_TREES = 150             # Batas jumlah pohon; pohon tertua dibuang (tree replacement)
+FULL_REFIT_EVERY = 10       # Full refit setelah sekian langkah incremental
+MAX_ACCURACY_DROP = 0.02    # Full refit jika akurasi holdout turun lebih dari ini dari acuan
+REPLAY_FACTOR = 4           # Sampel replay data lama = REPLAY_FACTOR x jumlah data baru
+MIN_REPLAY_ROWS = 200       # ...tapi minimal sekian baris, supaya pohon baru tidak dilatih pada segelintir data
+MIN_REPLAY_PER_CLASS = 5    # Pastikan kedua kelas ada di data incremental
+
+categorical_features = ["kategori", "bahan_baku", "warna", "bau", "tekstur"]
+numerical_features = ["suhu", "lama_simpan", "ph"]
+
+def build_pipeline(n_estimators=100, n_jobs=-1):
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), numerical_features),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features),
+        ]
+    )
+
+    return Pipeline([
+        ("preprocessor", preprocessor),
+        ("classifier", RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs))
+    ])
+
+def stable_split(X, test_percent=20):
+    """
+    Split train/holdout berdasarkan hash isi baris (bukan posisi), jadi baris yang sama selalu
+    jatuh ke sisi yang sama walau dataset terus bertambah. Perlu supaya akurasi mode incremental
+    dan full refit diukur pada holdout yang sebanding.
+    """
+    is_test = (pd.util.hash_pandas_object(X, index=False) % 100) < test_percent
+    return ~is_test.values, is_test.values
+
+def load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {"incremental_steps": 0, "baseline_accuracy": None}
+
+def save_state(state):
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, STATE_PATH)
+
+def replay_sample(X_old, y_old, n_rows, random_state=42):
+    """Sampel data lama per kelas (proporsional, minimal MIN_REPLAY_PER_CLASS per kelas)."""
+    parts = []
+    for label in sorted(y_old.unique()):
+        idx = y_old.index[y_old == label]
+        share = int(round(n_rows * len(idx) / len(y_old)))
+        take = min(len(idx), max(share, MIN_REPLAY_PER_CLASS))
+        parts.append(y_old.loc[idx].sample(n=take, random_state=random_state).index)
+    picked = parts[0].append(parts[1:]) if len(parts) > 1 else parts[0]
+    return X_old.loc[picked], y_old.loc[picked]
+
+def incremental_update(pipeline, X_fit, y_fit, n_trees=INCREMENTAL_TREES, max_trees=MAX_TREES):
+    """
+    Tambah n_trees pohon (warm start) yang dilatih pada X_fit, lalu buang pohon tertua di atas max_trees.
+    Preprocessor tidak di-fit ulang: kategori baru diabaikan (handle_unknown="ignore") sampai full refit.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    forest = pipeline.named_steps["classifier"]
+
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_trees)
+    forest.fit(preprocessor.transform(X_fit), y_fit)
+
+    forest.estimators_ = forest.estimators_[-max_trees:]
+    forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+    return pipeline
 
-def retrain_model():
+def choose_mode(mode, state, model_exists):
+    if mode != "auto":
+        return mode, "diminta"
+    if not model_exists:
+        return "full", "model belum ada"
+    if state.get("baseline_accuracy") is None:
+        return "full", "belum ada akurasi acuan"
+    if state["incremental_steps"] >= FULL_REFIT_EVERY:
+        return "full", f"{FULL_REFIT_EVERY} langkah incremental"
+    return "incremental", "jadwal"
+
+def _rotate_old_log():
+    # Log dengan kolom lama (sebelum publish/distill dipisah) disisihkan supaya header tetap cocok
+    if not os.path.exists(RETRAIN_LOG):
+        return
+    with open(RETRAIN_LOG, encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+    if header != RETRAIN_LOG_COLUMNS:
+        os.replace(RETRAIN_LOG, RETRAIN_LOG.replace(".csv", f".{datetime.now():%Y%m%d-%H%M%S}.csv"))
+
+def log_retrain(**row):
+    _rotate_old_log()
+    writer = get_writer(RETRAIN_LOG, RETRAIN_LOG_COLUMNS)
+    writer.write({"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **row})
+    writer.flush()
+
+def retrain_model(df_new=None, mode="auto"):
+    """
+    Latih ulang model dengan dataset dasar + data baru.
+    df_new: DataFrame data berlabel langsung dari memori (pipeline); jika None dibaca dari NEW_DATA_CSV.
+    mode  : "auto" (incremental, full refit sesuai kebijakan), "incremental", atau "full".
+    """
     print("🔄 Memulai proses Retraining...")
-    
-    # 1. Load Original Data
-    if os.path.exists(BASE_CSV):
-        df_base = pd.read_csv(BASE_CSV)
-    else:
+    start_total = time.perf_counter()
+
+    # 1. Dataset berversi (versi 1 diisi dari csv/dataset_pangan.csv saat pertama kali)
+    store = get_dataset_store()
+    if store.is_empty():
         print("❌ Dataset dasar tidak ditemukan!")
         return None
 
     # 2. Load New Evidence (AI Labeled)
-    if os.path.exists(NEW_DATA_CSV):
+    if df_new is not None:
+        print(f"📥 Menerima {len(df_new)} data baru dari pipeline.")
+    elif os.path.exists(NEW_DATA_CSV):
         df_new = pd.read_csv(NEW_DATA_CSV)
         print(f"📥 Menemukan {len(df_new)} data baru dari AI.")
     else:
         print("⚠️ Tidak ada data baru untuk dilatih.")
         return None
-    
+
+    # Label fail safe karena circuit breaker terbuka bukan penilaian model -> tidak ikut training
+    if "label_status" in df_new.columns:
+        unlabeled = df_new["label_status"] == "circuit_open"  # labeler.STATUS_CIRCUIT_OPEN
+        if unlabeled.any():
+            print(f"⏭️ {int(unlabeled.sum())} baris tanpa jawaban model (circuit_open) tidak dipakai.")
+            df_new = df_new[~unlabeled]
+
     # 3. Merge Data (Augmentation)
-    # Pastikan kolom sama
+    # Dedup lewat index hash baris (hanya data baru yang di-hash), lalu disimpan sebagai segment baru
     try:
-        df_combined = pd.concat([df_base, df_new], ignore_index=True)
-        # Drop duplicates untuk menjaga kesehatan data
-        df_combined.drop_duplicates(inplace=True)
+        result = store.append(df_new, note="retrain_model")
     except Exception as e:
         print(f"❌ Gagal merge data: {e}")
         return None
+    print(f"💾 Dataset v{result.version}: +{len(result.added)} baris baru ({result.duplicates} duplikat dilewati).")
+    if result.added.empty and mode == "auto":
+        print("⚠️ Tidak ada data baru (semua duplikat), retrain dilewati.")
+        return None
+    df_combined = store.load(result.version)
 
     # 4. Training Process (Standard Sklearn)
     X = df_combined.drop("aman_dimakan", axis=1)
     y = df_combined["aman_dimakan"]
+    train_mask, test_mask = stable_split(X)
+    X_train, X_test, y_train, y_test = X[train_mask], X[test_mask], y[train_mask], y[test_mask]
+    # Baris baru = segment terakhir versi ini
+    is_new = df_combined.index >= len(df_combined) - len(result.added)
 
-    categorical_features = ["kategori", "bahan_baku", "warna", "bau", "tekstur"]
-    numerical_features = ["suhu", "lama_simpan", "ph"]
+    state = load_state()
+    registry = ModelRegistry()
+    active_version = registry.current()
+    mode, reason = choose_mode(mode, state, active_version is not None or os.path.exists(MODEL_PATH))
+    pipeline = None
 
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("num", StandardScaler(), numerical_features),
-            ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features),
-        ]
-    )
+    if mode == "incremental":
+        # Lanjutkan dari versi aktif di registry (model.pkl hanya jika registry belum ada)
+        pipeline = registry.load_pipeline(active_version) if active_version else joblib.load(MODEL_PATH)
+        new_train = is_new[train_mask]
+        X_recent, y_recent = X_train[new_train], y_train[new_train]
+        X_replay, y_replay = replay_sample(X_train[~new_train], y_train[~new_train], max(REPLAY_FACTOR * len(X_recent), MIN_REPLAY_ROWS))
+        X_fit = pd.concat([X_recent, X_replay])
+        y_fit = pd.concat([y_recent, y_replay])
 
-    pipeline = Pipeline([
-        ("preprocessor", preprocessor),
-        ("classifier", RandomForestClassifier(n_estimators=100, random_state=42))
-    ])
+        if y_fit.nunique() < 2:
+            mode, reason = "full", "data incremental hanya satu kelas"
+        else:
+            start_fit = time.perf_counter()
+            incremental_update(pipeline, X_fit, y_fit)
+            fit_seconds = time.perf_counter() - start_fit
+            acc = pipeline.score(X_test, y_test)
+            print(f"📈 Akurasi Model (incremental, +{len(X_recent)} baru / {len(X_replay)} replay): {acc:.2%}")
+
+            if acc < state["baseline_accuracy"] - MAX_ACCURACY_DROP:
+                log_retrain(mode="incremental", reason=reason, data_version=result.version, rows_total=len(df_combined), rows_new=int(is_new.sum()),
+                            n_trees=len(pipeline.named_steps["classifier"].estimators_), fit_seconds=round(fit_seconds, 4),
+                            total_seconds=round(time.perf_counter() - start_total, 4), accuracy=round(acc, 4))
+                mode, reason = "full", f"akurasi turun ({acc:.2%} < acuan {state['baseline_accuracy']:.2%})"
+            else:
+                state["incremental_steps"] += 1
+
+    if mode == "full":
+        print(f"🏗️ Full refit ({reason})...")
+        pipeline = build_pipeline()
+        start_fit = time.perf_counter()
+        pipeline.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start_fit
+        pipeline.set_params(classifier__n_jobs=None) # Predict satu sampel di app lebih cepat tanpa thread pool
+        acc = pipeline.score(X_test, y_test)
+        print(f"📈 Akurasi Model Baru: {acc:.2%}")
+        state = {"incremental_steps": 0, "baseline_accuracy": acc}
+
+    # 5. Commit Changes (dataset sudah di-commit sebagai versi baru di store)
+    # Simpan Model Baru: versi baru di registry (pkl + array compiled + metadata), pointer ditukar atomik.
+    # Distilasi student (beberapa detik) hanya saat full refit: langkah incremental harus tetap murah,
+    # versi incremental dilayani forest compiled sampai full refit berikutnya.
+    start_publish = time.perf_counter()
+    version = registry.publish(pipeline, metrics={"accuracy": acc}, data_version=result.version,
+                               training_seconds=fit_seconds, source=f"trainer {mode}", distill=(mode == "full"),
+                               df_labeled=df_combined)
+    publish_seconds = time.perf_counter() - start_publish
+    student_report = registry.metadata(version).get("student") or {}
+    distill_seconds = student_report.get("distill_seconds", 0.0)
+    atomic_dump(pipeline, MODEL_PATH) # Salinan untuk skrip lama yang membaca model.pkl langsung
+    state["data_version"] = result.version
+    state["model_version"] = version
+    save_state(state)
+    print(f"🚀 Model {version} berhasil di-publish dan siap dipakai.")
 
-    # Train
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    pipeline.fit(X_train, y_train)
-    
-    # Evaluation
-    acc = pipeline.score(X_test, y_test)
-    print(f"📈 Akurasi Model Baru: {acc:.2%}")
-
-    # 5. Commit Changes
-    # Simpan Dataset Baru (Overwrite base untuk evolusi)
-    # Backup dulu
-    shutil.copy(BASE_CSV, BASE_CSV + ".bak")
-    df_combined.to_csv(BASE_CSV, index=False)
-    print("💾 Dataset utama telah diperbarui (+Data AI).")
-
-    # Simpan Model Baru
-    joblib.dump(pipeline, MODEL_PATH)
-    print("🚀 Model berhasil di-update dan siap dipakai.")
+    total_seconds = time.perf_counter() - start_total
+    n_trees = len(pipeline.named_steps["classifier"].estimators_)
+    print(f"⏱️ Retrain {mode}: fit {fit_seconds:.2f}s, publish {publish_seconds:.2f}s (distilasi {distill_seconds:.2f}s), "
+          f"total {total_seconds:.2f}s ({len(df_combined)} baris, {n_trees} pohon)")
+    log_retrain(mode=mode, reason=reason, data_version=result.version, rows_total=len(df_combined), rows_new=int(is_new.sum()), n_trees=n_trees,
+                fit_seconds=round(fit_seconds, 4), publish_seconds=round(publish_seconds, 4), distill_seconds=round(distill_seconds, 4),
+                total_seconds=round(total_seconds, 4), accuracy=round(acc, 4))
 
     return acc
 
 if __name__ == "__main__":
-    retrain_model()
+    retrain_model(mode=sys.argv[1] if len(sys.argv) > 1 else "auto")
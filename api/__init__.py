@@ -0,0 +1 @@
+# Prediction server (HTTP) untuk sistem hilir yang tidak memakai UI Streamlit.
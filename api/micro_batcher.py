@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+def _bucket_label(batch_size):
+    # Kelompok ukuran batch: 1, 2, 3-4, 5-8, 9-16, ... (pangkat 2)
+    if batch_size <= 2:
+        return str(batch_size)
+    upper = 1 << (batch_size - 1).bit_length()
+    return f"{upper // 2 + 1}-{upper}"
+
+
+class BatchStats:
+    """Statistik throughput & latency per ukuran batch."""
+
+    def __init__(self, max_samples=1000):
+        self._lock = threading.Lock()
+        self.max_samples = max_samples
+        self.started_at = time.time()
+        self.buckets = {}
+
+    def record(self, batch_size, compute_seconds, request_latencies):
+        with self._lock:
+            b = self.buckets.setdefault(_bucket_label(batch_size), {
+                "batches": 0, "records": 0, "compute_seconds": 0.0, "latencies": []
+            })
+            b["batches"] += 1
+            b["records"] += batch_size
+            b["compute_seconds"] += compute_seconds
+            b["latencies"].extend(request_latencies)
+            # Simpan hanya N sampel latency terakhir supaya memori tetap kecil
+            if len(b["latencies"]) > self.max_samples:
+                del b["latencies"][:-self.max_samples]
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.time() - self.started_at
+            result = {"uptime_seconds": round(uptime, 1), "per_batch_size": {}}
+            total_records = 0
+            for label, b in sorted(self.buckets.items(), key=lambda kv: int(kv[0].split("-")[0])):
+                lat = sorted(b["latencies"])
+                total_records += b["records"]
+                result["per_batch_size"][label] = {
+                    "batches": b["batches"],
+                    "records": b["records"],
+                    "records_per_second": round(b["records"] / b["compute_seconds"], 1) if b["compute_seconds"] else None,
+                    "compute_ms_per_batch": round(1000 * b["compute_seconds"] / b["batches"], 3),
+                    "latency_ms_p50": round(1000 * lat[len(lat) // 2], 3) if lat else None,
+                    "latency_ms_p95": round(1000 * lat[int(len(lat) * 0.95)], 3) if lat else None,
+                }
+            result["total_records"] = total_records
+            result["overall_records_per_second"] = round(total_records / uptime, 1) if uptime else None
+            return result
+
+
+class MicroBatcher:
+    """
+    Menggabungkan request yang datang bersamaan menjadi satu batch,
+    supaya satu kali predict_proba melayani banyak client.
+
+    Batch dikirim jika jumlah record mencapai max_batch_size ATAU
+    record pertama sudah menunggu max_wait_ms.
+    """
+
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=5.0):
+        self.score_fn = score_fn  # list of dict -> list of hasil (urutan sama)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatchStats()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, records):
+        """Masukkan list record ke antrian, return Future berisi list hasil."""
+        future = Future()
+        self._queue.put((records, future, time.perf_counter()))
+        return future
+
+    def predict(self, records, timeout=30):
+        return self.submit(records).result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        n_records = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while n_records < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_records += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            records = [r for recs, _, _ in batch for r in recs]
+
+            start = time.perf_counter()
+            try:
+                results = self.score_fn(records)
+            except Exception as e:
+                self._score_separately(batch, e)
+                continue
+            done = time.perf_counter()
+
+            # Bagikan hasil ke masing-masing request sesuai urutan
+            offset = 0
+            latencies = []
+            for recs, future, enqueued_at in batch:
+                future.set_result(results[offset:offset + len(recs)])
+                offset += len(recs)
+                latencies.append(done - enqueued_at)
+
+            self.stats.record(len(records), done - start, latencies)
+
+    def _score_separately(self, batch, error):
+        # Batch gabungan gagal: ulangi per request supaya satu request bermasalah tidak menggagalkan yang lain
+        if len(batch) == 1:
+            batch[0][1].set_exception(error)
+            return
+        for recs, future, _ in batch:
+            try:
+                future.set_result(self.score_fn(recs))
+            except Exception as e:
+                future.set_exception(e)
@@ -0,0 +1,147 @@
+"""
+Prediction server headless (tanpa Streamlit) dengan micro-batching.
+
+Jalankan dari root project:
+    python -m api.prediction_server --port 8000
+
+Endpoint:
+    POST /predict  -> body: satu objek sampel, list sampel, atau {"samples": [...]}
+    GET  /stats    -> throughput & latency per ukuran batch, statistik memo prediksi
+    GET  /health   -> status & versi model
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Supaya bisa dijalankan sebagai script biasa (python api/prediction_server.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.features import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+from core.model_loader import get_fast_model, get_holder, get_model_for_rows
+from core.rules import get_recommendation, estimate_shelf_life
+from core.prediction_memo import get_prediction_memo
+from core.scoring import label_text
+from api.micro_batcher import MicroBatcher
+
+
+def _to_number(value):
+    number = float(value)
+    if not math.isfinite(number):  # json.loads menerima NaN / Infinity
+        raise ValueError(f"angka tidak valid: {value}")
+    return int(number) if number.is_integer() else number
+
+
+def parse_sample(raw):
+    """Validasi satu sampel sesuai kontrak kolom dataset_pangan.csv."""
+    if not isinstance(raw, dict):
+        raise ValueError("Setiap sampel harus berupa objek JSON.")
+    missing = [c for c in CATEGORICAL_FEATURES + NUMERICAL_FEATURES if c not in raw]
+    if missing:
+        raise ValueError(f"Field wajib tidak ada: {', '.join(missing)}")
+
+    sample = {c: str(raw[c]).strip() for c in CATEGORICAL_FEATURES}
+    try:
+        sample["suhu"] = _to_number(raw["suhu"])
+        sample["lama_simpan"] = _to_number(raw["lama_simpan"])
+        sample["ph"] = float(_to_number(raw["ph"]))
+    except (TypeError, ValueError):
+        raise ValueError("suhu, lama_simpan, dan ph harus berupa angka (bukan NaN / Infinity).")
+    return sample
+
+
+def score_records(records):
+    """Satu kali predict_proba untuk seluruh batch gabungan."""
+    model = get_model_for_rows(len(records))
+    predictions, risk_scores = get_prediction_memo().predict_with_risk(model, records, get_holder().version)
+
+    results = []
+    for sample, prediction, risk_score in zip(records, predictions, risk_scores):
+        pred_label = label_text(prediction)
+        results.append({
+            "prediksi": pred_label,
+            "aman_dimakan": int(prediction),
+            "risk_score": round(float(risk_score), 2),
+            "rekomendasi": get_recommendation(sample["kategori"], sample["suhu"], pred_label),
+            "estimasi_umur_simpan": estimate_shelf_life(sample["kategori"], sample["suhu"], sample["lama_simpan"],
+                                                        sample["ph"]),
+        })
+    return results
+
+
+class PredictionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Backlog default (5) terlalu kecil untuk banyak client bersamaan
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    batcher = None  # Di-set oleh run_server
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "model": get_holder().info()})
+        elif self.path == "/stats":
+            self._send_json(200, {**self.batcher.stats.snapshot(), "memo": get_prediction_memo().stats()})
+        else:
+            self._send_json(404, {"error": "Endpoint tidak ditemukan."})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Endpoint tidak ditemukan."})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+            single = isinstance(payload, dict) and "samples" not in payload
+            raw_samples = [payload] if single else (payload["samples"] if isinstance(payload, dict) else payload)
+            if not isinstance(raw_samples, list) or not raw_samples:
+                raise ValueError("Body harus berisi sampel atau list sampel.")
+            samples = [parse_sample(r) for r in raw_samples]
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            results = self.batcher.predict(samples)
+        except Exception as e:
+            self._send_json(500, {"error": f"Gagal prediksi: {e}"})
+            return
+
+        self._send_json(200, results[0] if single else {"results": results})
+
+    def log_message(self, format, *args):
+        pass  # Matikan log per request (mahal saat load tinggi)
+
+
+def run_server(host="127.0.0.1", port=8000, max_batch_size=64, max_wait_ms=5.0):
+    get_fast_model()  # Load + warm-up sebelum menerima request
+    PredictionHandler.batcher = MicroBatcher(score_records, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    server = PredictionHTTPServer((host, port), PredictionHandler)
+    print(f"🚀 Prediction server jalan di http://{host}:{port} (batch max {max_batch_size}, wait {max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Server dihentikan.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Food Safety Prediction Server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.max_batch_size, args.max_wait_ms)
@@ -1,22 +1,32 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
-import google.generativeai as genai
 import os
+import re
 import time
 from datetime import datetime
 import uuid
+from core.model_loader import get_fast_model, get_holder, get_model_for_rows
+from core.scoring import label_text, prepare_batch, score_batch
+from core.rules import get_recommendation, estimate_shelf_life, explain
+from core.shelf_life import get_shelf_life_model
+from core.whatif import HOUR_RANGES, TEMPS, hours_axis, sweep
+from core.features import HISTORY_COLUMNS, ACCESS_COLUMNS
+from core.csv_logger import get_writer
+from core.lab_archive import get_lab_archive
+from core.explanation_cache import get_explanation_cache, make_key
+from core.prediction_memo import get_prediction_memo
+from core.metrics import span, record
+from core.ph_resolver import PhResolver
+from core.catalog import get_catalog
+from core.gemini_client import get_gemini_client, AllModelsFailed, StreamInterrupted
+from core.explanation_stream import split_sections
 
 st.set_page_config(page_title="Food Safety Lab", layout="wide")
 
 # --- ACCESS LOGGING MECHANISM ---
 # Fungsi jalankan di awal untuk mencatat "Visitor"
 def log_visitor():
-    file_path = "csv/access_log.csv"
-    if not os.path.exists("csv"):
-        os.makedirs("csv")
-        
     # Generate Session ID (Simulasi user unik per sesi browser)
     if 'session_id' not in st.session_state:
         st.session_state['session_id'] = str(uuid.uuid4())
@@ -26,19 +36,24 @@ def log_visitor():
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         session_id = st.session_state['session_id']
         
-        # Simpan ke CSV
-        df_new = pd.DataFrame([{"timestamp": timestamp, "session_id": session_id, "page": "Home"}])
-        
-        if not os.path.exists(file_path):
-            df_new.to_csv(file_path, index=False)
-        else:
-            df_new.to_csv(file_path, mode='a', header=False, index=False)
+        # Simpan ke CSV (hanya enqueue, ditulis oleh writer thread di background)
+        get_writer("csv/access_log.csv", ACCESS_COLUMNS).write({"timestamp": timestamp, "session_id": session_id, "page": "Home"})
             
         st.session_state['logged'] = True
 
 log_visitor()
 # --------------------------------
 
+# Arsip kolumnar history lab (Parquet per tanggal). None jika pyarrow tidak ada -> fallback ke CSV saja
+lab_archive = get_lab_archive()
+
+# Client Gemini bersama: fallback antar model, circuit breaker 429/404, statistik kesehatan model
+gemini = get_gemini_client()
+
+def history_writer():
+    # CSV tetap ditulis (kompatibilitas), setiap batch juga masuk ke arsip kolumnar
+    return get_writer("history_lab.csv", HISTORY_COLUMNS, on_flush=lab_archive.append if lab_archive else None)
+
 # Sidebar untuk Konfigurasi AI
 with st.sidebar:
     st.header("⚙️ Konfigurasi AI (Gemini)")
@@ -80,13 +95,36 @@ with st.sidebar:
 
     # 4. Konfigurasi
     if api_key:
-        genai.configure(api_key=api_key)
+        gemini.configure(api_key)
     
     st.info("Mode: Super Informative AI (Gemini)")
 
+    # Kesehatan model Gemini (dibagi seluruh sesi dalam proses ini)
+    with st.expander("📡 Status Model Gemini"):
+        st.dataframe(pd.DataFrame(gemini.stats()).set_index("model"), use_container_width=True)
+
+    cache_stats = get_explanation_cache().stats()
+    st.caption(f"🗃️ Cache penjelasan: {cache_stats['entries']} entri | hit rate {cache_stats['hit_rate']:.0%} "
+               f"({cache_stats['hits']} hit / {cache_stats['misses']} miss)")
+    memo_stats = get_prediction_memo().stats()
+    st.caption(f"🧮 Memo prediksi: {memo_stats['entries']}/{memo_stats['max_entries']} entri | hit rate {memo_stats['hit_rate']:.0%} "
+               f"({memo_stats['hits']} hit / {memo_stats['misses']} miss / {memo_stats['evictions']} eviction)")
+
     st.divider()
     st.header("📂 Data Laboratorium")
-    if os.path.exists("history_lab.csv"):
+    if lab_archive is not None:
+        # Jumlah baris dari metadata Parquet, tanpa membaca seluruh log
+        st.write(f"Total Sampel: {lab_archive.count_rows()}")
+        if st.button("Siapkan Log Lab (CSV)"):
+            st.session_state['lab_csv_export'] = lab_archive.export_csv()
+        if 'lab_csv_export' in st.session_state:
+            st.download_button(
+                label="Download Log Lab (CSV)",
+                data=st.session_state['lab_csv_export'],
+                file_name="history_lab.csv",
+                mime="text/csv"
+            )
+    elif os.path.exists("history_lab.csv"):
         df_log = pd.read_csv("history_lab.csv")
         st.write(f"Total Sampel: {len(df_log)}")
         st.download_button(
@@ -117,21 +155,32 @@ with st.expander("📖 Panduan Penggunaan Aplikasi (Klik Disini)"):
 st.write("Isi karakteristik makanan lalu klik prediksi.")
 
 # Load model pipeline (sudah termasuk preprocessor)
-model = joblib.load("model.pkl")
+# Di-load sekali per proses & dibagi ke semua sesi; reload otomatis jika model.pkl berubah.
+# Yang dipakai untuk prediksi adalah versi compiled (array NumPy, hasil identik & jauh lebih cepat),
+# atau student hasil distilasi jika ada di registry (fallback ke forest saat confidence rendah).
+# Batch besar (upload CSV, peta what-if) memakai pipeline sklearn lewat get_model_for_rows.
+# Setiap tahap diberi timing span (core.metrics) -> tab Performance di dashboard admin.
+with span("model_load") as model_span:
+    model = get_fast_model()
+    model_span.label = type(model).__name__
 
 # Load Dataset untuk Dropdown Dinamis & Auto-pH
+# Dibaca sekali per proses (core.catalog), bukan read_csv + groupby di setiap rerun
 try:
-    df_pangan = pd.read_csv("dataset_pangan.csv")
+    with span("dataset_load", label="catalog"):
+        catalog = get_catalog()
     # 1. Database Bahan per Kategori
-    food_db = df_pangan.groupby('kategori')['bahan_baku'].unique().apply(list).to_dict()
+    food_db = catalog.food_db
     # 2. Database Rata-rata pH per Bahan
-    ph_db = df_pangan.groupby('bahan_baku')['ph'].mean().to_dict()
-    categories = sorted(list(food_db.keys()))
+    ph_db = catalog.ph_db
+    categories = catalog.categories
+    ph_resolver = catalog.ph_resolver
 except Exception as e:
     st.error(f"Gagal memuat dataset: {e}")
     categories = ["Daging", "Sayur", "Buah"] # Fallback
     food_db = {}
     ph_db = {}
+    ph_resolver = PhResolver(ph_db)
 
 # Helper Function untuk Input Custom
 def render_custom_input(label, options, key_suffix):
@@ -143,51 +192,38 @@ def render_custom_input(label, options, key_suffix):
         return st.text_input(f"Masukkan {label} Manual:", key=f"text_{key_suffix}")
     return selected
 
+# Label sumber pH untuk ditampilkan ke user
+PH_TIER_LABELS = {
+    "dataset": "Dataset lab",
+    "normalized": "Dataset lab (nama dinormalisasi)",
+    "base_name": "Dataset lab (bahan serupa)",
+    "fuzzy": "Dataset lab (nama mirip)",
+    "ai_cache": "Cache jawaban AI",
+    "llm": "Estimasi AI (Gemini)",
+}
+
 # Helper Function untuk AI pH
 def get_ai_estimated_ph(bahan_nama):
-    models_to_try = [
-        'gemini-2.0-flash-lite',      # Prioritas 1: Lite (Cepat & Hemat)
-        'gemini-2.0-flash',           # Prioritas 2: Standard
-        'gemini-flash-latest',        # Fallback 1: Latest Stable
-        'gemini-pro'                  # Fallback 2: Old Reliable
-    ]
+    prompt_ph = f"""
+    Berapa rata-rata pH dari '{bahan_nama}'? 
+    Jawab HANYA angka satu desimal (contoh: 5.5). 
+    Jika ada rentang (misal 5-6), ambil nilai tengahnya.
+    Jangan ada teks lain.
+    """
     last_error = "Unknown Error"
-    
-    for model_name in models_to_try:
+
+    # Fallback antar model + circuit breaker diurus client; retry di sini hanya untuk jawaban non-angka
+    for attempt in range(2):
         try:
-            model_ph = genai.GenerativeModel(model_name)
-            prompt_ph = f"""
-            Berapa rata-rata pH dari '{bahan_nama}'? 
-            Jawab HANYA angka satu desimal (contoh: 5.5). 
-            Jika ada rentang (misal 5-6), ambil nilai tengahnya.
-            Jangan ada teks lain.
-            """
-            
-            # Retry Logic
-            for attempt in range(3):
-                try:
-                    response = model_ph.generate_content(prompt_ph)
-                    text = response.text.strip()
-                    
-                    # Coba parsing angka langsung
-                    import re
-                    # Cari angka float pertama (5.5 atau 5)
-                    match = re.search(r"[-+]?\d*\.\d+|\d+", text)
-                    if match:
-                        return float(match.group()), None # Success, No Error
-                    
-                except Exception as e:
-                    last_error = str(e)
-                    if "429" in str(e):
-                        time.sleep(2 * (attempt + 1)) # Backoff
-                        continue
-                    else:
-                        print(f"Error AI pH (Attempt {attempt}): {e}")
-                        # Don't break immediately, try retry
-            
-        except Exception as e:
-            last_error = str(e)
-            continue
+            response = gemini.generate_content(prompt_ph, timeout=15)
+        except AllModelsFailed as e:
+            return None, str(e)
+
+        # Cari angka float pertama (5.5 atau 5)
+        match = re.search(r"[-+]?\d*\.\d+|\d+", response.text.strip())
+        if match:
+            return float(match.group()), None # Success, No Error
+        last_error = f"Jawaban AI bukan angka: {response.text.strip()[:50]}"
 
     return None, last_error # Return None and the last error message
 
@@ -238,13 +274,16 @@ with col2:
     if 'ph_val' not in st.session_state:
         st.session_state['ph_val'] = 7.0
         
-    # Jika user ganti bahan, update default pH dari database (Hanya jika bukan 'Lainnya')
-    # Kita pakai database lokal dulu biar cepat, AI by call button
-    if bahan in ph_db and bahan != "Lainnya (Isi Sendiri)":
-         # Hanya update jika nilai belum diset manual atau tombol ditekan (logic agak tricky, simpler: update on change bahan)
-         # Karena Streamlit rerun, kita perlu logic sederhana:
-         # Kita biarkan slider pakai key session state, kita update session state kalau perlu.
-         pass # Biarkan user/AI yang set
+    # Resolver pH bertingkat (ph_resolver dari katalog): dataset -> nama dinormalisasi/fuzzy -> cache jawaban AI -> Gemini
+
+    # Jika user ganti bahan, update default pH dari database lokal (tanpa AI, instan).
+    # Hanya sekali per pergantian bahan, supaya geseran slider manual tidak ditimpa saat rerun.
+    if bahan and bahan != "Lainnya (Isi Sendiri)" and st.session_state.get('ph_bahan') != bahan:
+        st.session_state['ph_bahan'] = bahan
+        local_ph = ph_resolver.resolve_local(bahan)
+        if local_ph is not None:
+            st.session_state['ph_val'] = float(local_ph.value)
+            st.session_state['ph_tier'] = local_ph.tier
 
     # UI Bundle: Info + Button (Aesthetic Layout)
     col_info, col_btn = st.columns([3, 1])
@@ -254,61 +293,26 @@ with col2:
         st.write("") # Spacer vertical alignment
         if st.button("✨ Tanya Ph Pakai AI", use_container_width=True, help="AI akan menebak pH berdasarkan nama bahan."):
             with st.spinner("⏳ Mengukur pH..."):
-                ai_ph, error_msg = get_ai_estimated_ph(bahan)
-                if ai_ph:
-                    st.session_state['ph_val'] = ai_ph
-                    st.toast(f"pH {bahan}: {ai_ph}", icon="✅")
+                # Gemini hanya dipanggil jika bahan tidak ditemukan di data lokal / cache
+                with span("ph_resolve") as ph_span:
+                    ph_result = ph_resolver.resolve(bahan, llm_fn=get_ai_estimated_ph)
+                    ph_span.label = ph_result.tier or "-"
+                    ph_span.status = "ok" if ph_result.value is not None else "error"
+                if ph_result.value is not None:
+                    st.session_state['ph_val'] = float(ph_result.value)
+                    st.session_state['ph_tier'] = ph_result.tier
+                    st.toast(f"pH {bahan}: {ph_result.value} (sumber: {PH_TIER_LABELS[ph_result.tier]})", icon="✅")
                 else:
-                    st.error(f"Gagal estimasi: {error_msg}")
+                    st.error(f"Gagal estimasi: {ph_result.error}")
 
     # Slider Full Width
     ph = st.slider("Perkiraan pH (Keasaman):", 0.0, 14.0, key="ph_val", help="Nilai ini estimasi. Geser jika punya alat ukur.")
+    if st.session_state.get('ph_tier'):
+        st.caption(f"Sumber pH: {PH_TIER_LABELS[st.session_state['ph_tier']]}")
 
 # --- LOGIC FUNCTIONS (PHASE 2) ---
 
-def get_recommendation(kategori, suhu, prediction_label):
-    if prediction_label == "TIDAK AMAN / BERBAHAYA":
-        return "⛔ **TINDAKAN:** Segera pisahkan dan buang. Jangan berikan ke hewan ternak. Bersihkan area penyimpanan."
-    
-    # Jika Aman
-    rec = "✅ **SARAN:** "
-    if kategori in ["Daging", "Ikan"]:
-        if suhu > 4:
-            rec += "Segera masak atau simpan di freezer (-18°C) jika tidak langsung diolah."
-        else:
-            rec += "Pertahankan suhu dingin. Masak hingga matang sempurna (min 75°C)."
-    elif kategori in ["Sayur", "Buah"]:
-        rec += "Cuci bersih dengan air mengalir. Simpan di suhu sejuk (10-15°C) atau kulkas."
-    elif kategori == "Susu":
-        rec += "Pastikan wadah tertutup rapat. Simpan di suhu < 4°C."
-    elif kategori == "Nasi":
-        rec += "Segera habiskan. Jangan simpan di suhu ruang > 4 jam (risiko B. cereus)."
-    else:
-        rec += "Simpan di tempat kering dan sejuk. Cek tanggal kadaluarsa."
-    return rec
-
-def estimate_shelf_life(kategori, suhu, lama_simpan_sekarang):
-    # Heuristik sederhana (Estimasi kasar)
-    base_hours = 24 # Default
-    
-    if kategori in ["Daging", "Ikan", "Susu"]:
-        if suhu < 0: base_hours = 720 # 1 bulan (beku)
-        elif suhu < 5: base_hours = 48 # 2 hari (kulkas)
-        else: base_hours = 4 # 4 jam (suhu ruang)
-    elif kategori in ["Sayur", "Buah"]:
-        if suhu < 15: base_hours = 168 # 1 minggu
-        else: base_hours = 48 # 2 hari
-    elif kategori == "Nasi":
-        if suhu > 60: base_hours = 12 # Warmer
-        elif suhu < 5: base_hours = 24 
-        else: base_hours = 6 # Suhu ruang bahaya
-        
-    sisa = base_hours - lama_simpan_sekarang
-    if sisa < 0: return "0 jam (Sudah lewat batas aman)"
-    return f"{sisa} jam lagi (Estimasi pada suhu {suhu}°C)"
-
 def log_to_csv(data_dict, prediction, risk_score):
-    file_name = "history_lab.csv"
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     log_data = {
@@ -318,49 +322,25 @@ def log_to_csv(data_dict, prediction, risk_score):
         "risk_score": risk_score
     }
     
-    df_new = pd.DataFrame([log_data])
-    
-    if not os.path.exists(file_name):
-        df_new.to_csv(file_name, index=False)
-    else:
-        df_new.to_csv(file_name, mode='a', header=False, index=False)
+    # Hanya enqueue; penulisan (batch + file lock) dilakukan writer thread
+    with span("log_to_csv"):
+        history_writer().write(log_data)
+
+def log_batch_to_csv(df_result):
+    # Seluruh batch masuk antrian sekaligus, ditulis writer thread dalam satu append
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    df_new = df_result[HISTORY_COLUMNS[1:]].copy()
+    df_new.insert(0, "timestamp", timestamp)
+    history_writer().write_many(df_new.to_dict("records"))
 
 # --- END LOGIC FUNCTIONS ---
 
 # Fungsi Penjelasan Offline (Rule-Based & Enhanced UI)
 def generate_offline_explanation(data_dict, prediction_label, risk_score, error_msg=""):
-    reasons = []
-    recommendations = []
-    
     # --- LOGIKA PAKAR (Rule-Based) ---
-    # 1. Analisis Suhu
-    if data_dict['suhu'] > 40:
-        reasons.append(f"🔥 **Bahaya Suhu Tinggi**: Penyimpanan pada {data_dict['suhu']}°C memicu pertumbuhan bakteri termofilik dan denaturasi protein.")
-        recommendations.append("⛔ **Tindakan**: Jangan dikonsumsi! Risiko keracunan makanan sangat tinggi.")
-    elif data_dict['suhu'] > 5 and data_dict['lama_simpan'] > 4:
-        reasons.append(f"⚠️ **Danger Zone**: Makanan berada di suhu kritis ({data_dict['suhu']}°C) selama >4 jam. Bakteri membelah diri setiap 20 menit.")
-        recommendations.append("⚠️ **Saran**: Jika belum berbau/berlendir, panaskan hingga mendidih (100°C) sebelum dimakan. Jika ragu, buang.")
-    
-    # 2. Analisis Waktu
-    if data_dict['lama_simpan'] > 24 and "segar" in data_dict['bahan_baku'].lower():
-        reasons.append(f"⏳ **Kedaluwarsa**: Penyimpanan {data_dict['lama_simpan']} jam untuk bahan segar tanpa pembekuan menurunkan kualitas nutrisi secara drastis.")
-    
-    # 3. Analisis pH
-    if data_dict['ph'] < 4.6:
-        reasons.append("🧪 **Keasaman Tinggi**: pH rendah (<4.6) mengindikasikan fermentasi asam atau pembusukan (souring).")
-    elif data_dict['ph'] > 7.5:
-        reasons.append("🧪 **Kebasaan Tinggi**: pH basa (>7.5) adalah tanda pemecahan protein menjadi amonia (pembusukan lanjut).")
-
-    # 4. Analisis Fisik
-    if "busuk" in data_dict['bau'].lower() or "amis" in data_dict['bau'].lower():
-        reasons.append("🤢 **Indikator Bau**: Terdeteksi bau menyimpang (off-odor) akibat aktivitas mikroba pembusuk.")
-    if "lendir" in data_dict['tekstur'].lower():
-        reasons.append("🦠 **Biofilm Bakteri**: Tekstur berlendir menandakan koloni bakteri telah membentuk lapisan pelindung di permukaan.")
-
-    # Jika Aman (Default)
-    if prediction_label == "AMAN DIMAKAN" and not reasons:
-        reasons.append("✅ **Parameter Normal**: Suhu, waktu, dan ciri fisik berada dalam batas aman standar keamanan pangan.")
-        recommendations.append("🍽️ **Saran**: Aman dikonsumsi. Pastikan dimasak dengan benar (min 75°C) untuk keamanan ekstra.")
+    # Tabel aturan di core/rules.py (suhu, waktu, pH, bau/tekstur); default "Parameter Normal" jika aman
+    reasons, recommendations = explain(data_dict, prediction_label)
 
     # Gabungkan text
     reason_text = "\n\n".join(reasons) if reasons else "🔍 Kombinasi parameter memerlukan pengecekan lab lebih lanjut."
@@ -388,9 +368,25 @@ def generate_offline_explanation(data_dict, prediction_label, risk_score, error_
     {error_display}
     """
 
-# Fungsi Penjelasan AI (Gemini)
-def generate_explanation(data_dict, prediction_label, risk_score):
-    # API Key sudah di-set di awal (hardcoded)
+# Versi template prompt Auditor. WAJIB dinaikkan setiap kali isi prompt di bawah diubah,
+# supaya jawaban lama di cache penjelasan otomatis tidak dipakai lagi.
+AUDITOR_PROMPT_VERSION = "auditor-v1"
+
+# Fungsi Penjelasan AI (Gemini) - streaming
+def stream_explanation(data_dict, prediction_label, risk_score, meta):
+    """
+    Generator potongan teks penjelasan. meta['source'] diisi "cache" atau "ai".
+    Exception dari Gemini (AllModelsFailed / StreamInterrupted) diteruskan ke pemanggil.
+    """
+    # Cek cache dulu: sampel yang sama (label & bucket risk sama) tidak perlu panggil Gemini lagi
+    explanation_cache = get_explanation_cache()
+    cache_key = make_key(data_dict, prediction_label, risk_score, AUDITOR_PROMPT_VERSION)
+    cached = explanation_cache.get(cache_key)
+    if cached is not None:
+        meta['source'] = "cache"
+        yield cached
+        return
+    meta['source'] = "ai"
     
     prompt = f"""
     Kamu adalah PROFESOR AUDITOR untuk sistem keamanan pangan berbasis Machine Learning.
@@ -449,55 +445,81 @@ def generate_explanation(data_dict, prediction_label, risk_score):
     - Cantumkan referensi spesifik (SNI No. XXX, FDA BAM Chapter X, Jurnal YYY).
     """
 
-    # Daftar model yang akan dicoba (Fallback mechanism)
-    # Daftar model yang akan dicoba (Fallback mechanism)
-    models_to_try = [
-        'gemini-2.0-flash-lite',  # Lite version (Faster)
-        'gemini-2.0-flash',       # Standard
-        'gemini-flash-latest',    # Alias for latest stable
-        'gemini-pro'              # Legacy
-    ]
-
-    last_error = ""
-
-    for model_name in models_to_try:
-        try:
-            # Konfigurasi Model Gemini
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            last_error = str(e)
-            if "429" in last_error:
-                continue # Coba model berikutnya jika limit habis
-            else:
-                # Jika error lain (misal 404), mungkin model tidak ada, lanjut coba yang lain
+    # Fallback antar model (urut kesehatan) + circuit breaker 429/404 ada di core.gemini_client
+    parts = []
+    for text in gemini.generate_content_stream(prompt):
+        parts.append(text)
+        yield text
+
+    # Hanya stream AI yang selesai utuh yang di-cache (penjelasan offline / parsial tidak)
+    explanation_cache.put(cache_key, "".join(parts))
+
+def render_explanation(data_dict, prediction_label, risk_score):
+    """Tampilkan Bagian 1 langsung saat token datang, Bagian 2 (setelah separator) ke dropdown referensi."""
+    main_box = st.empty()
+    ref_slot = st.empty()
+    main_box.caption("⏳ Profesor sedang membedah jurnal & menghitung kinetika bakteri...")
+
+    sections = ["", ""]
+    ref_box = None
+    meta = {}
+    start = time.perf_counter()
+    first_token = None
+    try:
+        for section, text in split_sections(stream_explanation(data_dict, prediction_label, risk_score, meta)):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            sections[section] += text
+            if section == 0:
+                main_box.markdown(sections[0] + " ▌")
                 continue
-    
-    # Jika semua gagal
-    return generate_offline_explanation(data_dict, prediction_label, risk_score, error_msg=f"Semua model sibuk/gagal. Terakhir: {last_error}")
+            if ref_box is None:
+                main_box.markdown(sections[0]) # Bagian 1 selesai
+                with ref_slot.container():
+                    with st.expander("📚 Analisis Teoretis, Kalkulasi Q10 & Daftar Pustaka"):
+                        st.info("Bagian ini memuat detail akademis untuk keperluan riset/skripsi.")
+                        ref_box = st.empty()
+            ref_box.markdown(sections[1])
+    except Exception as e:
+        # Semua model gagal / stream putus di tengah -> ganti dengan penjelasan offline
+        ref_slot.empty()
+        reason = "Stream AI terputus di tengah jawaban." if isinstance(e, StreamInterrupted) else "Semua model sibuk/gagal."
+        main_box.markdown(generate_offline_explanation(data_dict, prediction_label, risk_score,
+                                                       error_msg=f"{reason} {e}"))
+        record("explanation", time.perf_counter() - start, "fallback", "offline")
+        return
+
+    main_box.markdown(sections[0])
+    total = time.perf_counter() - start
+    record("explanation", total, "ok", meta.get('source', '-'))
+    st.caption(f"⏱️ Sumber: {meta.get('source', '-')} | token pertama {first_token or 0:.2f}s | total {total:.2f}s")
 
 # Tombol Prediksi
 if st.button("Cek Keamanan Pangan"):
-    # Buat dataframe untuk input (sesuai format training)
-    input_data = pd.DataFrame({
-        "kategori": [kategori],
-        "bahan_baku": [bahan],
-        "warna": [warna],
-        "bau": [bau],
-        "tekstur": [tekstur],
-        "suhu": [suhu],
-        "lama_simpan": [lama_simpan],
-        "ph": [ph]
-    })
-
-    # Prediksi
-    prediction = model.predict(input_data)[0]
-    probability = model.predict_proba(input_data)[0][1] # Ambil probabilitas kelas 1 (Aman)
-    risk_score = (1 - probability) * 100 # Risk score adalah kebalikan dari aman
+    # Sampel input (kolom sesuai format training)
+    input_data = [{
+        "kategori": kategori,
+        "bahan_baku": bahan,
+        "warna": warna,
+        "bau": bau,
+        "tekstur": tekstur,
+        "suhu": suhu,
+        "lama_simpan": lama_simpan,
+        "ph": ph
+    }]
+
+    # Prediksi (satu kali predict_proba, label diturunkan dari probabilitas).
+    # Sampel yang sama (versi model sama) diambil dari memo LRU yang dibagi semua sesi.
+    with span("predict", label=type(model).__name__) as predict_span:
+        memo_counts = {}
+        predictions, risk_scores = get_prediction_memo().predict_with_risk(model, input_data, get_holder().version,
+                                                                           counts=memo_counts)
+        predict_span.label += " memo=hit" if memo_counts["hits"] else " memo=miss"
+    prediction = predictions[0]
+    risk_score = risk_scores[0]
 
     # --- LOGGING (PHASE 2) ---
-    pred_label = "AMAN DIMAKAN" if prediction == 1 else "TIDAK AMAN / BERBAHAYA"
+    pred_label = label_text(prediction)
     
     # Prepare data dict
     data_dict = {
@@ -529,7 +551,12 @@ if st.button("Cek Keamanan Pangan"):
         
         # Tampilkan Saran & Shelf Life (PHASE 2)
         st.info(get_recommendation(kategori, suhu, pred_label))
-        st.write(f"**Estimasi Sisa Umur Simpan:** {estimate_shelf_life(kategori, suhu, lama_simpan)}")
+        st.write(f"**Estimasi Sisa Umur Simpan:** {estimate_shelf_life(kategori, suhu, lama_simpan, ph)}")
+        # Kurva sisa umur simpan jika disimpan di suhu lain (irisan grid kinetika, tanpa hitung ulang)
+        curve_suhu, curve_sisa = get_shelf_life_model().remaining_curve(kategori, ph, lama_simpan)
+        st.caption("Sisa umur simpan (jam) jika disimpan pada suhu lain, pH & lama simpan sama:")
+        st.line_chart(pd.DataFrame({"Sisa umur simpan (jam)": curve_sisa}, index=pd.Index(curve_suhu, name="Suhu (°C)")),
+                      height=200)
 
     with col_res2:
         st.metric(label="Risk Score (Tingkat Risiko)", value=f"{risk_score:.1f}%")
@@ -543,25 +570,90 @@ if st.button("Cek Keamanan Pangan"):
     # AI Explanation Section
     st.divider()
     st.subheader("🤖 Penjelasan Ahli AI (Auditor)")
-    with st.spinner("Profesor sedang membedah jurnal & menghitung kinetika bakteri..."):
-        full_explanation = generate_explanation(data_dict, pred_label, risk_score)
-        
-        # Split Response (Summary vs Scientific Deep Dive)
-        if "|||REFERENSI|||" in full_explanation:
-            parts = full_explanation.split("|||REFERENSI|||")
-            summary_part = parts[0]
-            science_part = parts[1]
-            
-            # Tampilkan Penjelasan Utama (Tetap Detail & Berbobot)
-            st.markdown(summary_part)
-            
-            # Tampilkan Detail Referensi dalam Dropdown
-            with st.expander("📚 Analisis Teoretis, Kalkulasi Q10 & Daftar Pustaka"):
-                st.info("Bagian ini memuat detail akademis untuk keperluan riset/skripsi.")
-                st.markdown(science_part)
-        else:
-            # Fallback jika format AI tidak sesuai
-            st.markdown(full_explanation)
+    render_explanation(data_dict, pred_label, risk_score)
+
+# --- WHAT-IF: SUHU x LAMA SIMPAN ---
+# Sampel yang sedang diisi dievaluasi di seluruh grid suhu x jam dalam satu predict_proba.
+# Tidak dicatat ke Log Lab dan tidak memanggil Gemini.
+st.divider()
+st.subheader("🗺️ What-if: Peta Risiko Suhu × Lama Simpan")
+if st.toggle("Tampilkan peta risiko untuk sampel ini", key="whatif_on"):
+    import plotly.graph_objects as go  # Hanya di-import jika panel dibuka
+
+    max_hours = st.select_slider("Rentang lama simpan (jam):", options=HOUR_RANGES, value=72, key="whatif_hours")
+    whatif_sample = {"kategori": kategori, "bahan_baku": bahan, "warna": warna, "bau": bau,
+                     "tekstur": tekstur, "suhu": suhu, "lama_simpan": lama_simpan, "ph": ph}
+    result = sweep(get_model_for_rows(len(TEMPS) * len(hours_axis(max_hours))), whatif_sample, max_hours=max_hours)
+
+    fig = go.Figure(go.Heatmap(x=result.temps, y=result.hours, z=result.risk, zmin=0, zmax=100,
+                               colorscale="RdYlGn_r", colorbar=dict(title="Risk %"),
+                               hovertemplate="Suhu %{x}°C, %{y} jam: risk %{z:.0f}%<extra></extra>"))
+    fig.add_trace(go.Scatter(x=result.temps, y=result.frontier, mode="lines", line=dict(color="black", width=2),
+                             line_shape="hv", name="Batas aman"))
+    fig.add_trace(go.Scatter(x=[suhu], y=[lama_simpan], mode="markers", name="Sampel ini",
+                             marker=dict(symbol="x", size=12, color="blue")))
+    fig.update_layout(xaxis_title="Suhu (°C)", yaxis_title="Lama simpan (jam)", height=420,
+                      margin=dict(l=10, r=10, t=10, b=10), legend=dict(orientation="h", y=-0.2))
+    st.plotly_chart(fig, use_container_width=True)
+
+    idx = int(np.clip(suhu - result.temps[0], 0, len(result.temps) - 1))
+    frontier_now = result.frontier[idx]
+    if np.isnan(frontier_now):
+        st.caption(f"Pada {suhu}°C sampel ini sudah diprediksi tidak aman sejak awal penyimpanan.")
+    elif frontier_now >= result.hours[-1]:
+        st.caption(f"Pada {suhu}°C sampel ini masih diprediksi aman sampai {result.hours[-1]} jam.")
+    else:
+        st.caption(f"Pada {suhu}°C sampel ini diprediksi aman sampai ±{frontier_now:.0f} jam.")
+    st.caption(f"{result.risk.size} titik dievaluasi dalam {result.seconds * 1000:.0f} ms (satu batch).")
+
+# --- MODE BATCH (UPLOAD CSV) ---
+st.divider()
+st.subheader("📑 Mode Batch: Upload CSV Sampel")
+st.caption("Format kolom sama dengan dataset_pangan.csv: kategori, bahan_baku, warna, bau, tekstur, suhu, lama_simpan, ph.")
+
+uploaded_file = st.file_uploader("Upload CSV Sampel Lab", type=["csv"], key="batch_upload")
+if uploaded_file is not None and st.button("Proses Batch"):
+    try:
+        df_upload = pd.read_csv(uploaded_file)
+        df_valid, df_invalid = prepare_batch(df_upload)
+        df_result = score_batch(get_model_for_rows(len(df_valid)), df_valid)
+        # Sisa umur simpan seluruh batch dalam satu panggilan vektor (grid kinetika)
+        df_result['sisa_umur_simpan_jam'] = get_shelf_life_model().remaining_hours(
+            df_result['kategori'].to_numpy(), df_result['suhu'].to_numpy(), df_result['ph'].to_numpy(),
+            df_result['lama_simpan'].to_numpy()) if not df_result.empty else pd.Series(dtype=float)
+        if not df_result.empty:
+            log_batch_to_csv(df_result)
+        st.session_state['batch_result'] = df_result
+        st.session_state['batch_invalid'] = len(df_invalid)
+        st.toast(f"{len(df_result)} sampel berhasil disimpan ke Log Lab!", icon="💾")
+    except Exception as e:
+        st.error(f"Gagal memproses CSV: {e}")
+
+# Hasil disimpan di session_state supaya tidak hilang saat tombol download memicu rerun
+if 'batch_result' in st.session_state:
+    df_result = st.session_state['batch_result']
+    n_aman = int((df_result['prediksi'] == "AMAN DIMAKAN").sum())
+
+    col_b1, col_b2, col_b3 = st.columns(3)
+    col_b1.metric("Total Sampel", len(df_result))
+    col_b2.metric("Aman", n_aman)
+    col_b3.metric("Tidak Aman", len(df_result) - n_aman)
+
+    if st.session_state.get('batch_invalid'):
+        st.warning(f"{st.session_state['batch_invalid']} baris dilewati (suhu/lama_simpan/ph kosong atau bukan angka).")
+
+    # Jika CSV punya label asli (aman_dimakan), tampilkan akurasi model
+    if 'aman_dimakan' in df_result.columns and not df_result.empty:
+        label_asli = np.where(df_result['aman_dimakan'] == 1, "AMAN DIMAKAN", "TIDAK AMAN / BERBAHAYA")
+        st.caption(f"Akurasi terhadap label asli: {(label_asli == df_result['prediksi']).mean():.1%}")
+
+    st.dataframe(df_result.style.format({"risk_score": "{:.1f}%", "sisa_umur_simpan_jam": "{:.1f}"}), use_container_width=True)
+    st.download_button(
+        label="Download Hasil Batch (CSV)",
+        data=df_result.to_csv(index=False),
+        file_name="hasil_batch_lab.csv",
+        mime="text/csv"
+    )
 
 # --- ABOUT SECTION (ACADEMIC CONTEXT) ---
 with st.expander("ℹ️ Tentang Aplikasi & Metode Ilmiah"):
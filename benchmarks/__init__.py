@@ -0,0 +1 @@
+# Suite benchmark offline (Gemini di-stub). Jalankan: python -m benchmarks.run
@@ -0,0 +1,102 @@
+"""
+Waktu load data dashboard admin pada history_lab.csv sintetis (10k / 1M / 10M baris):
+- cold: LabAggregator tanpa state (parse seluruh file, seperti dashboard pertama kali dibuka)
+- restart: aggregator baru dari state JSON yang sudah ada (dashboard di-restart, tanpa baris baru)
+- incremental: refresh setelah 1.000 baris baru di-append
+- tail: load_tail(TAIL_ROWS) untuk tabel mentah & scatter plot
+- read_csv: pd.read_csv seluruh file sebagai pembanding (hanya sampai READ_CSV_MAX_ROWS)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import emit, run_worker
+
+SIZES = (10_000, 1_000_000, 10_000_000)
+QUICK_SIZES = (10_000, 100_000)
+CHUNK_ROWS = 100_000
+APPEND_ROWS = 1_000
+READ_CSV_MAX_ROWS = 1_000_000
+
+
+def run(sandbox, quick=False, sizes=None):
+    # Satu proses per ukuran: memori & cache file 10M baris tidak mempengaruhi ukuran lain
+    return {str(n): run_worker(sandbox, "bench_dashboard", [n]) for n in (sizes or (QUICK_SIZES if quick else SIZES))}
+
+
+def synthetic_history(n_rows, seed=0):
+    """Baris history_lab.csv sintetis: bahan dari dataset, timestamp tersebar setahun."""
+    from core.distill import synthetic_samples
+    from core.features import BASE_DIR, HISTORY_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    df = synthetic_samples(pd.read_csv(os.path.join(BASE_DIR, "csv", "dataset_pangan.csv")), n_rows, seed)
+    seconds = np.sort(rng.integers(0, 365 * 24 * 3600, n_rows))
+    df.insert(0, "timestamp", (pd.Timestamp("2025-01-01") + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%d %H:%M:%S"))
+    risk = rng.uniform(0, 100, n_rows).round(1)
+    df["prediksi"] = np.where(risk < 50, "AMAN DIMAKAN", "TIDAK AMAN / BERBAHAYA")
+    df["risk_score"] = risk
+    return df[HISTORY_COLUMNS]
+
+
+def write_history(path, n_rows):
+    """Tulis CSV n_rows baris dengan mengulang satu blok sintetis (cepat walau 10M baris)."""
+    chunk = synthetic_history(min(n_rows, CHUNK_ROWS))
+    body = chunk.to_csv(index=False, header=False).encode("utf-8")
+    lines = body.splitlines(keepends=True)
+    with open(path, "wb") as f:
+        f.write((",".join(chunk.columns) + "\n").encode("utf-8"))
+        written = 0
+        while written + len(lines) <= n_rows:
+            f.write(body)
+            written += len(lines)
+        f.write(b"".join(lines[:n_rows - written]))
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def main(n_rows):
+    from core.log_aggregates import LabAggregator, read_tail_rows
+
+    directory = os.path.join(os.environ["PYTHONPATH"], "bench_dashboard")
+    os.makedirs(directory, exist_ok=True)
+    csv_path = os.path.join(directory, f"history_{n_rows}.csv")
+    state_path = os.path.join(directory, f".agg_{n_rows}.json")
+    for path in (csv_path, state_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    generate_seconds, _ = _timed(lambda: write_history(csv_path, n_rows))
+    result = {"rows": n_rows, "file_mb": os.path.getsize(csv_path) / 1e6, "generate_s": generate_seconds}
+
+    result["cold_s"], parsed = _timed(lambda: LabAggregator(csv_path, state_path).refresh())
+    if parsed != n_rows:
+        raise RuntimeError(f"Aggregator membaca {parsed} baris, seharusnya {n_rows}")
+    result["restart_s"], aggregator = _timed(lambda: LabAggregator(csv_path, state_path))
+
+    synthetic_history(APPEND_ROWS, seed=1).to_csv(csv_path, mode="a", index=False, header=False)
+    result["incremental_s"], _ = _timed(aggregator.refresh)
+
+    def load_tail():
+        # Sama dengan load_tail() di dashboard/admin_dashboard.py
+        header, rows = read_tail_rows(csv_path, 5000)
+        df = pd.DataFrame(rows, columns=header)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return df
+
+    result["tail_s"], _ = _timed(load_tail)
+    if n_rows <= READ_CSV_MAX_ROWS:
+        result["read_csv_s"], _ = _timed(lambda: pd.read_csv(csv_path))
+    os.remove(csv_path)
+    emit(result)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]))
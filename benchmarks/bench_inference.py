@@ -0,0 +1,50 @@
+"""Latency inference model.pkl: pipeline sklearn vs engine compiled, single-sample dan batch."""
+import os
+import sys
+
+import pandas as pd
+
+from benchmarks.common import emit, run_worker, timings
+
+BATCH_SIZES = (100, 10_000)
+
+
+def run(sandbox, quick=False):
+    return run_worker(sandbox, "bench_inference", ["--quick"] if quick else [])
+
+
+def main(quick):
+    import joblib
+
+    from core.compiled_model import compile_pipeline
+    from core.distill import synthetic_samples
+    from core.features import BASE_DIR, WARMUP_SAMPLE, to_frame
+    from core.model_loader import MODEL_PATH
+
+    pipeline = joblib.load(MODEL_PATH)
+    compiled = compile_pipeline(pipeline)
+    df_one = to_frame(WARMUP_SAMPLE)
+    dataset = pd.read_csv(os.path.join(BASE_DIR, "csv", "dataset_pangan.csv"))
+    repeats = 20 if quick else 100
+
+    result = {
+        "n_trees": compiled.n_trees,
+        "single": {
+            "pipeline": timings(lambda: pipeline.predict_proba(df_one), repeats),
+            "compiled": timings(lambda: compiled.predict_proba(WARMUP_SAMPLE), repeats * 5),
+        },
+        "batch": {},
+    }
+    for size in BATCH_SIZES:
+        df = synthetic_samples(dataset, size, seed=size)
+        n = max(3, repeats // 10)
+        stats = {"pipeline": timings(lambda: pipeline.predict_proba(df), n),
+                 "compiled": timings(lambda: compiled.predict_proba(df), n)}
+        for s in stats.values():
+            s["per_sample_us"] = s["median_s"] / size * 1e6
+        result["batch"][str(size)] = stats
+    emit(result)
+
+
+if __name__ == "__main__":
+    main("--quick" in sys.argv)
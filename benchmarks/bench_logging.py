@@ -0,0 +1,121 @@
+"""
+Throughput log_to_csv (app.py) dengan banyak penulis bersamaan:
+- threads: beberapa sesi Streamlit di satu proses, berbagi satu BackgroundCSVWriter
+- processes: beberapa proses Streamlit menulis file yang sama (FileLock)
+Yang diukur: latency enqueue per panggilan (yang dirasakan request) dan waktu sampai semua baris
+tertulis ke disk. Jumlah baris di file dicek supaya tidak ada yang hilang/terduplikasi.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.common import emit, run_worker, summarize
+
+THREADS = (1, 4, 16)
+PROCESSES = (2, 4)
+
+
+def run(sandbox, quick=False):
+    return run_worker(sandbox, "bench_logging", ["--quick"] if quick else [])
+
+
+def _row(i):
+    from core.features import WARMUP_SAMPLE
+
+    return {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **WARMUP_SAMPLE,
+            "suhu": i % 40, "prediksi": "AMAN DIMAKAN", "risk_score": 12.5}
+
+
+def _writer(path):
+    # Sama dengan history_writer() di app.py (termasuk arsip kolumnar jika pyarrow ada)
+    from core.csv_logger import get_writer
+    from core.features import HISTORY_COLUMNS
+    from core.lab_archive import get_lab_archive
+
+    archive = get_lab_archive(bootstrap_csv=None)
+    return get_writer(path, HISTORY_COLUMNS, on_flush=archive.append if archive else None)
+
+
+def _write_rows(path, n_rows, latencies):
+    writer = _writer(path)
+    for i in range(n_rows):
+        row = _row(i)
+        start = time.perf_counter()
+        writer.write(row)  # = log_to_csv
+        latencies.append(time.perf_counter() - start)
+
+
+def _count_rows(path):
+    with open(path, "rb") as f:
+        return sum(1 for _ in f) - 1  # Tanpa header
+
+
+def bench_threads(directory, n_threads, rows_per_thread):
+    path = os.path.join(directory, f"history_threads_{n_threads}.csv")
+    latencies = []
+    writer = _writer(path)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_write_rows, args=(path, rows_per_thread, latencies)) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    enqueue_seconds = time.perf_counter() - start
+    writer.flush(timeout=120)
+    total_seconds = time.perf_counter() - start
+
+    total = n_threads * rows_per_thread
+    return {
+        "rows": total,
+        "rows_on_disk": _count_rows(path),
+        "enqueue_rows_per_s": total / enqueue_seconds,
+        "durable_rows_per_s": total / total_seconds,
+        "write_call_us": {k[:-2] + "_us": v * 1e6 for k, v in summarize(latencies).items() if k.endswith("_s")},
+    }
+
+
+def _process_writer(path, n_rows, barrier):
+    barrier.wait()
+    latencies = []
+    _write_rows(path, n_rows, latencies)
+    _writer(path).flush(timeout=120)
+
+
+def bench_processes(directory, n_processes, rows_per_process):
+    path = os.path.join(directory, f"history_processes_{n_processes}.csv")
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(n_processes + 1)
+    procs = [ctx.Process(target=_process_writer, args=(path, rows_per_process, barrier)) for _ in range(n_processes)]
+    for p in procs:
+        p.start()
+    barrier.wait()  # Mulai hitung setelah semua proses selesai import
+    start = time.perf_counter()
+    for p in procs:
+        p.join()
+    total_seconds = time.perf_counter() - start
+
+    total = n_processes * rows_per_process
+    return {"rows": total, "rows_on_disk": _count_rows(path), "durable_rows_per_s": total / total_seconds}
+
+
+def main(quick):
+    directory = os.path.join(os.environ["PYTHONPATH"], "bench_logs")
+    os.makedirs(directory, exist_ok=True)
+    rows = 2_000 if quick else 20_000
+    result = {"threads": {}, "processes": {}}
+    for n in THREADS:
+        result["threads"][str(n)] = bench_threads(directory, n, rows // n)
+    for n in PROCESSES:
+        result["processes"][str(n)] = bench_processes(directory, n, rows // n)
+    for group in result.values():
+        for case in group.values():
+            if case["rows_on_disk"] != case["rows"]:
+                raise RuntimeError(f"Baris hilang/dobel: {case['rows_on_disk']} di disk, {case['rows']} ditulis")
+    emit(result)
+
+
+if __name__ == "__main__":
+    main("--quick" in sys.argv)
@@ -0,0 +1,70 @@
+"""
+Waktu retrain_model (advanced_training/trainer.py) saat dataset membesar.
+Per ukuran: dataset store & registry baru di sandbox, diisi N baris sintetis berlabel (label = model.pkl),
+lalu satu retrain full dan satu retrain incremental masing-masing dengan NEW_ROWS baris baru.
+fit = waktu fit model saja; publish = compiled + distilasi student (distilasi hanya pada full refit);
+total = termasuk load dataset, evaluasi, dan publish.
+"""
+import csv
+import os
+import shutil
+import sys
+import time
+
+from benchmarks.common import emit, run_worker
+
+SIZES = (1_000, 10_000, 50_000)
+QUICK_SIZES = (1_000, 5_000)
+NEW_ROWS = 100
+
+
+def run(sandbox, quick=False, sizes=None):
+    result = {}
+    for n in sizes or (QUICK_SIZES if quick else SIZES):
+        # Mulai dari kondisi bersih untuk setiap ukuran
+        for name in ("data_store", "model_registry", "advanced_training/trainer_state.json", "csv/retrain_log.csv"):
+            path = os.path.join(sandbox, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        result[str(n)] = run_worker(sandbox, "bench_retrain", [n], cwd=os.path.join(sandbox, "advanced_training"))
+    return result
+
+
+def labeled_samples(n_rows, seed):
+    import joblib
+    import pandas as pd
+
+    from core.distill import synthetic_samples
+    from core.features import BASE_DIR
+    from core.model_loader import MODEL_PATH
+
+    df = synthetic_samples(pd.read_csv(os.path.join(BASE_DIR, "csv", "dataset_pangan.csv")), n_rows, seed)
+    df["aman_dimakan"] = joblib.load(MODEL_PATH).predict(df)
+    return df
+
+
+def main(n_rows):
+    sys.path.insert(0, os.getcwd())  # advanced_training/ (trainer memakai path relatif)
+    import trainer
+    from core.dataset_store import get_dataset_store
+
+    store = get_dataset_store()
+    store.append(labeled_samples(n_rows, seed=n_rows), note=f"benchmark {n_rows} baris")
+
+    result = {"rows": store.versions()[-1]["rows"]}
+    for i, mode in enumerate(["full", "incremental"]):
+        start = time.perf_counter()
+        accuracy = trainer.retrain_model(df_new=labeled_samples(NEW_ROWS, seed=n_rows + i + 1), mode=mode)
+        wall = time.perf_counter() - start
+        with open(trainer.RETRAIN_LOG, newline="", encoding="utf-8") as f:
+            logged = list(csv.DictReader(f))[-1]
+        result[mode] = {"wall_s": wall, "fit_s": float(logged["fit_seconds"]), "publish_s": float(logged["publish_seconds"]),
+                        "distill_s": float(logged["distill_seconds"]), "total_s": float(logged["total_seconds"]),
+                        "n_trees": int(logged["n_trees"]), "accuracy": accuracy}
+    emit(result)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]))
@@ -0,0 +1,78 @@
+"""
+Cold start app.py & dashboard/admin_dashboard.py, masing-masing di proses Python baru:
+- import: waktu mengeksekusi import top-level script saja
+- first_render: AppTest pertama (import + load model + render), lalu rerun (warm)
+- app: klik "Cek Keamanan Pangan" dengan Gemini stub (cache penjelasan dikosongkan dulu)
+"""
+import ast
+import os
+import sys
+import time
+
+from benchmarks.common import emit, install_stub_gemini, run_worker, summarize
+
+SCRIPTS = {
+    "app": ("app.py", ""),
+    "dashboard": ("dashboard/admin_dashboard.py", "dashboard"),
+}
+
+
+def run(sandbox, quick=False):
+    repeats = 1 if quick else 3
+    result = {}
+    for name, (script, cwd) in SCRIPTS.items():
+        cwd = os.path.join(sandbox, cwd)
+        imports = [run_worker(sandbox, "bench_startup", ["import", script], cwd)["seconds"] for _ in range(repeats)]
+        renders = [run_worker(sandbox, "bench_startup", ["render", script], cwd) for _ in range(repeats)]
+        result[name] = {"import": summarize(imports)}
+        for key in renders[0]:
+            values = [r[key] for r in renders]
+            result[name][key] = max(values) if key == "peak_rss_mb" else summarize(values)
+    return result
+
+
+def import_block(path):
+    """Hanya statement import top-level dari script (tanpa menjalankan UI-nya)."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    body = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return compile(ast.Module(body=body, type_ignores=[]), path, "exec")
+
+
+def measure_import(path):
+    code = import_block(path)
+    start = time.perf_counter()
+    exec(code, {"__name__": "__bench__"})
+    return {"seconds": time.perf_counter() - start}
+
+
+def measure_render(path):
+    from streamlit.testing.v1 import AppTest
+
+    install_stub_gemini()
+    result = {}
+    start = time.perf_counter()
+    at = AppTest.from_file(path, default_timeout=120)
+    at.run()
+    result["first_render"] = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    start = time.perf_counter()
+    at.run()
+    result["rerun"] = time.perf_counter() - start
+
+    buttons = [b for b in at.button if b.label == "Cek Keamanan Pangan"]
+    if buttons:
+        from core.explanation_cache import get_explanation_cache
+        get_explanation_cache().clear()  # Cache milik sandbox, bukan repo asli
+        start = time.perf_counter()
+        buttons[0].click().run()
+        result["predict_click"] = time.perf_counter() - start
+    return result
+
+
+if __name__ == "__main__":
+    mode, script = sys.argv[1], sys.argv[2]
+    path = os.path.join(os.environ["PYTHONPATH"], script)
+    emit(measure_import(path) if mode == "import" else measure_render(path))
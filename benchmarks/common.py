@@ -0,0 +1,88 @@
+"""Helper bersama suite benchmark: statistik timing, sandbox project, subprocess worker, client Gemini stub."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+# Tidak ikut disalin ke sandbox: state runtime & artefak besar yang tidak dibutuhkan benchmark
+SANDBOX_IGNORE = shutil.ignore_patterns(".git", "__pycache__", "archive", "data_store", "model_registry",
+                                        "model_compiled", "results", "*.lock", "requests.jsonl", ".agg_*.json")
+
+
+def timings(fn, repeats, warmup=1):
+    """Jalankan fn berulang; return statistik detik (median, p95, min, mean)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples = np.asarray(samples, dtype=float)
+    return {
+        "median_s": float(np.median(samples)),
+        "p95_s": float(np.percentile(samples, 95)),
+        "min_s": float(samples.min()),
+        "mean_s": float(samples.mean()),
+        "repeats": int(len(samples)),
+    }
+
+
+def make_sandbox():
+    """Salinan project di direktori sementara: benchmark yang menulis file tidak menyentuh repo asli."""
+    target = os.path.join(tempfile.mkdtemp(prefix="pangan-bench-"), "project")
+    shutil.copytree(ROOT_DIR, target, ignore=SANDBOX_IGNORE)
+    return target
+
+
+def remove_sandbox(path):
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def run_worker(sandbox, module, args=(), cwd=None, timeout=3600):
+    """
+    Jalankan `python -m benchmarks.<module> <args>` di proses baru (cold start) di dalam sandbox.
+    Worker mencetak satu baris JSON terakhir di stdout; itu yang dikembalikan.
+    """
+    env = dict(os.environ, PYTHONPATH=sandbox, PYTHONDONTWRITEBYTECODE="1", PYTHONWARNINGS="ignore")
+    proc = subprocess.run([sys.executable, "-m", f"benchmarks.{module}", *map(str, args)],
+                          cwd=cwd or sandbox, env=env, capture_output=True, text=True, timeout=timeout)
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Worker {module} gagal (exit {proc.returncode}): {proc.stderr.strip()[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def emit(result):
+    """Dipanggil worker: hasil (+ puncak memori proses) sebagai satu baris JSON di stdout."""
+    try:
+        import resource
+        result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+    except ImportError:  # Windows
+        pass
+    print(json.dumps(result), flush=True)
+
+
+def install_stub_gemini(latency=0.0, chunk_delay=0.0):
+    """Ganti singleton GeminiClient dengan model stub (offline, deterministik)."""
+    import core.gemini_client as gemini_client
+    from core.llm_stub import StubGenerativeModel
+
+    text = ("### 1. Validasi Keamanan\nSampel dinilai dari suhu, lama simpan, dan pH. " * 8
+            + "|||REFERENSI|||" + "### Teori Hurdle\nQ10 = 2, laju naik dua kali tiap 10°C. " * 8)
+    gemini_client._client = gemini_client.GeminiClient(
+        model_factory=lambda name: StubGenerativeModel(responder=lambda prompt: text, latency=latency,
+                                                       chunk_size=40, chunk_delay=chunk_delay, seed=0))
+    return gemini_client._client
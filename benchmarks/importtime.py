@@ -0,0 +1,147 @@
+"""
+Laporan import-time per modul (python -X importtime) untuk cold start app.py & dashboard.
+
+Mode:
+- imports : hanya statement import top-level script
+- render  : render pertama lewat AppTest (ikut menangkap import yang terjadi saat script jalan,
+            mis. sklearn saat unpickle model.pkl, plotly saat chart digambar)
+
+Pemakaian (dari root repo):
+    python -m benchmarks.importtime [--script app.py] [--mode render] [--cold] [--top 20] [--save sebelum.json]
+    python -m benchmarks.importtime compare sebelum.json sesudah.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import make_sandbox, remove_sandbox
+
+RENDER_SNIPPET = """
+import os, sys
+from benchmarks.common import install_stub_gemini
+from streamlit.testing.v1 import AppTest
+install_stub_gemini()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+if at.exception:
+    raise SystemExit(at.exception[0].value)
+"""
+
+IMPORTS_SNIPPET = """
+import sys
+from benchmarks.bench_startup import import_block
+exec(import_block(sys.argv[1]), {"__name__": "__bench__"})
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Baris "import time: self [us] | cumulative | imported package" -> list dict.
+    Modul bersarang ditandai indentasi nama; level 0 = diimport langsung oleh script/runner.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_part, cumulative_part, name = line.split("|", 2)
+        name_stripped = name.lstrip()
+        rows.append({
+            "module": name_stripped.strip(),
+            "self_us": int(self_part.replace("import time:", "").strip()),
+            "cumulative_us": int(cumulative_part.strip()),
+            "depth": (len(name) - len(name_stripped) - 1) // 2,
+        })
+    return rows
+
+
+def package_totals(rows):
+    """Total waktu (self) per package teratas: 'sklearn.tree._classes' -> 'sklearn'."""
+    totals = {}
+    for row in rows:
+        top = row["module"].split(".")[0]
+        totals[top] = totals.get(top, 0) + row["self_us"]
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+
+def _run(snippet, path, env, importtime=True):
+    flags = ["-X", "importtime"] if importtime else []
+    proc = subprocess.run([sys.executable, *flags, "-c", snippet, path],
+                          cwd=os.path.dirname(path), env=env, capture_output=True, text=True, timeout=600)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+    return proc
+
+
+def measure(script="app.py", mode="render", warm=True):
+    """
+    warm=True (mode render): script dijalankan sekali dulu tanpa diukur, jadi yang dilaporkan adalah
+    restart proses (cache di disk seperti model_compiled/ sudah ada), bukan instalasi pertama kali.
+    """
+    sandbox = make_sandbox()
+    try:
+        path = os.path.join(sandbox, script)
+        env = dict(os.environ, PYTHONPATH=sandbox, PYTHONDONTWRITEBYTECODE="1", PYTHONWARNINGS="ignore")
+        snippet = RENDER_SNIPPET if mode == "render" else IMPORTS_SNIPPET
+        if warm and mode == "render":
+            _run(snippet, path, env, importtime=False)
+        proc = _run(snippet, path, env)
+    finally:
+        remove_sandbox(sandbox)
+
+    rows = parse_importtime(proc.stderr)
+    return {
+        "script": script,
+        "mode": mode,
+        "warm": warm and mode == "render",
+        "total_ms": sum(r["self_us"] for r in rows) / 1000,
+        "modules": len(rows),
+        "packages_ms": {k: v / 1000 for k, v in package_totals(rows).items()},
+        "rows": rows,
+    }
+
+
+def print_report(report, top=20):
+    print(f"📦 {report['script']} ({report['mode']}): {report['modules']} modul, total import {report['total_ms']:.0f} ms")
+    for name, ms in list(report["packages_ms"].items())[:top]:
+        print(f"   {ms:>8.1f} ms  {name}")
+
+
+def compare(before, after, top=20):
+    print(f"📦 {after['script']} ({after['mode']}): total import {before['total_ms']:.0f} ms -> {after['total_ms']:.0f} ms "
+          f"({after['total_ms'] - before['total_ms']:+.0f} ms), modul {before['modules']} -> {after['modules']}")
+    names = set(before["packages_ms"]) | set(after["packages_ms"])
+    deltas = sorted(names, key=lambda n: -abs(after["packages_ms"].get(n, 0) - before["packages_ms"].get(n, 0)))
+    for name in deltas[:top]:
+        b, a = before["packages_ms"].get(name, 0.0), after["packages_ms"].get(name, 0.0)
+        print(f"   {name:<24} {b:>8.1f} -> {a:>8.1f} ms ({a - b:+.1f})")
+
+
+def main(argv):
+    if argv and argv[0] == "compare":
+        with open(argv[1], encoding="utf-8") as f:
+            before = json.load(f)
+        with open(argv[2], encoding="utf-8") as f:
+            after = json.load(f)
+        compare(before, after)
+        return
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importtime")
+    parser.add_argument("--script", default="app.py", help="Relatif ke root repo, mis. dashboard/admin_dashboard.py")
+    parser.add_argument("--mode", choices=["render", "imports"], default="render")
+    parser.add_argument("--cold", action="store_true", help="Mode render tanpa run pemanasan (cache disk kosong)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--save", default=None, help="Simpan laporan lengkap ke JSON (untuk compare)")
+    args = parser.parse_args(argv)
+
+    report = measure(args.script, args.mode, warm=not args.cold)
+    print_report(report, args.top)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"💾 {args.save}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
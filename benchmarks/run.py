@@ -0,0 +1,165 @@
+"""
+Suite benchmark offline (Gemini di-stub, semua file ditulis di sandbox salinan project).
+
+Pemakaian (dari root repo):
+    python -m benchmarks.run [--only inference,startup,logging,dashboard,retrain] [--quick]
+                             [--dashboard-rows 10000,1000000] [--retrain-rows 1000,10000] [--output hasil.json]
+    python -m benchmarks.run compare lama.json baru.json [--threshold 0.1]
+
+Hasil disimpan ke benchmarks/results/<tanggal>-<commit>.json supaya bisa dibandingkan antar commit.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks import bench_dashboard, bench_inference, bench_logging, bench_retrain, bench_startup
+from benchmarks.common import BENCH_DIR, ROOT_DIR, make_sandbox, remove_sandbox
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SUITES = {
+    "inference": bench_inference.run,
+    "startup": bench_startup.run,
+    "logging": bench_logging.run,
+    "dashboard": bench_dashboard.run,
+    "retrain": bench_retrain.run,
+}
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "") if sha else None
+    except OSError:
+        return None
+
+
+def environment():
+    import numpy
+    import pandas
+    import sklearn
+
+    return {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def run_suites(names, quick=False, dashboard_rows=None, retrain_rows=None):
+    sandbox = make_sandbox()
+    results = {"environment": environment(), "quick": quick, "suites": {}}
+    try:
+        for name in names:
+            print(f"⏱️ {name}...", flush=True)
+            start = time.perf_counter()
+            kwargs = {"dashboard": {"sizes": dashboard_rows}, "retrain": {"sizes": retrain_rows}}.get(name, {})
+            try:
+                results["suites"][name] = SUITES[name](sandbox, quick=quick, **kwargs)
+            except Exception as e:
+                # Satu suite gagal tidak membatalkan suite lain; error ikut tercatat di JSON
+                print(f"❌ {name}: {e}")
+                results["suites"][name] = {"error": str(e)}
+            print(f"   selesai dalam {time.perf_counter() - start:.1f}s")
+    finally:
+        remove_sandbox(sandbox)
+    return results
+
+
+def flatten(data, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}, hanya nilai angka."""
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def is_timing(metric):
+    # Metrik yang makin kecil makin baik (sisanya throughput: makin besar makin baik)
+    name = metric.rsplit(".", 1)[-1]
+    return name.endswith(("_s", "_us", "_ms")) and name not in ("generate_s",)
+
+
+def compare(old_path, new_path, threshold=0.1):
+    """Cetak metrik yang berubah lebih dari threshold. Return jumlah regresi."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    old_flat, new_flat = flatten(old["suites"]), flatten(new["suites"])
+    print(f"📊 {old['environment']['commit']} -> {new['environment']['commit']}")
+
+    regressions = 0
+    for metric in sorted(old_flat.keys() & new_flat.keys()):
+        if not (is_timing(metric) or metric.endswith("_per_s")) or metric.endswith(("repeats", "min_s", "mean_s")):
+            continue
+        before, after = old_flat[metric], new_flat[metric]
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = change > threshold if is_timing(metric) else change < -threshold
+        better = change < -threshold if is_timing(metric) else change > threshold
+        if worse or better:
+            regressions += worse
+            print(f"{'🔴' if worse else '🟢'} {metric}: {before:.6g} -> {after:.6g} ({change:+.0%})")
+    print(f"{regressions} regresi (ambang {threshold:.0%})")
+    return regressions
+
+
+def save(results, output=None):
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{results['environment']['commit'] or 'nocommit'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    return output
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(",")] if text else None
+
+
+def main(argv):
+    if argv and argv[0] == "compare":
+        parser = argparse.ArgumentParser(prog="python -m benchmarks.run compare")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        parser.add_argument("--threshold", type=float, default=0.1)
+        args = parser.parse_args(argv[1:])
+        return 1 if compare(args.old, args.new, args.threshold) else 0
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmark offline")
+    parser.add_argument("--only", default=",".join(SUITES), help="Suite dipisah koma: " + ", ".join(SUITES))
+    parser.add_argument("--quick", action="store_true", help="Ukuran kecil & pengulangan sedikit (cek cepat)")
+    parser.add_argument("--dashboard-rows", type=_int_list, default=None, help="mis. 10000,1000000,10000000")
+    parser.add_argument("--retrain-rows", type=_int_list, default=None, help="mis. 1000,10000,50000")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SUITES]
+    if unknown:
+        parser.error(f"Suite tidak dikenal: {', '.join(unknown)}")
+
+    results = run_suites(names, args.quick, args.dashboard_rows, args.retrain_rows)
+    print(f"💾 Hasil: {save(results, args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1 @@
+# Modul bersama untuk app.py, dashboard, dan skrip training.
@@ -0,0 +1,51 @@
+"""
+Katalog bahan pangan untuk dropdown & auto-pH di app.py, dibaca dari dataset_pangan.csv.
+
+Dibaca sekali per proses dengan modul csv (tanpa pandas) dan dibagi ke semua sesi,
+bersama satu PhResolver yang index-nya sudah dibangun.
+"""
+import csv
+import os
+import threading
+from collections import namedtuple
+
+from core.features import BASE_DIR
+from core.ph_resolver import PhResolver
+
+DATASET_PATH = os.path.join(BASE_DIR, "dataset_pangan.csv")
+
+Catalog = namedtuple("Catalog", ["categories", "food_db", "ph_db", "ph_resolver"])
+
+
+def load_catalog(path=DATASET_PATH):
+    """
+    categories : kategori terurut
+    food_db    : kategori -> list bahan (urutan kemunculan pertama di dataset)
+    ph_db      : bahan -> rata-rata pH
+    """
+    food_db = {}
+    ph_sum = {}
+    ph_count = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            bahan = row["bahan_baku"]
+            items = food_db.setdefault(row["kategori"], [])
+            if bahan not in items:
+                items.append(bahan)
+            ph_sum[bahan] = ph_sum.get(bahan, 0.0) + float(row["ph"])
+            ph_count[bahan] = ph_count.get(bahan, 0) + 1
+    ph_db = {bahan: ph_sum[bahan] / ph_count[bahan] for bahan in ph_sum}
+    return Catalog(sorted(food_db), food_db, ph_db, PhResolver(ph_db))
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Singleton katalog per proses (dataset_pangan.csv dibaca sekali)."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = load_catalog()
+        return _catalog
@@ -0,0 +1,254 @@
+"""
+Inference engine berbasis array NumPy untuk pipeline RandomForest di model.pkl.
+
+Pipeline sklearn (ColumnTransformer + 100 estimator) di-flatten menjadi:
+- konstanta StandardScaler (mean, scale)
+- lookup dict kategori -> index kolom one-hot
+- array node (feature, threshold, left, right, value) untuk SEMUA tree digabung jadi satu
+
+Hasil predict_proba identik dengan pipeline asli (urutan penjumlahan antar-tree dibuat sama).
+
+Build + verifikasi + benchmark:
+    python -m core.compiled_model build
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from core.features import BASE_DIR, CATEGORICAL_FEATURES, NUMERICAL_FEATURES, WARMUP_SAMPLE
+
+COMPILED_DIR = os.path.join(BASE_DIR, "model_compiled")
+ARRAY_NAMES = ["mean", "scale", "feature", "threshold", "left", "right", "value", "roots", "classes"]
+
+
+class CompiledForest:
+    def __init__(self, arrays, category_lookup, n_features, max_depth, meta=None):
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.classes_ = self.classes
+        self.category_lookup = category_lookup  # {kolom: {nilai: index kolom one-hot}}
+        self.n_features = n_features
+        self.max_depth = max_depth
+        self.n_trees = len(self.roots)
+        self.meta = meta or {}
+
+    # --- Transformasi fitur (pengganti ColumnTransformer, tanpa pandas) ---
+    def transform(self, data):
+        """
+        data: dict (satu sampel), list of dict, atau DataFrame.
+        Return: matriks float32 (n_sampel, n_features) seperti input tree sklearn.
+        """
+        if isinstance(data, dict):
+            data = [data]
+
+        if isinstance(data, list):
+            n = len(data)
+            numeric = np.array([[row[c] for c in NUMERICAL_FEATURES] for row in data], dtype=np.float64).reshape(n, -1)
+            categorical = {c: [row[c] for row in data] for c in CATEGORICAL_FEATURES}
+        else:  # DataFrame
+            n = len(data)
+            numeric = data[NUMERICAL_FEATURES].to_numpy(dtype=np.float64)
+            categorical = {c: data[c].tolist() for c in CATEGORICAL_FEATURES}
+
+        X = np.zeros((n, self.n_features), dtype=np.float32)
+        # Sama seperti StandardScaler.transform: dihitung di float64 lalu di-cast ke float32 oleh tree
+        X[:, :len(NUMERICAL_FEATURES)] = (numeric - self.mean) / self.scale
+
+        # One-hot: kategori tak dikenal diabaikan (handle_unknown="ignore")
+        for col, values in categorical.items():
+            lookup = self.category_lookup[col]
+            for i, v in enumerate(values):
+                idx = lookup.get(v)
+                if idx is not None:
+                    X[i, idx] = 1.0
+        return X
+
+    # --- Evaluasi semua tree sekaligus ---
+    def apply(self, X):
+        """Return index leaf (global) untuk setiap sampel x tree, shape (n_sampel, n_trees)."""
+        n = X.shape[0]
+        nodes = np.repeat(self.roots[None, :], n, axis=0)
+        rows = np.arange(n)[:, None]
+        # Leaf menunjuk ke dirinya sendiri, jadi cukup iterasi sebanyak kedalaman maksimum
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, data):
+        leaf_values = self.value[self.apply(self.transform(data))]  # (n, n_trees, n_classes)
+        # cumsum menjumlah berurutan tree 0..T-1, sama dengan akumulasi di RandomForestClassifier
+        proba = np.cumsum(leaf_values, axis=1)[:, -1, :]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, data):
+        return self.classes_[self.predict_proba(data).argmax(axis=1)]
+
+    # --- Simpan / load (.npy terpisah supaya bisa di-memory-map) ---
+    def save(self, directory=COMPILED_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        meta = dict(self.meta, n_features=self.n_features, max_depth=self.max_depth,
+                    category_lookup=self.category_lookup)
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, directory=COMPILED_DIR, mmap_mode=None):
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(arrays, meta.pop("category_lookup"), meta.pop("n_features"), meta.pop("max_depth"), meta)
+
+
+def _compile_preprocessor(preprocessor):
+    """Konstanta StandardScaler + lookup kategori -> index kolom one-hot. Return (mean, scale, lookup, n_features)."""
+    transformers = {name: (trans, cols) for name, trans, cols in preprocessor.transformers_ if name != "remainder"}
+    scaler, num_cols = transformers["num"]
+    encoder, cat_cols = transformers["cat"]
+    if list(num_cols) != NUMERICAL_FEATURES or list(cat_cols) != CATEGORICAL_FEATURES:
+        raise ValueError("Struktur kolom preprocessor tidak sesuai dengan FEATURE_COLUMNS.")
+    if getattr(encoder, "drop_idx_", None) is not None:
+        raise ValueError("OneHotEncoder dengan opsi drop belum didukung.")
+
+    # Lookup kategori -> index kolom (kolom numerik ada di depan)
+    category_lookup = {}
+    offset = len(NUMERICAL_FEATURES)
+    for col, cats in zip(CATEGORICAL_FEATURES, encoder.categories_):
+        category_lookup[col] = {cat: offset + i for i, cat in enumerate(cats.tolist())}
+        offset += len(cats)
+
+    mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.with_mean else np.zeros(len(NUMERICAL_FEATURES))
+    scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_std else np.ones(len(NUMERICAL_FEATURES))
+    return mean, scale, category_lookup, offset
+
+
+def _flatten_trees(trees, leaf_values):
+    """
+    Gabungkan beberapa sklearn Tree jadi satu set array node.
+    leaf_values(tree) -> array (n_nodes, n_classes) probabilitas per node.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    node_offset = 0
+    max_depth = 0
+    for tree in trees:
+        n_nodes = tree.node_count
+        ids = np.arange(n_nodes)
+        is_leaf = tree.children_left == -1
+
+        # Leaf: self-loop (feature 0, threshold +inf) supaya traversal tidak butuh masking
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append((np.where(is_leaf, ids, tree.children_left) + node_offset).astype(np.int32))
+        rights.append((np.where(is_leaf, ids, tree.children_right) + node_offset).astype(np.int32))
+        values.append(leaf_values(tree))
+
+        roots.append(node_offset)
+        node_offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+    return arrays, max_depth
+
+
+def compile_pipeline(pipeline, meta=None):
+    """Flatten Pipeline(preprocessor=ColumnTransformer, classifier=RandomForestClassifier) ke array."""
+    mean, scale, category_lookup, n_features = _compile_preprocessor(pipeline.named_steps["preprocessor"])
+    forest = pipeline.named_steps["classifier"]
+
+    def leaf_values(tree):
+        # Normalisasi seperti DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :forest.n_classes_].copy()
+        normalizer = value.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+        return value / normalizer
+
+    arrays, max_depth = _flatten_trees([e.tree_ for e in forest.estimators_], leaf_values)
+    arrays.update(mean=mean, scale=scale, classes=np.asarray(forest.classes_))
+    return CompiledForest(arrays, category_lookup, n_features, max_depth, meta)
+
+
+def compile_regression_tree(preprocessor, regressor, classes, meta=None):
+    """
+    Flatten satu DecisionTreeRegressor yang memprediksi P(kelas classes[1]) (model student hasil distilasi)
+    ke format CompiledForest 1 tree, jadi bisa dipakai lewat predict_proba yang sama.
+    """
+    mean, scale, category_lookup, n_features = _compile_preprocessor(preprocessor)
+
+    def leaf_values(tree):
+        p = np.clip(tree.value[:, 0, 0], 0.0, 1.0)
+        return np.column_stack([1.0 - p, p])
+
+    arrays, max_depth = _flatten_trees([regressor.tree_], leaf_values)
+    arrays.update(mean=mean, scale=scale, classes=np.asarray(classes))
+    return CompiledForest(arrays, category_lookup, n_features, max_depth, meta)
+
+
+def verify(compiled, pipeline, df):
+    """Cek hasil identik dengan pipeline.predict_proba. Return jumlah baris yang berbeda."""
+    expected = pipeline.predict_proba(df)
+    actual = compiled.predict_proba(df)
+    return int((expected != actual).any(axis=1).sum())
+
+
+def _benchmark(fn, n=200):
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+def build(model_path=None, output_dir=COMPILED_DIR):
+    import pandas as pd
+    from core.features import FEATURE_COLUMNS, to_frame
+    from core.model_loader import ModelHolder, MODEL_PATH
+
+    holder = ModelHolder(model_path or MODEL_PATH, registry_dir=None, compiled_dir=None)
+    pipeline = holder.get()
+    compiled = compile_pipeline(pipeline, meta={"source_version": holder.version,
+                                                "warmup_proba": pipeline.predict_proba(to_frame(WARMUP_SAMPLE)).tolist()})
+    print(f"🧱 {compiled.n_trees} tree, {len(compiled.feature)} node, kedalaman maks {compiled.max_depth}")
+
+    ok = True
+    for csv_name in ["dataset_pangan.csv", "history_lab.csv"]:
+        path = os.path.join(BASE_DIR, csv_name)
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path)[FEATURE_COLUMNS]
+        n_diff = verify(compiled, pipeline, df)
+        ok = ok and n_diff == 0
+        print(f"{'✅' if n_diff == 0 else '❌'} {csv_name}: {len(df)} baris, {n_diff} berbeda")
+
+    if not ok:
+        print("❌ Hasil tidak identik, artefak tidak disimpan.")
+        return None
+
+    df_one = to_frame(WARMUP_SAMPLE)
+    t_pipeline = _benchmark(lambda: pipeline.predict_proba(df_one), n=50)
+    t_compiled = _benchmark(lambda: compiled.predict_proba(WARMUP_SAMPLE))
+    print(f"⏱️ Single-sample: pipeline {t_pipeline * 1000:.2f} ms vs compiled {t_compiled * 1000:.3f} ms "
+          f"({t_pipeline / t_compiled:.0f}x lebih cepat)")
+
+    compiled.save(output_dir)
+    print(f"💾 Artefak disimpan di {output_dir}")
+    return compiled
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        build(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print("Pemakaian: python -m core.compiled_model build [path/model.pkl]")
@@ -0,0 +1,183 @@
+"""
+Logger CSV non-blocking: request handler cukup enqueue, satu writer thread per file
+yang menulis secara batch (berdasarkan jumlah baris atau interval waktu).
+
+- File lock (fcntl / msvcrt) supaya aman dipakai beberapa proses sekaligus.
+- Rotasi opsional berdasarkan ukuran file atau pergantian hari.
+- Flush otomatis saat proses berhenti (atexit).
+"""
+import atexit
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Lock antar-proses berbasis file `<path>.lock` (juga aman antar-thread dalam satu proses)."""
+
+    def __init__(self, path):
+        self.lock_path = path + ".lock"
+        self._fh = None
+        self._thread_lock = threading.Lock()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._fh = open(self.lock_path, "a+")
+        if fcntl:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        self._fh.close()
+        self._fh = None
+        self._thread_lock.release()
+
+
+class BackgroundCSVWriter:
+    def __init__(self, path, columns, batch_size=200, flush_interval=0.5, max_bytes=None, rotate_daily=False,
+                 on_flush=None):
+        self.path = os.path.abspath(path)
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes        # None = tanpa rotasi ukuran
+        self.rotate_daily = rotate_daily  # True = file lama di-rename saat ganti hari
+        self.on_flush = on_flush          # Callback(rows) tambahan setelah batch tertulis (mis. arsip kolumnar)
+        self.rows_written = 0
+        self.flush_count = 0
+        self.last_error = None
+
+        self._queue = queue.Queue()
+        self._lock = FileLock(self.path)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"csv-writer:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    # --- API untuk request handler (hanya enqueue) ---
+    def write(self, row):
+        self._queue.put([row])
+
+    def write_many(self, rows):
+        # Satu item antrian untuk seluruh batch -> tetap ditulis dalam satu append
+        rows = list(rows)
+        if rows:
+            self._queue.put(rows)
+
+    def flush(self, timeout=5.0):
+        """Tunggu sampai semua baris di antrian sudah tertulis ke disk."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)  # Sinyal berhenti
+        self._thread.join(timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # --- Writer thread ---
+    def _run(self):
+        while True:
+            batch = []
+            n_items = 0
+            stop = False
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.extend(item)
+                n_items += 1
+
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"⚠️ Gagal menulis log {self.path}: {e}")
+                finally:
+                    for _ in range(n_items):
+                        self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, rows):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            self._rotate_if_needed()
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction="ignore")
+                if f.tell() == 0:
+                    writer.writeheader()
+                writer.writerows(rows)
+        self.rows_written += len(rows)
+        self.flush_count += 1
+        if self.on_flush:
+            self.on_flush(rows)
+
+    def _rotate_if_needed(self):
+        if not os.path.exists(self.path):
+            return
+        st = os.stat(self.path)
+        base, ext = os.path.splitext(self.path)
+
+        if self.rotate_daily:
+            file_day = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d")
+            if file_day != datetime.now().strftime("%Y-%m-%d"):
+                self._rename_unique(f"{base}.{file_day}{ext}")
+                return
+        if self.max_bytes and st.st_size >= self.max_bytes:
+            self._rename_unique(f"{base}.{datetime.now().strftime('%Y%m%d-%H%M%S')}{ext}")
+
+    def _rename_unique(self, target):
+        candidate, i = target, 1
+        while os.path.exists(candidate):
+            root, ext = os.path.splitext(target)
+            candidate = f"{root}.{i}{ext}"
+            i += 1
+        os.replace(self.path, candidate)
+
+
+# Satu writer per file per proses (dibagi semua sesi Streamlit)
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path, columns, **kwargs):
+    key = os.path.abspath(path)
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = BackgroundCSVWriter(path, columns, **kwargs)
+        return _writers[key]
+
+
+@atexit.register
+def close_all():
+    for writer in list(_writers.values()):
+        writer.close()
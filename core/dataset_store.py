@@ -0,0 +1,202 @@
+"""
+Dataset training berversi, append-only, dengan index hash baris:
+
+    data_store/
+        segments/seg-000001-<id>.csv   <- immutable, tidak pernah ditulis ulang
+        row_index.txt             <- "<hash> <segment>" per baris (append-only)
+        manifest.json             <- versi -> daftar segment penyusunnya
+
+- Dedup data baru cukup cek hash ke index (O(data baru)), tanpa concat + drop_duplicates seluruh dataset.
+- Setiap append membuat versi baru = segment versi sebelumnya + satu segment baru.
+- Versi mana pun bisa direkonstruksi (load(version)), jadi model bisa diikat ke data yang dipakai melatihnya.
+
+CLI:
+    python -m core.dataset_store info
+    python -m core.dataset_store export [versi] [path.csv]
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from core.csv_logger import FileLock
+from core.features import BASE_DIR, CATEGORICAL_FEATURES, FEATURE_COLUMNS, NUMERICAL_FEATURES
+
+STORE_DIR = os.path.join(BASE_DIR, "data_store")
+SEED_CSV = os.path.join(BASE_DIR, "csv", "dataset_pangan.csv")
+TARGET_COLUMN = "aman_dimakan"
+DATASET_COLUMNS = FEATURE_COLUMNS + [TARGET_COLUMN]
+
+AppendResult = namedtuple("AppendResult", ["version", "added", "duplicates"])
+
+
+def row_hash(row):
+    """Hash isi baris. Angka dinormalisasi ke float (6 == 6.0), teks apa adanya (sama seperti drop_duplicates)."""
+    parts = [str(row[c]) for c in CATEGORICAL_FEATURES]
+    parts += [repr(float(row[c])) for c in NUMERICAL_FEATURES]
+    parts.append(str(int(row[TARGET_COLUMN])))
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class DatasetStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.segment_dir = os.path.join(root, "segments")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.index_path = os.path.join(root, "row_index.txt")
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self._lock = FileLock(os.path.join(root, "_store"))
+        self._index = None       # hash -> segment (lazy)
+        self._index_offset = 0   # Posisi byte row_index.txt yang sudah dibaca
+        self._thread_lock = threading.Lock()
+
+    # --- Manifest ---
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"versions": []}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def versions(self):
+        return self._read_manifest()["versions"]
+
+    @property
+    def current_version(self):
+        versions = self.versions()
+        return versions[-1]["version"] if versions else None
+
+    def is_empty(self):
+        return self.current_version is None
+
+    def _version_entry(self, manifest, version):
+        if version is None:
+            if not manifest["versions"]:
+                raise LookupError("Dataset store masih kosong")
+            return manifest["versions"][-1]
+        for entry in manifest["versions"]:
+            if entry["version"] == version:
+                return entry
+        raise LookupError(f"Versi dataset {version} tidak ada")
+
+    # --- Index hash ---
+    def _refresh_index(self, committed_segments):
+        # Baca hanya baris index baru (proses lain mungkin sudah append)
+        if self._index is None:
+            self._index, self._index_offset = {}, 0
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        self._index_offset += len(complete)
+        for line in complete.decode("utf-8").splitlines():
+            digest, segment = line.split(" ", 1)
+            # Dibaca di bawah lock, jadi segment yang tidak ada di manifest = sisa append yang crash
+            if segment in committed_segments:
+                self._index.setdefault(digest, segment)
+
+    # --- Tulis ---
+    def append(self, df_new, note=""):
+        """
+        Tambah baris baru sebagai segment immutable + versi baru.
+        Baris yang sudah ada (atau duplikat di dalam df_new sendiri) dilewati.
+        Return AppendResult(version, added_df, jumlah_duplikat). Jika tidak ada baris baru, versi tidak berubah.
+        """
+        df_new = df_new[DATASET_COLUMNS]
+        with self._thread_lock, self._lock:
+            manifest = self._read_manifest()
+            committed = {s for v in manifest["versions"] for s in v["segments"]}
+            self._refresh_index(committed)
+
+            keep, hashes, seen = [], [], set()
+            for position, row in enumerate(df_new.to_dict("records")):
+                digest = row_hash(row)
+                if digest in self._index or digest in seen:
+                    continue
+                seen.add(digest)
+                keep.append(position)
+                hashes.append(digest)
+
+            added = df_new.iloc[keep].reset_index(drop=True)
+            current = manifest["versions"][-1] if manifest["versions"] else None
+            if added.empty:
+                return AppendResult(current["version"] if current else None, added, len(df_new))
+
+            version = (current["version"] if current else 0) + 1
+            # Nama unik: sisa append yang crash (belum masuk manifest) tidak akan tertukar
+            segment = f"seg-{version:06d}-{uuid.uuid4().hex[:8]}.csv"
+            # Urutan tulis: segment -> index -> manifest (manifest = titik commit)
+            path = os.path.join(self.segment_dir, segment)
+            added.to_csv(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{d} {segment}\n" for d in hashes))
+
+            manifest["versions"].append({
+                "version": version,
+                "segments": (current["segments"] if current else []) + [segment],
+                "rows": (current["rows"] if current else 0) + len(added),
+                "added": len(added),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "note": note,
+            })
+            self._write_manifest(manifest)
+            for digest in hashes:
+                self._index[digest] = segment
+            return AppendResult(version, added, len(df_new) - len(added))
+
+    # --- Baca ---
+    def load(self, version=None):
+        """DataFrame dataset persis seperti pada versi tersebut (default: terbaru)."""
+        import pandas as pd
+
+        entry = self._version_entry(self._read_manifest(), version)
+        frames = [pd.read_csv(os.path.join(self.segment_dir, s)) for s in entry["segments"]]
+        return pd.concat(frames, ignore_index=True)
+
+    def export_csv(self, path, version=None):
+        df = self.load(version)
+        df.to_csv(path, index=False)
+        return len(df)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_dataset_store(seed_csv=SEED_CSV):
+    """Store per proses; saat pertama kali (kosong) diisi dari csv/dataset_pangan.csv sebagai versi 1."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = DatasetStore()
+            if store.is_empty() and os.path.exists(seed_csv):
+                import pandas as pd
+                store.append(pd.read_csv(seed_csv), note=f"seed: {os.path.basename(seed_csv)}")
+            _store = store
+        return _store
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "info"
+    store = get_dataset_store()
+    if command == "info":
+        for entry in store.versions():
+            print(f"v{entry['version']:<4} {entry['rows']:>7} baris (+{entry['added']}) {entry['created']} {entry['note']}")
+    elif command == "export":
+        version = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        path = sys.argv[3] if len(sys.argv) > 3 else os.path.join(BASE_DIR, "dataset_export.csv")
+        print(f"💾 {store.export_csv(path, version)} baris -> {path}")
+    else:
+        print("Pemakaian: python -m core.dataset_store [info | export [versi] [path.csv]]")
@@ -0,0 +1,304 @@
+"""
+Distilasi forest (teacher) ke satu pohon regresi dangkal (student).
+
+- Student dilatih pada probabilitas lunak teacher (P aman), bukan label keras, di atas
+  dataset + history_lab.csv + sampel sintetis (kombinasi kategori & rentang input app).
+- Confidence student per leaf = porsi sampel training di leaf itu yang label teacher-nya sama dengan
+  label leaf. Leaf di dekat batas keputusan otomatis ber-confidence rendah.
+- Saat serving (DistilledModel), baris yang jatuh di leaf ber-confidence < MIN_CONFIDENCE
+  dihitung ulang oleh forest penuh.
+- Kedalaman dipilih yang fallback-nya paling sedikit di antara kandidat yang agreement-nya
+  (setelah fallback) >= TARGET_AGREEMENT terhadap teacher. Jika tidak ada yang memenuhi, distilasi
+  gagal (ValueError) dan versi tersebut dilayani forest penuh.
+- Student disimpan dalam format CompiledForest (1 tree), jadi inference-nya memakai engine yang sama.
+
+CLI (distilasi versi registry & cetak laporan fidelity):
+    python -m core.distill [versi]
+"""
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from core.features import BASE_DIR, CATEGORICAL_FEATURES, FEATURE_COLUMNS, WARMUP_SAMPLE
+
+STUDENT_DIR = "student"        # Subfolder di direktori versi registry
+DEPTHS = (6, 8, 10, 12, 16)    # Kandidat kedalaman student
+MIN_SAMPLES_LEAF = 3
+TARGET_AGREEMENT = 0.995       # Agreement label minimal (student + fallback) vs teacher, data evaluasi
+MIN_CONFIDENCE = 0.99          # Confidence leaf di bawah ini -> fallback ke forest
+N_SYNTHETIC = 20000            # Sampel sintetis untuk training student
+N_EVAL = 5000                  # Sampel sintetis terpisah untuk evaluasi
+BATCH_ROWS = 1000              # Ukuran batch untuk laporan latency per sampel
+SUHU_RANGE = (-10, 100)        # Sama dengan slider suhu di app
+HISTORY_CSV = os.path.join(BASE_DIR, "history_lab.csv")
+
+
+def synthetic_samples(df, n, seed=0):
+    """
+    Sampel sintetis: kategori diambil dari baris nyata (sebagian atribut warna/bau/tekstur ditukar
+    dengan baris lain), suhu seragam di rentang slider app, lama simpan & pH di sekitar data nyata.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    base = df[FEATURE_COLUMNS].reset_index(drop=True)
+    out = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    for col in ["warna", "bau", "tekstur"]:
+        swap = rng.random(n) < 0.25
+        out.loc[swap, col] = base[col].to_numpy()[rng.integers(0, len(base), swap.sum())]
+
+    max_hours = max(float(base["lama_simpan"].max()), 24.0) * 2
+    out["suhu"] = rng.integers(SUHU_RANGE[0], SUHU_RANGE[1] + 1, n)
+    out["lama_simpan"] = np.round(rng.random(n) ** 2 * max_hours)   # Lebih rapat di jam-jam awal
+    out["ph"] = np.round(np.clip(out["ph"].astype(float) + rng.normal(0, 0.7, n), 0.0, 14.0), 1)
+    return pd.DataFrame(out, columns=FEATURE_COLUMNS)
+
+
+def _median_latency(fn, n=50):
+    fn()
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def _artifact_bytes(compiled):
+    from core.compiled_model import ARRAY_NAMES
+
+    return int(sum(getattr(compiled, name).nbytes for name in ARRAY_NAMES))
+
+
+def leaf_confidence(regressor, Xt, p_teacher):
+    """Per node: porsi sampel training di leaf tersebut yang label teacher-nya sama dengan label leaf."""
+    n_nodes = regressor.tree_.node_count
+    leaves = regressor.apply(Xt)
+    leaf_label = regressor.tree_.value[:, 0, 0] > 0.5
+    agree = (p_teacher > 0.5) == leaf_label[leaves]
+    total = np.bincount(leaves, minlength=n_nodes)
+    return np.bincount(leaves, weights=agree, minlength=n_nodes) / np.maximum(total, 1)
+
+
+class DistilledModel:
+    """Student melayani prediksi; baris di leaf ber-confidence rendah dihitung ulang oleh teacher."""
+
+    def __init__(self, student, teacher, confidence, min_confidence=MIN_CONFIDENCE):
+        self.student = student
+        self.teacher = teacher
+        self.confidence = confidence  # Array per node student (lihat leaf_confidence)
+        self.min_confidence = min_confidence
+        self.classes_ = student.classes_
+        self.rows = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def predict_proba(self, data):
+        # Sama dengan student.predict_proba (1 tree), tapi index leaf dibutuhkan untuk confidence
+        leaves = self.student.apply(self.student.transform(data))[:, 0]
+        proba = self.student.value[leaves]
+        low = self.confidence[leaves] < self.min_confidence
+        if low.any():
+            if isinstance(data, dict):
+                subset = data
+            elif isinstance(data, list):
+                subset = [row for row, m in zip(data, low) if m]
+            else:
+                subset = data[low]
+            proba[low] = self.teacher.predict_proba(subset)
+        with self._lock:
+            self.rows += len(proba)
+            self.fallbacks += int(low.sum())
+        return proba
+
+    def predict(self, data):
+        return self.classes_[self.predict_proba(data).argmax(axis=1)]
+
+    def stats(self):
+        with self._lock:
+            return {"rows": self.rows, "fallbacks": self.fallbacks,
+                    "fallback_rate": self.fallbacks / self.rows if self.rows else 0.0}
+
+
+def distill(pipeline, teacher=None, df_labeled=None, depths=DEPTHS, n_synthetic=N_SYNTHETIC, seed=42):
+    """
+    Latih student dari pipeline teacher. Return (student CompiledForest, laporan dict).
+    Raise ValueError jika tidak ada kedalaman yang mencapai TARGET_AGREEMENT.
+    teacher: CompiledForest dari pipeline (dibuat jika None), dipakai untuk label lunak & fallback.
+    df_labeled: dataset berlabel untuk akurasi (default: versi terbaru dataset store).
+    """
+    import pandas as pd
+    from sklearn.tree import DecisionTreeRegressor
+
+    from core.compiled_model import compile_pipeline, compile_regression_tree
+    from core.dataset_store import get_dataset_store
+
+    start = time.perf_counter()
+    teacher = teacher or compile_pipeline(pipeline)
+    if df_labeled is None:
+        df_labeled = get_dataset_store().load()
+    real = [df_labeled[FEATURE_COLUMNS]]
+    if os.path.exists(HISTORY_CSV):
+        # Input yang benar-benar pernah diuji user; label tidak dibutuhkan (label = output teacher)
+        real.append(pd.read_csv(HISTORY_CSV)[FEATURE_COLUMNS].dropna())
+    real = pd.concat(real, ignore_index=True)
+    for col in CATEGORICAL_FEATURES:
+        real[col] = real[col].astype(str)
+
+    X_fit = pd.concat([real, synthetic_samples(real, n_synthetic, seed)], ignore_index=True)
+    X_eval = pd.concat([real, synthetic_samples(real, N_EVAL, seed + 1)], ignore_index=True)
+    classes = teacher.classes_
+    positive = list(classes).index(1)
+    # Label lunak dalam jumlah besar lewat pipeline sklearn (lebih cepat untuk batch besar, hasil identik)
+    p_fit = pipeline.predict_proba(X_fit)[:, positive]
+    p_eval = pipeline.predict_proba(X_eval)
+    teacher_label = p_eval.argmax(axis=1)
+
+    preprocessor = pipeline.named_steps["preprocessor"]
+    Xt_fit = preprocessor.transform(X_fit)
+    Xt_eval = preprocessor.transform(X_eval)
+
+    candidates = []
+    for depth in depths:
+        regressor = DecisionTreeRegressor(max_depth=depth, min_samples_leaf=MIN_SAMPLES_LEAF, random_state=seed)
+        regressor.fit(Xt_fit, p_fit)
+        confidence = leaf_confidence(regressor, Xt_fit, p_fit)
+        leaves = regressor.apply(Xt_eval)
+        p_student = np.clip(regressor.tree_.value[leaves, 0, 0], 0.0, 1.0)
+        fallback = confidence[leaves] < MIN_CONFIDENCE
+        p_served = np.where(fallback, p_eval[:, positive], p_student)
+        candidates.append({"depth": depth, "regressor": regressor, "confidence": confidence,
+                           "agreement": float(((p_student > 0.5) == (teacher_label == positive)).mean()),
+                           "agreement_served": float(((p_served > 0.5) == (teacher_label == positive)).mean()),
+                           "fallback_rate": float(fallback.mean()), "n_nodes": int(regressor.tree_.node_count)})
+    # Fallback paling sedikit (= forest paling jarang dipanggil) di antara kandidat yang cukup akurat
+    eligible = [c for c in candidates if c["agreement_served"] >= TARGET_AGREEMENT]
+    if not eligible:
+        # Student yang kurang setia tidak boleh dilayani menggantikan forest
+        top = max(c["agreement_served"] for c in candidates)
+        raise ValueError(f"tidak ada kedalaman student dengan agreement >= {TARGET_AGREEMENT:.1%} "
+                         f"(tertinggi {top:.2%})")
+    best = min(eligible, key=lambda c: (c["fallback_rate"], c["depth"]))
+
+    student = compile_regression_tree(preprocessor, best["regressor"], classes,
+                                      meta={"min_confidence": MIN_CONFIDENCE})
+    student.leaf_confidence = best["confidence"]
+    # Pengaman seperti compile_pipeline: engine array harus sama persis dengan pohon sklearn
+    expected = np.clip(best["regressor"].predict(Xt_eval), 0.0, 1.0)
+    if not np.array_equal(student.predict_proba(X_eval)[:, positive], expected):
+        raise ValueError("hasil compiled student berbeda dengan DecisionTreeRegressor")
+    student.meta["warmup_proba"] = student.predict_proba(WARMUP_SAMPLE).tolist()
+
+    served = DistilledModel(student, teacher, best["confidence"])
+    p_served = served.predict_proba(X_eval)
+    p_student = student.predict_proba(X_eval)
+    y = df_labeled["aman_dimakan"].to_numpy()
+    X_labeled = df_labeled[FEATURE_COLUMNS]
+    X_batch = X_eval.iloc[:BATCH_ROWS]
+
+    report = {
+        "depth": best["depth"],
+        "n_nodes": best["n_nodes"],
+        "depth_search": [{k: c[k] for k in ("depth", "agreement", "agreement_served", "fallback_rate", "n_nodes")}
+                         for c in candidates],
+        "min_confidence": MIN_CONFIDENCE,
+        "n_train": len(X_fit),
+        "n_eval": len(X_eval),
+        # Agreement label terhadap teacher (data evaluasi terpisah)
+        "agreement": float((p_student.argmax(axis=1) == teacher_label).mean()),
+        "agreement_served": float((p_served.argmax(axis=1) == teacher_label).mean()),
+        "fallback_rate": served.stats()["fallback_rate"],
+        "risk_mae": float(np.abs(p_student[:, positive] - p_eval[:, positive]).mean() * 100),
+        # Akurasi terhadap label asli dataset
+        "accuracy_teacher": float((pipeline.predict(X_labeled) == y).mean()),
+        "accuracy_student": float((student.predict(X_labeled) == y).mean()),
+        "accuracy_served": float((served.predict(X_labeled) == y).mean()),
+        "bytes_teacher": _artifact_bytes(teacher),
+        "bytes_student": _artifact_bytes(student) + best["confidence"].nbytes,
+        # Latency per sampel (single-sample, median) dan per sampel dalam batch evaluasi
+        "latency_teacher_ms": _median_latency(lambda: teacher.predict_proba(WARMUP_SAMPLE)) * 1000,
+        "latency_student_ms": _median_latency(lambda: student.predict_proba(WARMUP_SAMPLE)) * 1000,
+        "latency_served_ms": _median_latency(lambda: served.predict_proba(WARMUP_SAMPLE)) * 1000,
+        "batch_teacher_us": _median_latency(lambda: teacher.predict_proba(X_batch), 3) / len(X_batch) * 1e6,
+        "batch_student_us": _median_latency(lambda: student.predict_proba(X_batch), 3) / len(X_batch) * 1e6,
+        "distill_seconds": time.perf_counter() - start,
+    }
+    student.meta["report"] = report
+    return student, report
+
+
+def save_student(student, version_dir):
+    """Tulis student ke <versi>/student lewat direktori sementara + rename (menimpa student lama)."""
+    target = os.path.join(version_dir, STUDENT_DIR)
+    staging = os.path.join(version_dir, f".{STUDENT_DIR}-{uuid.uuid4().hex[:8]}")
+    student.save(staging)
+    np.save(os.path.join(staging, "confidence.npy"), np.asarray(student.leaf_confidence))
+    if os.path.isdir(target):
+        old = f"{staging}.old"
+        os.rename(target, old)
+        os.rename(staging, target)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.rename(staging, target)
+    return target
+
+
+def load_student(version_dir, mmap_mode="r"):
+    """Return CompiledForest student versi tersebut (+ atribut leaf_confidence), atau None jika belum didistilasi."""
+    from core.compiled_model import CompiledForest
+
+    path = os.path.join(version_dir, STUDENT_DIR)
+    if not os.path.isdir(path):
+        return None
+    student = CompiledForest.load(path, mmap_mode=mmap_mode)
+    student.leaf_confidence = np.load(os.path.join(path, "confidence.npy"), mmap_mode=mmap_mode)
+    return student
+
+
+def print_report(report):
+    print(f"🌱 Student: 1 pohon, kedalaman {report['depth']}, {report['n_nodes']} node "
+          f"(dilatih pada {report['n_train']} sampel, dievaluasi pada {report['n_eval']})")
+    for c in report["depth_search"]:
+        print(f"   kedalaman {c['depth']:>2}: agreement {c['agreement']:.2%} (dengan fallback {c['agreement_served']:.2%}), "
+              f"fallback {c['fallback_rate']:.1%}, {c['n_nodes']} node")
+    print(f"🤝 Agreement dengan forest: student {report['agreement']:.2%} | dengan fallback "
+          f"{report['agreement_served']:.2%} (fallback {report['fallback_rate']:.1%} baris, "
+          f"confidence leaf < {report['min_confidence']:.0%}) | selisih risk rata-rata {report['risk_mae']:.2f} poin")
+    print(f"🎯 Akurasi dataset: forest {report['accuracy_teacher']:.2%} | student {report['accuracy_student']:.2%} "
+          f"| dengan fallback {report['accuracy_served']:.2%}")
+    print(f"📦 Ukuran array: forest {report['bytes_teacher'] / 1024:.1f} KB | student {report['bytes_student'] / 1024:.1f} KB")
+    print(f"⏱️ Single-sample: forest {report['latency_teacher_ms']:.3f} ms | student {report['latency_student_ms']:.3f} ms "
+          f"| dengan fallback {report['latency_served_ms']:.3f} ms")
+    print(f"⏱️ Batch per sampel: forest {report['batch_teacher_us']:.1f} µs | student {report['batch_student_us']:.1f} µs")
+
+
+def main(argv):
+    from core.model_registry import ModelRegistry
+    from core.dataset_store import get_dataset_store
+
+    registry = ModelRegistry()
+    name = argv[0] if argv else registry.current()
+    if name is None:
+        print("❌ Registry model masih kosong. Publish model dulu (python -m core.model_registry publish).")
+        return
+    meta = registry.metadata(name)
+    store = get_dataset_store()
+    df_labeled = store.load(meta["data_version"]) if meta.get("data_version") else store.load()
+    try:
+        student, report = distill(registry.load_pipeline(name), registry.load_compiled(name, mmap_mode=None), df_labeled)
+    except ValueError as e:
+        print(f"❌ Distilasi gagal, student lama (jika ada) tidak diubah: {e}")
+        return
+    print_report(report)
+    print(f"💾 Student disimpan di {save_student(student, registry.version_dir(name))}")
+    if name == registry.current():
+        print("ℹ️ Proses app yang sudah jalan memakai student baru setelah restart.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,159 @@
+"""
+Cache persisten (SQLite) untuk penjelasan AI Auditor.
+
+Key = hash dari sampel yang dinormalisasi + label prediksi + bucket risk score + versi prompt,
+jadi sampel yang sama (mis. "Ayam mentah, 25°C, 1 jam, pH 7.0") tidak perlu memanggil Gemini lagi.
+Eviction LRU (jumlah entri & total ukuran) + TTL. Counter hit/miss ikut dipersist.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from core.features import BASE_DIR
+
+CACHE_PATH = os.path.join(BASE_DIR, "memory", "explanation_cache.sqlite")
+
+
+def _norm_text(value):
+    return " ".join(str(value).strip().lower().split())
+
+
+def canonical_sample(data_dict):
+    """Normalisasi sampel: teks lowercase tanpa spasi berlebih, angka dibulatkan ke presisi input UI."""
+    return {
+        "kategori": _norm_text(data_dict["kategori"]),
+        "bahan_baku": _norm_text(data_dict["bahan_baku"]),
+        "warna": _norm_text(data_dict["warna"]),
+        "bau": _norm_text(data_dict["bau"]),
+        "tekstur": _norm_text(data_dict["tekstur"]),
+        "suhu": round(float(data_dict["suhu"]), 1),
+        "lama_simpan": round(float(data_dict["lama_simpan"]), 1),
+        "ph": round(float(data_dict["ph"]), 1),
+    }
+
+
+def risk_bucket(risk_score, width=5):
+    # 0-4.99 -> 0, 5-9.99 -> 5, dst.
+    return int(float(risk_score) // width) * width
+
+
+def make_key(data_dict, prediction_label, risk_score, prompt_version):
+    payload = {
+        "sample": canonical_sample(data_dict),
+        "label": prediction_label,
+        "risk_bucket": risk_bucket(risk_score),
+        "prompt_version": prompt_version,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+    def __init__(self, path=CACHE_PATH, max_entries=5000, max_bytes=50_000_000, ttl_seconds=30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute(
+            "INSERT INTO stats(name, value) VALUES(?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+            (name, amount, amount),
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._bump(conn, "misses")
+                return None
+            value, created = row
+            if now - created > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bump(conn, "expired")
+                self._bump(conn, "misses")
+                return None
+            conn.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._bump(conn, "hits")
+            return value
+
+    def put(self, key, value):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries(key, value, size, created, last_access, hits) VALUES(?, ?, ?, ?, ?, 0)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        # Buang yang sudah kedaluwarsa dulu, lalu LRU sampai batas jumlah & ukuran terpenuhi
+        expired = conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl_seconds,)).rowcount
+        if expired:
+            self._bump(conn, "expired", expired)
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        evicted = 0
+        if count > self.max_entries or total > self.max_bytes:
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                count -= 1
+                total -= size
+                evicted += 1
+        if evicted:
+            self._bump(conn, "evictions", evicted)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": counters.get("evictions", 0),
+            "expired": counters.get("expired", 0),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_explanation_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExplanationCache()
+        return _cache
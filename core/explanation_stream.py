@@ -0,0 +1,58 @@
+"""
+Pemisah bagian penjelasan AI Auditor yang bekerja pada stream.
+
+Respon Gemini terdiri dari Bagian 1 (penjelasan utama) dan Bagian 2 (referensi) yang dipisah
+REFERENCE_SEPARATOR. Separator bisa terpotong di antara dua chunk, jadi ekor chunk yang mungkin
+merupakan awal separator ditahan dulu sampai chunk berikutnya datang.
+"""
+
+REFERENCE_SEPARATOR = "|||REFERENSI|||"
+
+
+def _partial_suffix(text, separator):
+    # Panjang ekor text terpanjang yang sama dengan awalan separator (belum tentu separator utuh)
+    for k in range(min(len(separator) - 1, len(text)), 0, -1):
+        if text.endswith(separator[:k]):
+            return k
+    return 0
+
+
+def split_sections(chunks, separator=REFERENCE_SEPARATOR):
+    """
+    chunks: iterable potongan teks. Yield (bagian, teks) dengan bagian 0 = utama, 1 = referensi.
+    Hanya separator pertama yang memisah; separator berikutnya ikut menjadi teks referensi.
+    """
+    section = 0
+    pending = ""
+    for chunk in chunks:
+        if section == 1:
+            yield 1, chunk
+            continue
+
+        pending += chunk
+        idx = pending.find(separator)
+        if idx >= 0:
+            if idx:
+                yield 0, pending[:idx]
+            section = 1
+            rest = pending[idx + len(separator):]
+            pending = ""
+            if rest:
+                yield 1, rest
+            continue
+
+        keep = _partial_suffix(pending, separator)
+        if len(pending) > keep:
+            yield 0, pending[:len(pending) - keep]
+            pending = pending[len(pending) - keep:]
+
+    if pending:
+        yield section, pending
+
+
+def split_explanation(text, separator=REFERENCE_SEPARATOR):
+    """Versi non-stream: return (utama, referensi atau None)."""
+    parts = text.split(separator, 1)
+    if len(parts) < 2:
+        return text, None
+    return parts[0], parts[1]
@@ -0,0 +1,37 @@
+"""
+Kontrak kolom bersama: fitur model, kolom log (history_lab.csv, access_log.csv), sampel warm-up,
+dan to_frame() untuk mengubah dict sampel menjadi DataFrame berurutan kolom training.
+"""
+import os
+
+# Root project (folder yang berisi app.py & model.pkl)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Definisi kolom (harus sama dengan training/training.py)
+CATEGORICAL_FEATURES = ["kategori", "bahan_baku", "warna", "bau", "tekstur"]
+NUMERICAL_FEATURES = ["suhu", "lama_simpan", "ph"]
+FEATURE_COLUMNS = ["kategori", "bahan_baku", "warna", "bau", "tekstur", "suhu", "lama_simpan", "ph"]
+
+# Kolom log
+HISTORY_COLUMNS = ["timestamp"] + FEATURE_COLUMNS + ["prediksi", "risk_score"]
+ACCESS_COLUMNS = ["timestamp", "session_id", "page"]
+
+# Sampel default untuk warm-up model (sampel yang paling sering diuji di history_lab.csv)
+WARMUP_SAMPLE = {
+    "kategori": "Daging",
+    "bahan_baku": "Ayam mentah",
+    "warna": "merah muda",
+    "bau": "normal",
+    "tekstur": "kenyal",
+    "suhu": 25,
+    "lama_simpan": 1,
+    "ph": 7.0,
+}
+
+def to_frame(records):
+    """Ubah satu dict atau list of dict menjadi DataFrame dengan urutan kolom training."""
+    import pandas as pd
+
+    if isinstance(records, dict):
+        records = [records]
+    return pd.DataFrame(records, columns=FEATURE_COLUMNS)
@@ -0,0 +1,352 @@
+"""
+Client Gemini bersama untuk app.py, generator.py, dan labeler.py.
+
+- Fallback antar model (urutan berdasarkan kesehatan yang teramati, bukan urutan statis).
+- Circuit breaker per model: 404 (model tidak ada) dan 429 (kuota habis) membuka circuit
+  untuk sementara, lalu dicoba lagi dengan satu probe (half-open).
+- Timeout per panggilan & statistik per model (success rate, latency, time-to-first-token, 429/404).
+- Streaming: generate_content_stream() menghasilkan potongan teks begitu tiba.
+- Durasi & status tiap panggilan (ok / fallback ke model lain / error) dicatat ke core.metrics.
+"""
+import re
+import threading
+import time
+
+from core.metrics import record
+from core.rate_limit import is_rate_limit_error
+
+DEFAULT_MODELS = [
+    'gemini-2.0-flash-lite',  # Lite version (Faster)
+    'gemini-2.0-flash',       # Standard
+    'gemini-flash-latest',    # Alias for latest stable
+    'gemini-pro',             # Legacy
+]
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class AllModelsFailed(Exception):
+    """
+    Semua model gagal atau sedang di-circuit-break.
+    retry_at: epoch saat circuit pertama kembali boleh dicoba, jika SEMUA model gagal karena circuit
+    terbuka (429/404/error beruntun); None jika ada model yang gagal biasa (circuit masih tertutup).
+    """
+
+    def __init__(self, message, retry_at=None):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class StreamInterrupted(Exception):
+    """Stream putus setelah sebagian teks terkirim (tidak bisa fallback ke model lain)."""
+
+
+def classify_error(error):
+    text = str(error)
+    if is_rate_limit_error(error):
+        return "rate_limited"
+    if "404" in text or "not found" in text.lower() or "NotFound" in type(error).__name__:
+        return "not_found"
+    if "timeout" in text.lower() or "deadline" in text.lower() or "DeadlineExceeded" in type(error).__name__:
+        return "timeout"
+    return "error"
+
+
+def _ewma(old, new, alpha=0.2):
+    return new if old is None else (1 - alpha) * old + alpha * new
+
+
+def _chunk_text(chunk):
+    # Chunk terakhir Gemini bisa tanpa teks (hanya finish_reason) -> .text raise ValueError
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def _retry_after(error):
+    # Pesan 429 Gemini biasanya memuat "Please retry in 36.6s" / "retry_delay { seconds: 36 }"
+    match = re.search(r"retry in ([\d.]+)s|seconds:\s*(\d+)", str(error))
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+
+class ModelHealth:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.not_found = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.latency_ewma = None  # Detik, exponential moving average
+        self.ttft_ewma = None     # Time-to-first-token (khusus panggilan streaming)
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.last_error = None
+
+    def success_rate(self):
+        # Laplace smoothing supaya model yang belum pernah dicoba tidak langsung dianggap buruk
+        return (self.successes + 1) / (self.calls + 2)
+
+    def as_dict(self):
+        return {
+            "model": self.name,
+            "state": self.state,
+            "calls": self.calls,
+            "success_rate": round(self.successes / self.calls, 3) if self.calls else None,
+            "latency_ms": round(self.latency_ewma * 1000) if self.latency_ewma is not None else None,
+            "ttft_ms": round(self.ttft_ewma * 1000) if self.ttft_ewma is not None else None,
+            "rate_limited": self.rate_limited,
+            "not_found": self.not_found,
+            "timeouts": self.timeouts,
+            "open_for_s": round(max(0.0, self.open_until - time.time()), 1) if self.state == OPEN else 0,
+            "last_error": self.last_error,
+        }
+
+
+class GeminiClient:
+    def __init__(self, models=None, timeout=30.0, model_factory=None,
+                 rate_limit_cooldown=60.0, not_found_cooldown=3600.0,
+                 error_cooldown=30.0, failure_threshold=3):
+        self.models = list(models or DEFAULT_MODELS)
+        self.timeout = timeout
+        self.model_factory = model_factory  # name -> objek dengan generate_content (default: genai.GenerativeModel)
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.not_found_cooldown = not_found_cooldown
+        self.error_cooldown = error_cooldown
+        self.failure_threshold = failure_threshold
+        self._health = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    # --- Setup ---
+    def configure(self, api_key):
+        import google.generativeai as genai  # Import berat, hanya saat benar-benar dipakai
+
+        genai.configure(api_key=api_key)
+
+    def _get_model(self, name):
+        with self._lock:
+            if name not in self._instances:
+                if self.model_factory is not None:
+                    self._instances[name] = self.model_factory(name)
+                else:
+                    import google.generativeai as genai
+                    self._instances[name] = genai.GenerativeModel(name)
+            return self._instances[name]
+
+    def _health_of(self, name):
+        if name not in self._health:
+            self._health[name] = ModelHealth(name)
+        return self._health[name]
+
+    # --- Circuit breaker ---
+    def ordered_models(self, models=None):
+        """Model yang boleh dicoba sekarang, diurutkan berdasarkan kesehatan."""
+        candidates = list(models or self.models)
+        now = time.time()
+        available = []
+        with self._lock:
+            for pref, name in enumerate(candidates):
+                h = self._health_of(name)
+                if h.state == OPEN:
+                    if now < h.open_until or h.probe_in_flight:
+                        continue
+                    h.state = HALF_OPEN  # Waktu buka habis: izinkan satu probe
+                if h.state == HALF_OPEN:
+                    if h.probe_in_flight:
+                        continue
+                    h.probe_in_flight = True
+                latency = h.latency_ewma if h.latency_ewma is not None else 0.0
+                # Success rate dibulatkan supaya beda kecil tidak mengacak urutan preferensi
+                available.append((-round(h.success_rate(), 1), round(latency, 1), pref, name))
+        return [name for *_, name in sorted(available)]
+
+    def circuit_retry_at(self, models=None):
+        """Epoch saat salah satu model bisa dicoba lagi jika semua sedang di-circuit-break, selain itu None."""
+        now = time.time()
+        with self._lock:
+            waits = []
+            for name in models or self.models:
+                h = self._health_of(name)
+                if h.state == OPEN:
+                    waits.append(max(h.open_until, now))
+                elif h.state == HALF_OPEN and h.probe_in_flight:
+                    waits.append(now + 1.0)  # Probe thread lain sebentar lagi selesai
+                else:
+                    return None
+            return min(waits) if waits else None
+
+    def _record_success(self, name, latency, ttft=None):
+        with self._lock:
+            h = self._health_of(name)
+            h.calls += 1
+            h.successes += 1
+            h.consecutive_failures = 0
+            h.latency_ewma = _ewma(h.latency_ewma, latency)
+            if ttft is not None:
+                h.ttft_ewma = _ewma(h.ttft_ewma, ttft)
+            h.state = CLOSED
+            h.probe_in_flight = False
+
+    def _record_failure(self, name, error):
+        kind = classify_error(error)
+        with self._lock:
+            h = self._health_of(name)
+            h.calls += 1
+            h.failures += 1
+            h.consecutive_failures += 1
+            h.last_error = f"{kind}: {str(error)[:200]}"
+            h.probe_in_flight = False
+
+            cooldown = None
+            if kind == "rate_limited":
+                h.rate_limited += 1
+                cooldown = _retry_after(error) or self.rate_limit_cooldown
+            elif kind == "not_found":
+                h.not_found += 1
+                cooldown = self.not_found_cooldown
+            else:
+                if kind == "timeout":
+                    h.timeouts += 1
+                if h.state == HALF_OPEN or h.consecutive_failures >= self.failure_threshold:
+                    cooldown = self.error_cooldown
+
+            if cooldown is not None:
+                h.state = OPEN
+                h.open_until = time.time() + cooldown
+            elif h.state == HALF_OPEN:
+                h.state = CLOSED
+        return kind
+
+    # --- Panggilan ---
+    def generate_content(self, prompt, models=None, timeout=None):
+        """
+        Coba model sesuai urutan kesehatan. Return response (punya .text).
+        Raise AllModelsFailed jika semua gagal / sedang open.
+        """
+        call_start = time.perf_counter()
+        ordered = self.ordered_models(models)
+        if not ordered:
+            record("llm", time.perf_counter() - call_start, "error", "circuit_open")
+            raise AllModelsFailed("Semua model sedang di-circuit-break (429/404). " + self._last_errors(models),
+                                  retry_at=self.circuit_retry_at(models))
+
+        errors = []
+        for i, name in enumerate(ordered):
+            start = time.perf_counter()
+            try:
+                response = self._get_model(name).generate_content(
+                    prompt, request_options={"timeout": timeout or self.timeout}
+                )
+                response.text  # Akses .text bisa raise (mis. respon diblokir safety filter)
+            except Exception as e:
+                kind = self._record_failure(name, e)
+                errors.append(f"{name}: {kind} ({str(e)[:120]})")
+                continue
+            self._record_success(name, time.perf_counter() - start)
+            self._release_probes(ordered[i + 1:])
+            response.model_name = name
+            record("llm", time.perf_counter() - call_start, "fallback" if errors else "ok", name)
+            return response
+
+        record("llm", time.perf_counter() - call_start, "error", "all_failed")
+        raise AllModelsFailed("; ".join(errors), retry_at=self.circuit_retry_at(models))
+
+    def generate_content_stream(self, prompt, models=None, timeout=None):
+        """
+        Generator potongan teks (str). Fallback ke model lain hanya sebelum chunk pertama diterima;
+        jika stream putus setelahnya, raise StreamInterrupted.
+        """
+        call_start = time.perf_counter()
+        ordered = self.ordered_models(models)
+        if not ordered:
+            record("llm_stream", time.perf_counter() - call_start, "error", "circuit_open")
+            raise AllModelsFailed("Semua model sedang di-circuit-break (429/404). " + self._last_errors(models),
+                                  retry_at=self.circuit_retry_at(models))
+
+        errors = []
+        unsettled = list(ordered)  # Model yang flag probe-nya (mungkin) masih dipegang panggilan ini
+        try:
+            for i, name in enumerate(ordered):
+                start = time.perf_counter()
+                ttft = None
+                try:
+                    stream = self._get_model(name).generate_content(
+                        prompt, stream=True, request_options={"timeout": timeout or self.timeout}
+                    )
+                    for chunk in stream:
+                        text = _chunk_text(chunk)
+                        if not text:
+                            continue
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                            self._release_probes(ordered[i + 1:])
+                            unsettled = [name]
+                        yield text
+                    if ttft is None:
+                        raise ValueError("Respon kosong (kemungkinan diblokir safety filter)")
+                except Exception as e:
+                    kind = self._record_failure(name, e)
+                    unsettled.remove(name)
+                    if ttft is not None:
+                        record("llm_stream", time.perf_counter() - call_start, "error", name)
+                        raise StreamInterrupted(f"{name}: stream terputus ({kind}: {str(e)[:120]})") from e
+                    errors.append(f"{name}: {kind} ({str(e)[:120]})")
+                    continue
+                self._record_success(name, time.perf_counter() - start, ttft=ttft)
+                unsettled.remove(name)
+                record("llm_stream", time.perf_counter() - call_start, "fallback" if errors else "ok", name)
+                return
+        finally:
+            # Stream dihentikan pemanggil (GeneratorExit saat rerun Streamlit, bukan Exception): tanpa ini
+            # model half-open tetap probe_in_flight dan tidak pernah dicoba lagi selama proses hidup
+            self._release_probes(unsettled)
+
+        record("llm_stream", time.perf_counter() - call_start, "error", "all_failed")
+        raise AllModelsFailed("; ".join(errors), retry_at=self.circuit_retry_at(models))
+
+    def _release_probes(self, names):
+        # Model half-open yang tidak jadi dicoba (sudah ada yang sukses) boleh di-probe panggilan berikutnya
+        with self._lock:
+            for name in names:
+                self._health_of(name).probe_in_flight = False
+
+    def _last_errors(self, models=None):
+        with self._lock:
+            return "; ".join(f"{n}: {self._health_of(n).last_error}" for n in (models or self.models))
+
+    def using(self, models):
+        """View dengan urutan preferensi model sendiri (health tetap dibagi bersama)."""
+        return _ModelPreference(self, models)
+
+    def stats(self):
+        with self._lock:
+            return [self._health_of(name).as_dict() for name in self.models]
+
+
+class _ModelPreference:
+    def __init__(self, client, models):
+        self.client = client
+        self.models = list(models)
+
+    def generate_content(self, prompt, **kwargs):
+        return self.client.generate_content(prompt, models=self.models, **kwargs)
+
+
+# Satu client per proses -> memori kesehatan model dibagi semua sesi/thread
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeminiClient()
+        return _client
@@ -0,0 +1,280 @@
+"""
+Arsip kolumnar history lab (Parquet) yang dipartisi per tanggal:
+
+    archive/lab_history/date=2025-12-04/part-<ms>-<id>.parquet
+
+- Kolom bertipe (timestamp, float) dan kategori di-dictionary-encode.
+- Reader hanya membaca partisi tanggal & kolom yang dibutuhkan.
+- File kecil di satu partisi digabung (compaction) otomatis.
+- Export CSV tetap tersedia untuk kompatibilitas (format sama dengan history_lab.csv).
+
+Butuh pyarrow. Jika tidak terinstall, HAS_PYARROW = False dan pemanggil harus fallback ke CSV.
+"""
+import glob
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+from core.csv_logger import FileLock
+from core.features import BASE_DIR, HISTORY_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+ARCHIVE_DIR = os.path.join(BASE_DIR, "archive", "lab_history")
+HISTORY_CSV = os.path.join(BASE_DIR, "history_lab.csv")
+
+DICTIONARY_COLUMNS = ["kategori", "bahan_baku", "warna", "bau", "tekstur", "prediksi"]
+FLOAT_COLUMNS = ["suhu", "lama_simpan", "ph", "risk_score"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+BOOTSTRAP_MARKER = "_bootstrapped"  # Ditulis setelah import awal history_lab.csv (sekali per arsip)
+
+
+def _schema():
+    fields = [pa.field("timestamp", pa.timestamp("s"))]
+    for col in HISTORY_COLUMNS[1:]:
+        if col in DICTIONARY_COLUMNS:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(col, pa.float64()))
+    return pa.schema(fields)
+
+
+def _to_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+class LabArchive:
+    def __init__(self, root=ARCHIVE_DIR, compact_min_files=16, compact_small_bytes=1_000_000):
+        if not HAS_PYARROW:
+            raise ImportError("pyarrow belum terinstall (pip install pyarrow)")
+        self.root = root
+        self.compact_min_files = compact_min_files      # Compaction jika file kecil >= N
+        self.compact_small_bytes = compact_small_bytes  # File < ukuran ini dianggap "kecil"
+        self.schema = _schema()
+        os.makedirs(self.root, exist_ok=True)
+        # Lock antar-proses untuk write/compaction (reader juga ikut supaya tidak baca setengah jalan)
+        self._lock = FileLock(os.path.join(self.root, "_archive"))
+        # Cache jumlah baris: file Parquet tidak pernah diubah setelah ditulis (hanya dibuat / dihapus),
+        # dan mtime folder partisi berubah setiap ada file masuk/keluar
+        self._count_lock = threading.Lock()
+        self._file_rows = {}       # path file -> num_rows dari footer
+        self._partition_rows = {}  # path partisi -> (mtime_ns folder, total baris)
+
+    # --- Tulis ---
+    def _build_table(self, rows):
+        columns = {}
+        timestamps = pa.array([str(r["timestamp"]) for r in rows], type=pa.string())
+        columns["timestamp"] = pc.strptime(timestamps, format=TIMESTAMP_FORMAT, unit="s")
+        for col in HISTORY_COLUMNS[1:]:
+            values = [r.get(col) for r in rows]
+            if col in DICTIONARY_COLUMNS:
+                arr = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+                columns[col] = arr.dictionary_encode()
+            else:
+                columns[col] = pa.array([None if v is None else float(v) for v in values], type=pa.float64())
+        return pa.Table.from_pydict(columns, schema=self.schema)
+
+    def append(self, rows):
+        """Tulis list of dict (format baris history_lab.csv) ke partisi tanggal masing-masing."""
+        if not rows:
+            return
+        with self._lock:
+            self._append(rows)
+
+    def _append(self, rows):
+        # Dipanggil dengan lock dipegang
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(str(row["timestamp"])[:10], []).append(row)
+        for day, day_rows in by_day.items():
+            partition = self._partition_dir(day)
+            os.makedirs(partition, exist_ok=True)
+            name = f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+            self._write_atomic(self._build_table(day_rows), os.path.join(partition, name))
+            if len(self._small_files(partition)) >= self.compact_min_files:
+                self._compact_partition(partition)
+
+    def _write_atomic(self, table, path):
+        tmp = path + ".tmp"
+        pq.write_table(table, tmp, compression="snappy")
+        os.replace(tmp, path)
+
+    def _partition_dir(self, day):
+        return os.path.join(self.root, f"date={day}")
+
+    # --- Compaction ---
+    def _small_files(self, partition):
+        files = glob.glob(os.path.join(partition, "*.parquet"))
+        return [f for f in files if os.path.getsize(f) < self.compact_small_bytes]
+
+    def _compact_partition(self, partition):
+        files = sorted(self._small_files(partition))
+        if len(files) < 2:
+            return 0
+        table = pa.concat_tables([pq.read_table(f, schema=self.schema) for f in files]).combine_chunks()
+        table = table.sort_by("timestamp")
+        name = f"compact-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        self._write_atomic(table, os.path.join(partition, name))
+        for f in files:
+            os.remove(f)
+        return len(files)
+
+    def compact(self):
+        """Gabungkan file kecil di semua partisi. Return jumlah file yang digabung."""
+        with self._lock:
+            return self._compact_all()
+
+    def _compact_all(self):
+        return sum(self._compact_partition(partition) for partition in self._partitions())
+
+    # --- Baca ---
+    def _partitions(self, start=None, end=None):
+        start, end = _to_date(start), _to_date(end)
+        result = []
+        for path in sorted(glob.glob(os.path.join(self.root, "date=*"))):
+            day = _to_date(os.path.basename(path)[5:])
+            if (start and day < start) or (end and day > end):
+                continue  # Partition pruning: folder tanggal di luar rentang tidak dibuka
+            result.append(path)
+        return result
+
+    def _files(self, start=None, end=None):
+        files = []
+        for partition in self._partitions(start, end):
+            files.extend(sorted(glob.glob(os.path.join(partition, "*.parquet"))))
+        return files
+
+    def read(self, columns=None, start=None, end=None):
+        """
+        Baca sebagai DataFrame. columns=None berarti semua kolom.
+        start/end (tanggal, inklusif) membatasi partisi yang dibaca.
+        """
+        columns = list(columns) if columns else list(HISTORY_COLUMNS)
+        with self._lock:
+            files = self._files(start, end)
+            tables = [pq.read_table(f, columns=columns, schema=self.schema) for f in files]
+
+        if not tables:
+            return self.schema.empty_table().select(columns).to_pandas()
+        return pa.concat_tables(tables).to_pandas()
+
+    def count_rows(self, start=None, end=None):
+        """
+        Jumlah baris dari metadata footer Parquet saja (tanpa membaca data). Tanpa file lock:
+        partisi yang foldernya tidak berubah sejak panggilan terakhir dijawab dari cache (cukup 1x stat),
+        dan footer hanya dibuka untuk file yang baru muncul.
+        """
+        with self._count_lock:
+            return sum(self._partition_count(p) for p in self._partitions(start, end))
+
+    def _partition_count(self, partition):
+        mtime = os.stat(partition).st_mtime_ns  # Diambil sebelum listing: perubahan selama listing terdeteksi nanti
+        cached = self._partition_rows.get(partition)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        files = set(glob.glob(os.path.join(partition, "*.parquet")))
+        total = 0
+        for f in files:
+            n = self._file_rows.get(f)
+            if n is None:
+                try:
+                    n = self._file_rows[f] = pq.ParquetFile(f).metadata.num_rows
+                except FileNotFoundError:
+                    continue  # Baru saja digabung oleh compaction proses lain
+            total += n
+        for f in [f for f in self._file_rows if os.path.dirname(f) == partition and f not in files]:
+            del self._file_rows[f]
+        self._partition_rows[partition] = (mtime, total)
+        return total
+
+    def is_empty(self):
+        return not self._files()
+
+    # --- Kompatibilitas CSV ---
+    def export_csv(self, path=None, start=None, end=None):
+        """Export ke format history_lab.csv. Jika path None, return string CSV."""
+        df = self.read(start=start, end=end).sort_values("timestamp", kind="stable")
+        df["timestamp"] = df["timestamp"].dt.strftime(TIMESTAMP_FORMAT)
+        return df.to_csv(path, index=False) if path else df.to_csv(index=False)
+
+    def import_csv(self, csv_path=HISTORY_CSV, chunksize=100_000):
+        """Migrasi isi history_lab.csv lama ke arsip. Return jumlah baris."""
+        with self._lock:
+            return self._import_csv(csv_path, chunksize)
+
+    def _import_csv(self, csv_path, chunksize=100_000):
+        import pandas as pd
+
+        total = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            self._append(chunk.to_dict("records"))
+            total += len(chunk)
+        return total
+
+    def bootstrap(self, csv_path=HISTORY_CSV):
+        """
+        Import awal history_lab.csv ke arsip yang masih kosong, tepat sekali lintas proses:
+        cek kosong, import, dan penulisan marker terjadi di bawah file lock arsip.
+        Return jumlah baris yang diimport, atau None jika bootstrap sudah pernah dilakukan.
+        """
+        marker = os.path.join(self.root, BOOTSTRAP_MARKER)
+        with self._lock:
+            if os.path.exists(marker):
+                return None
+            n = 0
+            # Arsip yang sudah berisi (mis. dibuat sebelum ada marker) tidak diimport ulang
+            if not self._files() and csv_path and os.path.exists(csv_path):
+                n = self._import_csv(csv_path)
+                self._compact_all()
+            with open(marker, "w", encoding="utf-8") as f:
+                f.write(datetime.now().strftime(TIMESTAMP_FORMAT))
+            return n
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_lab_archive(bootstrap_csv=HISTORY_CSV):
+    """
+    Singleton arsip per proses. Saat pertama kali dipakai dan arsip masih kosong,
+    isi history_lab.csv lama diimport (sekali saja, lihat LabArchive.bootstrap) supaya data tidak terpotong.
+    Return None jika pyarrow tidak tersedia.
+    """
+    global _archive
+    if not HAS_PYARROW:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            archive = LabArchive()
+            n = archive.bootstrap(bootstrap_csv)
+            if n:
+                print(f"📦 {n} baris history_lab.csv diimport ke arsip kolumnar.")
+            _archive = archive
+        return _archive
+
+
+if __name__ == "__main__":
+    import sys
+
+    archive = get_lab_archive()
+    if archive is None:
+        print("❌ pyarrow belum terinstall.")
+    elif len(sys.argv) > 1 and sys.argv[1] == "compact":
+        print(f"🧹 {archive.compact()} file kecil digabung.")
+    elif len(sys.argv) > 2 and sys.argv[1] == "export":
+        archive.export_csv(sys.argv[2])
+        print(f"💾 Arsip diexport ke {sys.argv[2]}")
+    else:
+        print(f"📊 Total baris di arsip: {archive.count_rows()}")
+        print("Pemakaian: python -m core.lab_archive [compact | export <file.csv>]")
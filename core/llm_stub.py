@@ -0,0 +1,56 @@
+"""
+Model Gemini palsu untuk testing/benchmark offline (tanpa API key & jaringan).
+Interface sama dengan genai.GenerativeModel: generate_content(prompt) -> objek dengan .text,
+generate_content(prompt, stream=True) -> iterator chunk (masing-masing punya .text).
+"""
+import random
+import threading
+import time
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenerativeModel:
+    def __init__(self, responder=None, latency=0.0, error_rate=0.0, error_message="429 Quota exceeded (stub)", seed=None,
+                 chunk_size=40, chunk_delay=0.0, break_after_chunks=None):
+        self.responder = responder or (lambda prompt: "1")
+        self.latency = latency            # Detik per request (float) atau (min, max)
+        self.error_rate = error_rate      # Peluang request gagal dengan error_message
+        self.error_message = error_message
+        self.chunk_size = chunk_size      # Karakter per chunk saat stream=True
+        self.chunk_delay = chunk_delay    # Jeda antar chunk (detik)
+        self.break_after_chunks = break_after_chunks  # Simulasi koneksi putus di tengah stream
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _sleep(self):
+        if isinstance(self.latency, tuple):
+            with self._lock:
+                delay = self._random.uniform(*self.latency)
+        else:
+            delay = self.latency
+        if delay:
+            time.sleep(delay)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+        self._sleep()
+        if fail:
+            raise Exception(self.error_message)
+        if stream:
+            return self._stream(self.responder(prompt))
+        return StubResponse(self.responder(prompt))
+
+    def _stream(self, text):
+        for i, start in enumerate(range(0, len(text), self.chunk_size)):
+            if self.break_after_chunks is not None and i >= self.break_after_chunks:
+                raise Exception("503 Stream terputus (stub)")
+            if i and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield StubResponse(text[start:start + self.chunk_size])
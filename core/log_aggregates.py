@@ -0,0 +1,350 @@
+"""
+Agregasi inkremental untuk dashboard admin.
+
+Setiap aggregator mengingat byte offset terakhir yang sudah dibaca dari file CSV,
+lalu hanya mem-parse baris yang baru di-append. Hasil agregat (counter, sum/count,
+bucket per jam, sketch HyperLogLog) disimpan ke file JSON berukuran tetap/kecil sehingga
+refresh cukup O(baris baru), bahkan setelah dashboard di-restart.
+"""
+import base64
+import csv
+import hashlib
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import Counter
+
+READ_BLOCK_BYTES = 32 * 1024 * 1024
+
+
+class TailAggregator:
+    def __init__(self, csv_path, state_path):
+        self.csv_path = csv_path
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self.offset = 0
+        self.header = None
+        self.file_id = None
+        self.rows_seen = 0
+        self.reset_aggregates()
+        self._load_state()
+
+    # --- Diimplementasikan subclass ---
+    def reset_aggregates(self):
+        raise NotImplementedError
+
+    def update(self, row):
+        raise NotImplementedError
+
+    def dump_aggregates(self):
+        raise NotImplementedError
+
+    def load_aggregates(self, data):
+        raise NotImplementedError
+
+    # --- State persisten ---
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.offset = state["offset"]
+            self.header = state["header"]
+            self.file_id = state["file_id"]
+            self.rows_seen = state["rows_seen"]
+            self.load_aggregates(state["aggregates"])
+        except Exception as e:
+            print(f"⚠️ State agregat rusak, dihitung ulang dari awal: {e}")
+            self._reset()
+
+    def _save_state(self):
+        state = {
+            "offset": self.offset,
+            "header": self.header,
+            "file_id": self.file_id,
+            "rows_seen": self.rows_seen,
+            "aggregates": self.dump_aggregates(),
+        }
+        # Nama file sementara unik: beberapa proses dashboard bisa menyimpan state yang sama bersamaan
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.state_path)),
+                                   prefix=os.path.basename(self.state_path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.state_path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def _reset(self):
+        self.offset = 0
+        self.header = None
+        self.file_id = None
+        self.rows_seen = 0
+        self.reset_aggregates()
+
+    # --- Baca bagian file yang baru ---
+    def _consume(self, chunk):
+        reader = csv.reader(io.StringIO(chunk.decode("utf-8")))
+        if self.header is None:
+            self.header = next(reader, None)
+        n_new = 0
+        for values in reader:
+            if not values or values == self.header:
+                continue
+            self.update(dict(zip(self.header, values)))
+            n_new += 1
+        return n_new
+
+    def refresh(self):
+        """Parse hanya baris yang di-append sejak refresh terakhir. Return jumlah baris baru."""
+        with self._lock:
+            if not os.path.exists(self.csv_path):
+                return 0
+
+            st = os.stat(self.csv_path)
+            # File dirotasi / ditimpa: ukuran mengecil atau inode berubah -> hitung ulang
+            if st.st_size < self.offset or (self.file_id is not None and self.file_id != st.st_ino):
+                self._reset()
+            if st.st_size == self.offset:
+                return 0
+
+            # Dibaca per blok: file besar (jutaan baris) tidak perlu dimuat ke memori sekaligus
+            n_new = 0
+            carry = b""
+            with open(self.csv_path, "rb") as f:
+                f.seek(self.offset)
+                remaining = st.st_size - self.offset
+                while remaining > 0:
+                    block = f.read(min(READ_BLOCK_BYTES, remaining))
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    data = carry + block
+                    # Hanya proses sampai newline terakhir (baris terakhir mungkin belum selesai ditulis)
+                    end = data.rfind(b"\n")
+                    if end < 0:
+                        carry = data
+                        continue
+                    carry = data[end + 1:]
+                    n_new += self._consume(data[:end + 1])
+                    self.offset += end + 1
+
+            self.file_id = st.st_ino
+            self.rows_seen += n_new
+            self._save_state()
+            return n_new
+
+
+def _hour_bucket(timestamp):
+    # "2025-12-04 22:02:10" -> "2025-12-04 22:00" (tanpa parsing datetime)
+    return timestamp[:13] + ":00"
+
+
+class LabAggregator(TailAggregator):
+    """Agregat history_lab.csv: status, risk per kategori, bucket per jam, bahan terpopuler."""
+
+    def reset_aggregates(self):
+        self.status_counts = Counter()
+        self.category_risk = {}  # kategori -> [jumlah risk_score, count]
+        self.hourly = Counter()
+        self.ingredient_counts = Counter()
+
+    def update(self, row):
+        self.status_counts[row["prediksi"]] += 1
+        try:
+            risk = float(row["risk_score"])
+            acc = self.category_risk.setdefault(row["kategori"], [0.0, 0])
+            acc[0] += risk
+            acc[1] += 1
+        except (TypeError, ValueError):
+            pass
+        self.hourly[_hour_bucket(row["timestamp"])] += 1
+        self.ingredient_counts[row["bahan_baku"]] += 1
+
+    def dump_aggregates(self):
+        return {
+            "status_counts": self.status_counts,
+            "category_risk": self.category_risk,
+            "hourly": self.hourly,
+            "ingredient_counts": self.ingredient_counts,
+        }
+
+    def load_aggregates(self, data):
+        self.status_counts = Counter(data["status_counts"])
+        self.category_risk = data["category_risk"]
+        self.hourly = Counter(data["hourly"])
+        self.ingredient_counts = Counter(data["ingredient_counts"])
+
+    def category_mean_risk(self):
+        return {k: s / c for k, (s, c) in self.category_risk.items() if c}
+
+
+class HyperLogLog:
+    """
+    Estimasi jumlah nilai unik dengan memori tetap (2^precision byte). Error standar ~1.04/sqrt(2^p):
+    ~1.6% untuk p=12; di bawah ~10 ribu nilai unik memakai linear counting (hampir eksak).
+    """
+
+    def __init__(self, precision=12, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = self.m
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(estimate)
+
+    def dump(self):
+        return {"precision": self.precision, "registers": base64.b64encode(bytes(self.registers)).decode("ascii")}
+
+    @classmethod
+    def load(cls, data):
+        return cls(data["precision"], base64.b64decode(data["registers"]))
+
+
+class AccessAggregator(TailAggregator):
+    """Agregat access_log.csv: total hit, estimasi session unik (HyperLogLog), hit per jam."""
+
+    def reset_aggregates(self):
+        self.total_hits = 0
+        self.sessions = HyperLogLog()
+        self.hourly = Counter()
+
+    def update(self, row):
+        self.total_hits += 1
+        self.sessions.add(row["session_id"])
+        self.hourly[_hour_bucket(row["timestamp"])] += 1
+
+    def dump_aggregates(self):
+        # Sketch berukuran tetap: menyimpan state tidak ikut membesar seiring jumlah session
+        return {"total_hits": self.total_hits, "sessions_hll": self.sessions.dump(), "hourly": self.hourly}
+
+    def load_aggregates(self, data):
+        self.total_hits = data["total_hits"]
+        self.sessions = HyperLogLog.load(data["sessions_hll"])
+        self.hourly = Counter(data["hourly"])
+
+    def unique_sessions(self):
+        return self.sessions.count()
+
+
+# Histogram durasi dengan bucket logaritmik (~12% lebar per bucket): percentile bisa dihitung dari
+# agregat yang dipersist, tanpa menyimpan setiap nilai durasi.
+HIST_MIN_MS = 0.001
+HIST_RATIO = 10 ** (1 / 20)
+
+
+def _duration_bucket(ms):
+    if ms <= HIST_MIN_MS:
+        return "0"
+    return str(int(math.log(ms / HIST_MIN_MS) / math.log(HIST_RATIO)))
+
+
+def hist_percentile(hist, q):
+    """Perkiraan percentile q (0-100) dalam ms dari histogram {bucket: count} (nilai tengah geometris bucket)."""
+    total = sum(hist.values())
+    if not total:
+        return None
+    target = q / 100 * total
+    cumulative = 0
+    for bucket in sorted(hist, key=int):
+        cumulative += hist[bucket]
+        if cumulative >= target:
+            return HIST_MIN_MS * HIST_RATIO ** (int(bucket) + 0.5)
+    return HIST_MIN_MS * HIST_RATIO ** (int(max(hist, key=int)) + 0.5)
+
+
+class MetricsAggregator(TailAggregator):
+    """Agregat csv/metrics.csv (core.metrics): histogram durasi & status per tahap, total dan per jam."""
+
+    def reset_aggregates(self):
+        self.stages = {}  # stage -> {"hist": Counter, "status": Counter, "labels": Counter}
+        self.hourly = {}  # "jam|stage" -> {"hist": Counter, "status": Counter}
+
+    def update(self, row):
+        try:
+            bucket = _duration_bucket(float(row["duration_ms"]))
+        except (TypeError, ValueError):
+            return
+        stage = self.stages.setdefault(row["stage"], {"hist": Counter(), "status": Counter(), "labels": Counter()})
+        stage["hist"][bucket] += 1
+        stage["status"][row["status"]] += 1
+        stage["labels"][row["label"]] += 1
+        hour = self.hourly.setdefault(f"{_hour_bucket(row['timestamp'])}|{row['stage']}",
+                                      {"hist": Counter(), "status": Counter()})
+        hour["hist"][bucket] += 1
+        hour["status"][row["status"]] += 1
+
+    def dump_aggregates(self):
+        return {"stages": self.stages, "hourly": self.hourly}
+
+    def load_aggregates(self, data):
+        self.stages = {k: {name: Counter(c) for name, c in v.items()} for k, v in data["stages"].items()}
+        self.hourly = {k: {name: Counter(c) for name, c in v.items()} for k, v in data["hourly"].items()}
+
+    def summary(self, percentiles=(50, 95, 99)):
+        """Baris per tahap: jumlah, percentile durasi (ms), rasio fallback & error."""
+        rows = []
+        for name, stage in sorted(self.stages.items()):
+            count = sum(stage["status"].values())
+            row = {"stage": name, "count": count}
+            for q in percentiles:
+                row[f"p{q}_ms"] = hist_percentile(stage["hist"], q)
+            row["fallback_rate"] = stage["status"]["fallback"] / count if count else 0.0
+            row["error_rate"] = stage["status"]["error"] / count if count else 0.0
+            rows.append(row)
+        return rows
+
+    def hourly_rows(self, percentiles=(50, 95, 99)):
+        """Baris per (jam, tahap) dengan percentile & rasio status, untuk grafik tren."""
+        rows = []
+        for key, bucket in self.hourly.items():
+            hour, name = key.split("|", 1)
+            count = sum(bucket["status"].values())
+            row = {"hour": hour, "stage": name, "count": count}
+            for q in percentiles:
+                row[f"p{q}_ms"] = hist_percentile(bucket["hist"], q)
+            row["fallback_rate"] = bucket["status"]["fallback"] / count if count else 0.0
+            row["error_rate"] = bucket["status"]["error"] / count if count else 0.0
+            rows.append(row)
+        return sorted(rows, key=lambda r: (r["hour"], r["stage"]))
+
+
+def read_tail_rows(csv_path, n_rows=1000, block_size=65536):
+    """Baca N baris terakhir CSV (plus header) tanpa membaca seluruh file. Return (header, rows)."""
+    if not os.path.exists(csv_path):
+        return None, []
+    with open(csv_path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]), None)
+        header_end = f.tell()
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > header_end and data.count(b"\n") <= n_rows:
+            step = min(block_size, pos - header_end)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+
+    lines = data.splitlines()
+    if pos > header_end:
+        lines = lines[1:]  # Baris pertama blok mungkin terpotong
+    rows = [r for r in csv.reader(l.decode("utf-8") for l in lines[-n_rows:]) if r and r != header]
+    return header, rows
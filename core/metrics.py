@@ -0,0 +1,54 @@
+"""
+Timing span per tahap request (model load, dataset load, predict, log, LLM pH, penjelasan).
+
+Setiap span hanya di-enqueue ke BackgroundCSVWriter (csv/metrics.csv); penulisan batch dilakukan
+writer thread, jadi overhead di jalur request hanya ~20 µs per span. Diringkas oleh
+core.log_aggregates.MetricsAggregator untuk tab Performance di dashboard admin.
+
+    with span("predict", label="CompiledForest") as s:
+        ...
+        s.label += " memo=hit"   # label/status boleh diubah sebelum span selesai
+
+Status: "ok", "fallback" (berhasil lewat jalur cadangan), "error" (exception / gagal).
+"""
+import os
+import time
+from datetime import datetime
+
+from core.csv_logger import get_writer
+from core.features import BASE_DIR
+
+METRICS_PATH = os.path.join(BASE_DIR, "csv", "metrics.csv")
+METRIC_COLUMNS = ["timestamp", "stage", "duration_ms", "status", "label"]
+
+
+def metrics_writer():
+    return get_writer(METRICS_PATH, METRIC_COLUMNS, batch_size=500, flush_interval=1.0)
+
+
+def record(stage, seconds, status="ok", label=""):
+    metrics_writer().write({
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "stage": stage,
+        "duration_ms": f"{seconds * 1000:.3f}",
+        "status": status,
+        "label": label,
+    })
+
+
+class span:
+    def __init__(self, stage, label="", status="ok"):
+        self.stage = stage
+        self.label = label
+        self.status = status
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.status = "error"
+        record(self.stage, time.perf_counter() - self.start, self.status, self.label)
+        return False  # Exception tetap diteruskan
@@ -0,0 +1,275 @@
+"""
+Model prediksi per proses (ModelHolder): load dari registry atau model.pkl, reload otomatis saat
+versi berubah, dan pemilihan engine (student / compiled / pipeline sklearn) sesuai ukuran input.
+"""
+import hashlib
+import io
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from core.features import BASE_DIR, WARMUP_SAMPLE, to_frame
+
+MODEL_PATH = os.path.join(BASE_DIR, "model.pkl")
+REGISTRY_DIR = os.path.join(BASE_DIR, "model_registry")
+COMPILED_CACHE_DIR = os.path.join(BASE_DIR, "model_compiled")  # Sama dengan core.compiled_model.COMPILED_DIR
+# Engine array menelusuri pohon per sampel: unggul untuk input kecil, tapi di atas ~500 baris
+# pipeline sklearn (loop per pohon di C) lebih cepat, mis. 5000 baris: 163 ms vs 39 ms.
+COMPILED_MAX_ROWS = 512
+
+
+class ModelHolder:
+    """
+    Menyimpan pipeline model SEKALI per proses dan dipakai bersama oleh semua sesi Streamlit.
+
+    Sumber utama: registry (core.model_registry). Pointer CURRENT dipantau; array compiled versi aktif
+    di-load dengan mmap (page dibagi antar proses) dan pipeline sklearn baru di-unpickle jika get() dipanggil.
+    Jika versi aktif punya student hasil distilasi (core.distill), get_fast() memakai student dengan
+    fallback ke forest untuk prediksi ber-confidence rendah.
+    Jika registry belum ada / gagal dibaca, fallback ke model.pkl: di-load ulang jika file berubah
+    (mtime/size berubah DAN isi hash berbeda). Array compiled model.pkl di-cache di model_compiled/
+    (dikunci hash isi file), jadi cold start berikutnya tidak perlu unpickle (import sklearn/scipy).
+    """
+
+    def __init__(self, path=MODEL_PATH, registry_dir=REGISTRY_DIR, use_student=True, compiled_dir=COMPILED_CACHE_DIR):
+        self.path = path
+        self.registry_dir = registry_dir
+        self.compiled_dir = compiled_dir
+        self.use_student = use_student
+        self._lock = threading.Lock()
+        self._model = None
+        self._compiled = None     # Versi array (core.compiled_model), None jika tidak didukung
+        self._distilled = None    # Student + fallback forest (core.distill), None jika tidak ada
+        self._fingerprint = None  # (sumber, inode, mtime_ns, size) pointer/file saat terakhir dicek
+        self._pipeline_path = None  # Pipeline sklearn, di-unpickle saat pertama dibutuhkan (get())
+        self.source = None        # "registry" atau "file"
+        self.version = None       # Nama versi registry, atau hash isi model.pkl (12 karakter sha256)
+        self.loaded_at = None
+        self.load_seconds = None
+        self.load_count = 0
+        self.last_error = None
+
+    def _stat(self):
+        if self.registry_dir:
+            try:
+                st = os.stat(os.path.join(self.registry_dir, "CURRENT"))
+                return ("registry", st.st_ino, st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                pass
+        st = os.stat(self.path)
+        return ("file", st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        fingerprint = self._stat()
+        if self.version is not None and fingerprint == self._fingerprint:
+            return  # Jalur cepat: cukup 1x os.stat per rerun
+
+        with self._lock:
+            # Cek ulang di dalam lock (sesi lain mungkin sudah me-reload)
+            if self.version is None or fingerprint != self._fingerprint:
+                if fingerprint[0] == "registry" and self._load_registry(fingerprint):
+                    return
+                self._reload(fingerprint)
+
+    def get(self):
+        self._refresh()
+        if self._model is None:
+            import joblib  # Import sklearn (via unpickle) hanya jika pipeline benar-benar dibutuhkan
+
+            with self._lock:
+                if self._model is None:
+                    self._model = joblib.load(self._pipeline_path)
+        return self._model
+
+    def _load_registry(self, fingerprint):
+        from core.model_registry import ModelRegistry
+
+        registry = ModelRegistry(self.registry_dir)
+        start = time.perf_counter()
+        try:
+            name = registry.current()
+            if name == self.version and self.source == "registry":
+                self._fingerprint = fingerprint
+                return True
+            compiled = registry.load_compiled(name, mmap_mode="r")
+            # Verifikasi array terhadap output pipeline yang dicatat saat publish (tanpa unpickle)
+            expected = np.array(registry.metadata(name)["warmup_proba"])
+            if not np.array_equal(compiled.predict_proba(WARMUP_SAMPLE), expected):
+                raise ValueError("hasil compiled berbeda dengan metadata publish")
+            distilled = self._load_student(registry.version_dir(name), compiled)
+        except Exception as e:
+            self.last_error = f"registry: {e}"
+            print(f"⚠️ Gagal load model dari registry, fallback ke {os.path.basename(self.path)}: {e}")
+            return False
+
+        self._model = None
+        self._compiled = compiled
+        self._distilled = distilled
+        self._pipeline_path = registry.pipeline_path(name)
+        self._fingerprint = fingerprint
+        self.source = "registry"
+        self.version = name
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - start
+        self.load_count += 1
+        self.last_error = None
+        return True
+
+    def _load_student(self, version_dir, compiled):
+        from core.distill import DistilledModel, load_student
+
+        if not self.use_student:
+            return None
+        try:
+            student = load_student(version_dir)
+            if student is None:
+                return None
+            if not np.array_equal(student.predict_proba(WARMUP_SAMPLE), np.array(student.meta["warmup_proba"])):
+                raise ValueError("hasil student berbeda dengan metadata distilasi")
+        except Exception as e:
+            print(f"⚠️ Student tidak dipakai, prediksi memakai forest penuh: {e}")
+            return None
+        return DistilledModel(student, compiled, student.leaf_confidence, student.meta["min_confidence"])
+
+    def _reload(self, fingerprint):
+        start = time.perf_counter()
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()[:12]
+
+        # File hanya di-touch (mtime berubah tapi isi sama) -> tidak perlu unpickle
+        if self.source == "file" and digest == self.version:
+            self._fingerprint = fingerprint
+            return
+
+        cached = self._load_cached(digest)
+        if cached is not None:
+            self._set_file_model(None, cached, digest, fingerprint, start)
+            return
+
+        try:
+            import joblib
+
+            model = joblib.load(io.BytesIO(raw))
+            # Prediksi pertama selalu lebih lambat, bayar di sini bukan oleh user pertama.
+            # Hasilnya sekaligus jadi acuan verifikasi array compiled (_compile).
+            expected = model.predict_proba(to_frame(WARMUP_SAMPLE))
+        except Exception as e:
+            # File mungkin sedang ditulis trainer (torn read). Pakai model lama jika ada.
+            self.last_error = str(e)
+            if self.version is None:
+                raise
+            print(f"⚠️ Gagal reload model, tetap pakai versi {self.version}: {e}")
+            return
+
+        compiled = self._compile(model, digest, expected)
+        if compiled is not None:
+            self._save_cached(compiled)
+        self._set_file_model(model, compiled, digest, fingerprint, start)
+
+    def _set_file_model(self, model, compiled, digest, fingerprint, start):
+        self._model = model
+        self._compiled = compiled
+        self._distilled = None
+        self._pipeline_path = self.path
+        self._fingerprint = fingerprint
+        self.source = "file"
+        self.version = digest
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - start
+        self.load_count += 1
+        self.last_error = None
+
+    def _load_cached(self, digest):
+        """Array compiled hasil load sebelumnya untuk isi model.pkl yang sama, atau None."""
+        from core.compiled_model import CompiledForest
+
+        if not self.compiled_dir or not os.path.exists(os.path.join(self.compiled_dir, "meta.json")):
+            return None
+        try:
+            compiled = CompiledForest.load(self.compiled_dir, mmap_mode="r")
+            if compiled.meta.get("source_version") != digest or "warmup_proba" not in compiled.meta:
+                return None
+            if not np.array_equal(compiled.predict_proba(WARMUP_SAMPLE), np.array(compiled.meta["warmup_proba"])):
+                raise ValueError("hasil compiled berbeda dengan metadata cache")
+            return compiled
+        except Exception as e:
+            print(f"⚠️ Cache compiled tidak dipakai, model.pkl di-load ulang: {e}")
+            return None
+
+    def _save_cached(self, compiled):
+        # Ditulis ke direktori sementara lalu di-rename, supaya proses lain tidak membaca cache setengah jadi
+        if not self.compiled_dir:
+            return
+        staging = f"{self.compiled_dir}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            compiled.save(staging)
+            if os.path.isdir(self.compiled_dir):
+                old = staging + ".old"
+                os.rename(self.compiled_dir, old)
+                os.rename(staging, self.compiled_dir)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.rename(staging, self.compiled_dir)
+        except OSError as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            print(f"⚠️ Cache compiled tidak bisa disimpan: {e}")
+
+    def _compile(self, model, digest, expected):
+        from core.compiled_model import compile_pipeline
+
+        try:
+            compiled = compile_pipeline(model, meta={"source_version": digest, "warmup_proba": expected.tolist()})
+            # Pengaman: hanya dipakai jika hasilnya identik dengan pipeline asli
+            if not np.array_equal(compiled.predict_proba(WARMUP_SAMPLE), expected):
+                raise ValueError("hasil compiled berbeda dengan pipeline")
+            return compiled
+        except Exception as e:
+            print(f"⚠️ Compiled engine tidak dipakai, fallback ke pipeline sklearn: {e}")
+            return None
+
+    def get_fast(self):
+        """Model tercepat yang tersedia: student (+ fallback forest), compiled, lalu pipeline sklearn."""
+        self._refresh()
+        fast = self._distilled if self._distilled is not None else self._compiled
+        return fast if fast is not None else self.get()
+
+    def get_for_rows(self, n_rows):
+        """Model untuk n_rows baris: get_fast() untuk input kecil, pipeline sklearn untuk batch besar."""
+        return self.get_fast() if n_rows <= COMPILED_MAX_ROWS else self.get()
+
+    def info(self):
+        return {
+            "path": self.path,
+            "source": self.source,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "load_count": self.load_count,
+            "compiled": self._compiled is not None,
+            "student": self._distilled.stats() if self._distilled is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+# Singleton per proses (module Python hanya diimport sekali, meski script Streamlit di-rerun)
+_holder = ModelHolder()
+
+
+def get_model():
+    return _holder.get()
+
+
+def get_fast_model():
+    return _holder.get_fast()
+
+
+def get_model_for_rows(n_rows):
+    return _holder.get_for_rows(n_rows)
+
+
+def get_holder():
+    return _holder
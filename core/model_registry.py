@@ -0,0 +1,229 @@
+"""
+Registry model berversi dengan publish atomik:
+
+    model_registry/
+        versions/v0001/
+            model.pkl         <- pipeline sklearn (untuk retrain incremental / fallback)
+            compiled/*.npy    <- array CompiledForest, di-load dengan mmap oleh app
+            student/*.npy     <- pohon hasil distilasi (core.distill), dipakai app jika ada
+            metadata.json     <- metrik, versi dataset, waktu training, hasil warm-up
+        CURRENT               <- nama versi aktif (ditulis ke file tmp lalu os.replace)
+        history.json          <- urutan versi yang pernah diaktifkan (untuk rollback)
+
+Versi baru disiapkan di direktori sementara lalu di-rename (atomik), baru kemudian pointer CURRENT
+ditukar, jadi pembaca tidak pernah melihat artefak setengah jadi. Array compiled dibaca via
+np.load(mmap_mode="r"): beberapa proses Streamlit berbagi page cache yang sama, tanpa salinan
+hasil unpickle per proses.
+
+CLI:
+    python -m core.model_registry list
+    python -m core.model_registry publish [path/model.pkl]
+    python -m core.model_registry activate v0003
+    python -m core.model_registry rollback
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from core.csv_logger import FileLock
+from core.features import BASE_DIR, WARMUP_SAMPLE, to_frame
+
+REGISTRY_DIR = os.path.join(BASE_DIR, "model_registry")
+CURRENT_FILE = "CURRENT"
+
+
+def atomic_dump(obj, path):
+    """joblib.dump ke file sementara lalu os.replace, supaya pembaca tidak pernah membaca file setengah tertulis."""
+    import joblib
+
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.pointer_path = os.path.join(root, CURRENT_FILE)
+        self.history_path = os.path.join(root, "history.json")
+
+    def _lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        return FileLock(os.path.join(self.root, "_registry"))
+
+    # --- Info ---
+    def version_dir(self, name):
+        return os.path.join(self.versions_dir, name)
+
+    def pipeline_path(self, name):
+        return os.path.join(self.version_dir(name), "model.pkl")
+
+    def current(self):
+        try:
+            with open(self.pointer_path, encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def metadata(self, name):
+        with open(os.path.join(self.version_dir(name), "metadata.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(n for n in os.listdir(self.versions_dir) if n.startswith("v"))
+
+    def _history(self):
+        if not os.path.exists(self.history_path):
+            return []
+        with open(self.history_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    # --- Load ---
+    def load_compiled(self, name=None, mmap_mode="r"):
+        from core.compiled_model import CompiledForest
+
+        name = name or self.current()
+        return CompiledForest.load(os.path.join(self.version_dir(name), "compiled"), mmap_mode=mmap_mode)
+
+    def load_pipeline(self, name=None):
+        import joblib
+
+        return joblib.load(self.pipeline_path(name or self.current()))
+
+    # --- Publish ---
+    def publish(self, pipeline, metrics=None, data_version=None, training_seconds=None, source="", activate=True,
+                distill=True, df_labeled=None):
+        """
+        Simpan pipeline sebagai versi baru (pkl + array compiled + student + metadata), lalu aktifkan.
+        df_labeled: dataset berlabel untuk laporan akurasi student (default: versi terbaru dataset store).
+        Return nama versi.
+        """
+        from core.compiled_model import compile_pipeline
+
+        expected = pipeline.predict_proba(to_frame(WARMUP_SAMPLE))
+        compiled = compile_pipeline(pipeline)
+        if not np.array_equal(compiled.predict_proba(WARMUP_SAMPLE), expected):
+            raise ValueError("Hasil compiled berbeda dengan pipeline, publish dibatalkan")
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = os.path.join(self.versions_dir, f".staging-{uuid.uuid4().hex[:8]}")
+        os.makedirs(staging)
+        try:
+            atomic_dump(pipeline, os.path.join(staging, "model.pkl"))
+            compiled.save(os.path.join(staging, "compiled"))
+            with open(os.path.join(staging, "model.pkl"), "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            student_report = self._distill(pipeline, compiled, staging, df_labeled) if distill else None
+
+            with self._lock():
+                existing = self.list_versions()
+                name = f"v{(int(existing[-1][1:]) if existing else 0) + 1:04d}"
+                metadata = {
+                    "version": name,
+                    "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "source": source,
+                    "metrics": metrics or {},
+                    "data_version": data_version,
+                    "training_seconds": training_seconds,
+                    "n_trees": compiled.n_trees,
+                    "n_nodes": int(len(compiled.feature)),
+                    "model_sha256": digest,
+                    "previous": self.current(),
+                    # Dipakai reader untuk verifikasi array tanpa perlu unpickle pipeline
+                    "warmup_proba": expected.tolist(),
+                    "student": student_report,
+                }
+                with open(os.path.join(staging, "metadata.json"), "w", encoding="utf-8") as f:
+                    json.dump(metadata, f, indent=1)
+                os.rename(staging, self.version_dir(name))
+                if activate:
+                    self._activate(name)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return name
+
+    @staticmethod
+    def _distill(pipeline, compiled, version_dir, df_labeled):
+        # Student gagal dibuat bukan alasan membatalkan publish: app tetap memakai forest penuh
+        from core.distill import distill, save_student
+
+        try:
+            student, report = distill(pipeline, compiled, df_labeled)
+            save_student(student, version_dir)
+        except Exception as e:
+            print(f"⚠️ Distilasi student gagal, versi ini hanya berisi forest penuh: {e}")
+            return None
+        print(f"🌱 Student: agreement {report['agreement_served']:.2%} dengan forest (fallback {report['fallback_rate']:.1%} baris)")
+        return report
+
+    # --- Pointer ---
+    def _activate(self, name, record=True):
+        _write_atomic(self.pointer_path, name + "\n")
+        if record:
+            history = self._history() + [name]
+            _write_atomic(self.history_path, json.dumps(history, indent=1))
+
+    def activate(self, name):
+        if name not in self.list_versions():
+            raise LookupError(f"Versi model {name} tidak ada")
+        with self._lock():
+            self._activate(name)
+
+    def rollback(self):
+        """Aktifkan kembali versi sebelum versi aktif sekarang. Return nama versi yang aktif."""
+        with self._lock():
+            history = self._history()
+            if len(history) < 2:
+                raise LookupError("Tidak ada versi sebelumnya untuk rollback")
+            history.pop()
+            self._activate(history[-1], record=False)
+            _write_atomic(self.history_path, json.dumps(history, indent=1))
+            return history[-1]
+
+
+def main(argv):
+    registry = ModelRegistry()
+    command = argv[0] if argv else "list"
+    if command == "list":
+        current = registry.current()
+        for name in registry.list_versions():
+            meta = registry.metadata(name)
+            acc = meta["metrics"].get("accuracy")
+            student = meta.get("student")
+            student = f"student fallback {student['fallback_rate']:.0%}" if student else "tanpa student"
+            print(f"{'*' if name == current else ' '} {name}  {meta['created']}  data v{meta['data_version']}  "
+                  f"akurasi {acc if acc is None else f'{acc:.2%}'}  {meta['n_trees']} pohon  {student}  {meta['source']}")
+    elif command == "publish":
+        import joblib
+        from core.model_loader import MODEL_PATH
+
+        path = argv[1] if len(argv) > 1 else MODEL_PATH
+        print(f"🚀 Aktif: {registry.publish(joblib.load(path), source=f'import {os.path.basename(path)}')}")
+    elif command == "activate" and len(argv) > 1:
+        registry.activate(argv[1])
+        print(f"🚀 Aktif: {argv[1]}")
+    elif command == "rollback":
+        print(f"⏪ Rollback, aktif: {registry.rollback()}")
+    else:
+        print("Pemakaian: python -m core.model_registry [list | publish [model.pkl] | activate <versi> | rollback]")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,138 @@
+"""
+Resolver pH bertingkat sebelum fallback ke AI:
+
+1. dataset     : nama bahan persis ada di dataset_pangan.csv
+2. normalized  : sama setelah normalisasi (huruf kecil, aksen, spasi)
+3. base_name   : sama setelah kata kondisi (segar/busuk/basi/...) dibuang
+4. fuzzy       : mirip dengan nama bahan yang dikenal (difflib)
+5. ai_cache    : jawaban AI sebelumnya untuk nama yang sama (persist ke disk)
+6. llm         : tanya Gemini (paling lambat, hasilnya disimpan ke ai_cache)
+
+Setiap hasil melaporkan tier mana yang menjawab.
+"""
+import difflib
+import json
+import os
+import threading
+import unicodedata
+from collections import namedtuple
+
+from core.features import BASE_DIR
+
+AI_CACHE_PATH = os.path.join(BASE_DIR, "memory", "ph_ai_cache.json")
+
+# Kata kondisi/kualitas yang tidak mengubah identitas bahan
+QUALIFIERS = {"segar", "busuk", "basi", "mentah", "matang", "baru", "lama", "layu", "semalam",
+              "tiren", "berjamur", "retak", "baik", "rusak", "fresh"}
+# Varian "normal" yang diutamakan jika kondisi tidak disebut user
+FRESH_QUALIFIERS = {"segar", "baru", "mentah", "baik", "fresh"}
+
+PhResult = namedtuple("PhResult", ["value", "tier", "matched", "error"])
+
+
+def normalize_name(name):
+    """'  Ayam  MENTAH ' -> 'ayam mentah', 'Jalapeño' -> 'jalapeno'."""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().replace("-", " ").split())
+
+
+def split_qualifiers(normalized):
+    words = normalized.split()
+    base = " ".join(w for w in words if w not in QUALIFIERS)
+    return base or normalized, frozenset(w for w in words if w in QUALIFIERS)
+
+
+class PhResolver:
+    def __init__(self, ph_db, ai_cache_path=AI_CACHE_PATH, fuzzy_cutoff=0.8):
+        self.ph_db = dict(ph_db)
+        self.ai_cache_path = ai_cache_path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.Lock()
+
+        # Index: nama ternormalisasi -> nama asli, base name -> list (qualifier, nama asli)
+        self.normalized_index = {}
+        self.base_index = {}
+        for name in self.ph_db:
+            norm = normalize_name(name)
+            self.normalized_index.setdefault(norm, name)
+            base, quals = split_qualifiers(norm)
+            self.base_index.setdefault(base, []).append((quals, name))
+        self._base_names = list(self.base_index)
+        self._ai_cache = self._load_ai_cache()
+
+    # --- Cache jawaban AI ---
+    def _load_ai_cache(self):
+        if not self.ai_cache_path or not os.path.exists(self.ai_cache_path):
+            return {}
+        try:
+            with open(self.ai_cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_ai_answer(self, norm, value):
+        with self._lock:
+            self._ai_cache[norm] = value
+            if not self.ai_cache_path:
+                return
+            os.makedirs(os.path.dirname(self.ai_cache_path), exist_ok=True)
+            tmp = self.ai_cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._ai_cache, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.ai_cache_path)
+
+    # --- Resolusi ---
+    def _pick_variant(self, candidates, quals):
+        """Pilih varian dengan kondisi sama; jika tidak disebut, utamakan varian segar/baru."""
+        same = [name for q, name in candidates if q == quals]
+        if same:
+            return same[0]
+        if not quals:
+            fresh = [name for q, name in candidates if not q or q & FRESH_QUALIFIERS]
+            if fresh:
+                return fresh[0]
+        overlap = [name for q, name in candidates if q & quals]
+        return (overlap or [candidates[0][1]])[0]
+
+    def resolve_local(self, bahan):
+        """Tier tanpa jaringan (dataset, normalized, base_name, fuzzy, ai_cache). Return PhResult atau None."""
+        if not bahan:
+            return None
+        if bahan in self.ph_db:
+            return PhResult(round(self.ph_db[bahan], 1), "dataset", bahan, None)
+
+        norm = normalize_name(bahan)
+        if norm in self.normalized_index:
+            name = self.normalized_index[norm]
+            return PhResult(round(self.ph_db[name], 1), "normalized", name, None)
+
+        base, quals = split_qualifiers(norm)
+        if base in self.base_index:
+            name = self._pick_variant(self.base_index[base], quals)
+            return PhResult(round(self.ph_db[name], 1), "base_name", name, None)
+
+        close = difflib.get_close_matches(base, self._base_names, n=1, cutoff=self.fuzzy_cutoff)
+        if close:
+            name = self._pick_variant(self.base_index[close[0]], quals)
+            return PhResult(round(self.ph_db[name], 1), "fuzzy", name, None)
+
+        if norm in self._ai_cache:
+            return PhResult(self._ai_cache[norm], "ai_cache", norm, None)
+        return None
+
+    def resolve(self, bahan, llm_fn=None):
+        """
+        Resolusi lengkap. llm_fn(bahan) -> (ph, error) hanya dipanggil jika semua tier lokal gagal.
+        """
+        local = self.resolve_local(bahan)
+        if local is not None:
+            return local
+        if llm_fn is None:
+            return PhResult(None, None, None, "Bahan tidak dikenal dan AI tidak tersedia.")
+
+        value, error = llm_fn(bahan)
+        if value is None:
+            return PhResult(None, None, None, error)
+        self._save_ai_answer(normalize_name(bahan), value)
+        return PhResult(value, "llm", bahan, None)
@@ -0,0 +1,125 @@
+"""
+Memo LRU hasil prediksi per proses (dibagi semua sesi Streamlit / request server).
+
+Key = tuple 8 fitur kanonik (teks apa adanya, angka float, pH dibulatkan ke presisi slider 0.01).
+Pembulatan hanya dipakai untuk key: baris yang miss selalu diprediksi dari sampel aslinya, jadi
+input dari slider app dinilai persis seperti yang dikirim user (dan yang dicatat di history_lab.csv).
+Memo terikat ke versi model yang sedang di-load: begitu versi berubah
+(publish / rollback / model.pkl diganti), seluruh isi dibuang otomatis.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.features import CATEGORICAL_FEATURES
+from core.scoring import predict_with_risk
+
+PH_DECIMALS = 2  # Presisi slider pH di app.py (step default st.slider float = 0.01)
+
+
+def canonical_key(sample):
+    return (tuple(str(sample[c]) for c in CATEGORICAL_FEATURES)
+            + (float(sample["suhu"]), float(sample["lama_simpan"]), round(float(sample["ph"]), PH_DECIMALS)))
+
+
+class PredictionMemo:
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (prediksi, risk_score)
+        self._lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        # Dipanggil dengan lock dipegang
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def predict_with_risk(self, model, samples, version, counts=None):
+        """
+        Sama dengan core.scoring.predict_with_risk untuk list dict / DataFrame kecil, tapi sampel yang
+        pernah diprediksi (oleh versi model yang sama) diambil dari memo. Semua miss diprediksi dalam
+        satu batch. counts (dict, opsional) diisi jumlah hits/misses panggilan ini.
+        Return (array prediksi 0/1, array risk_score).
+        """
+        if hasattr(samples, "to_dict"):
+            samples = samples.to_dict("records")
+        keys = [canonical_key(s) for s in samples]
+        results = [None] * len(keys)
+        missing = {}  # key -> posisi baris (key duplikat dalam satu batch cukup diprediksi sekali, dihitung hit)
+
+        with self._lock:
+            self._check_version(version)
+            for i, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = cached
+                    self.hits += 1
+                elif key in missing:
+                    missing[key].append(i)
+                    self.hits += 1
+                else:
+                    missing[key] = [i]
+                    self.misses += 1
+
+        if counts is not None:
+            counts["misses"] = len(missing)
+            counts["hits"] = len(keys) - len(missing)
+        if missing:
+            miss_keys = list(missing)
+            # Diprediksi dari sampel asli (baris pertama per key), bukan dari key yang sudah dibulatkan
+            predictions, risk_scores = predict_with_risk(model, [samples[missing[k][0]] for k in miss_keys])
+            with self._lock:
+                # Versi model bisa berganti selagi predict berjalan: hasil versi lama tidak disimpan
+                store = self.version == version
+                for key, prediction, risk_score in zip(miss_keys, predictions, risk_scores):
+                    value = (prediction.item(), float(risk_score))
+                    for i in missing[key]:
+                        results[i] = value
+                    if store:
+                        self._entries[key] = value
+                        self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return np.array([r[0] for r in results]), np.array([r[1] for r in results], dtype=float)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "version": self.version,
+            }
+
+
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_prediction_memo():
+    """Singleton per proses."""
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            _memo = PredictionMemo()
+        return _memo
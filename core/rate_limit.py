@@ -0,0 +1,53 @@
+"""
+Rate limiting untuk panggilan Gemini: token bucket bersama antar thread, backoff eksponensial
+ber-jitter, dan deteksi error 429 / kuota habis.
+"""
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Rate limiter token bucket (thread-safe).
+    rate = token per detik (mis. kuota 15 request/menit -> 15/60), capacity = burst maksimum.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute, burst=1):
+        return cls(requests_per_minute / 60.0, burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Blok sampai token tersedia. Return lama menunggu (detik)."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def backoff_delay(attempt, base_delay=2.0, max_delay=60.0):
+    """Exponential backoff dengan full jitter: acak di [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def is_rate_limit_error(error):
+    text = str(error)
+    return "429" in text or "Quota exceeded" in text or "ResourceExhausted" in type(error).__name__
@@ -0,0 +1,305 @@
+"""
+Aturan pakar (rule-based) yang dipakai app.py dan prediction server.
+
+Semua aturan ditulis sebagai tabel deklaratif (kondisi pada suhu, lama_simpan, ph, kategori,
+dan potongan teks bau/tekstur/bahan_baku). Tabel yang sama dievaluasi dua cara:
+- per sampel (dict)         -> get_recommendation, explain
+- per kolom (DataFrame)     -> mask NumPy sekaligus untuk jutaan baris (evaluate_frame, audit)
+
+Audit ulang seluruh log lab setelah aturan diubah:
+    python -m core.rules audit [history_lab.csv] [--output hasil_audit.csv] [--verify 1000]
+"""
+import operator
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from core.scoring import LABEL_AMAN, LABEL_BAHAYA
+from core.shelf_life import format_hours, get_shelf_life_model
+
+# when: list kondisi (kolom, operator, nilai), semuanya harus terpenuhi (AND).
+# group: aturan dengan group sama saling eksklusif (if/elif), yang pertama cocok menang.
+Rule = namedtuple("Rule", ["name", "when", "value", "recommendation", "group"], defaults=(None, None))
+
+
+def _contains(value, needles):
+    text = str(value).lower()
+    return any(needle in text for needle in needles)
+
+
+# Operator skalar. Kolom angka dievaluasi langsung sebagai array NumPy; kolom teks punya sedikit
+# nilai unik, jadi operator dievaluasi per nilai unik lalu dipetakan balik ke baris.
+OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "in": lambda value, options: value in options,
+    "contains": _contains,  # Substring (huruf kecil), salah satu cocok
+}
+NUMERIC_COLUMNS = {"suhu", "lama_simpan", "ph"}
+
+
+class Columns:
+    """Kolom DataFrame/dict yang dikonversi sekali & dibagi ke beberapa tabel aturan."""
+
+    def __init__(self, data):
+        self.data = data
+        self.n = len(data.index) if hasattr(data, "index") else len(next(iter(data.values())))
+        self._cache = {}
+
+    def numeric(self, name):
+        if name not in self._cache:
+            self._cache[name] = np.asarray(self.data[name], dtype=float)
+        return self._cache[name]
+
+    def factorized(self, name):
+        if name not in self._cache:
+            import pandas as pd
+
+            self._cache[name] = pd.factorize(pd.Series(self.data[name]))
+        return self._cache[name]
+
+    def mask(self, name, op, arg):
+        if name in NUMERIC_COLUMNS:
+            return OPS[op](self.numeric(name), arg)
+        codes, uniques = self.factorized(name)
+        hit = np.array([bool(OPS[op](u, arg)) for u in uniques] + [False], dtype=bool)
+        return hit[codes]  # codes -1 (kosong/NaN) -> False
+
+
+class RuleTable:
+    def __init__(self, rules, exclusive=False, default=None):
+        """exclusive=True: seluruh tabel satu rantai if/elif (aturan pertama yang cocok), sisanya -> default."""
+        self.rules = list(rules)
+        self.exclusive = exclusive
+        self.default = default
+
+    def _group(self, rule):
+        return "*" if self.exclusive else rule.group
+
+    # --- Per sampel ---
+    def matches(self, sample):
+        """Aturan yang berlaku untuk satu sampel (dict), urut sesuai tabel."""
+        taken = set()
+        result = []
+        for rule in self.rules:
+            group = self._group(rule)
+            if group is not None and group in taken:
+                continue
+            if all(OPS[op](sample[col], arg) for col, op, arg in rule.when):
+                result.append(rule)
+                if group is not None:
+                    taken.add(group)
+        return result
+
+    def first(self, sample):
+        """Nilai aturan pertama yang cocok, atau default."""
+        matched = self.matches(sample)
+        return matched[0].value if matched else self.default
+
+    # --- Per kolom ---
+    def masks(self, columns):
+        """
+        Matriks boolean (n_aturan, n_baris): baris mana yang memicu aturan mana.
+        columns: DataFrame, dict kolom -> array, atau Columns (supaya konversi kolom dibagi antar tabel).
+        """
+        columns = columns if isinstance(columns, Columns) else Columns(columns)
+        n = columns.n
+        result = np.zeros((len(self.rules), n), dtype=bool)
+        taken = {}
+        for i, rule in enumerate(self.rules):
+            mask = np.ones(n, dtype=bool)
+            for col, op, arg in rule.when:
+                mask &= columns.mask(col, op, arg)
+            group = self._group(rule)
+            if group is not None:
+                previous = taken.get(group, np.zeros(n, dtype=bool))
+                mask &= ~previous
+                taken[group] = previous | mask
+            result[i] = mask
+        return result
+
+    def first_values(self, columns):
+        """Nilai aturan pertama yang cocok per baris (np.select), default jika tidak ada."""
+        masks = self.masks(columns)
+        return np.select(list(masks), [rule.value for rule in self.rules], default=self.default)
+
+
+# --- Tabel aturan ---
+EXPLANATION_RULES = RuleTable([
+    # 1. Analisis Suhu
+    Rule("suhu_tinggi", [("suhu", ">", 40)],
+         "🔥 **Bahaya Suhu Tinggi**: Penyimpanan pada {suhu}°C memicu pertumbuhan bakteri termofilik dan denaturasi protein.",
+         "⛔ **Tindakan**: Jangan dikonsumsi! Risiko keracunan makanan sangat tinggi.", group="suhu"),
+    Rule("danger_zone", [("suhu", ">", 5), ("lama_simpan", ">", 4)],
+         "⚠️ **Danger Zone**: Makanan berada di suhu kritis ({suhu}°C) selama >4 jam. Bakteri membelah diri setiap 20 menit.",
+         "⚠️ **Saran**: Jika belum berbau/berlendir, panaskan hingga mendidih (100°C) sebelum dimakan. Jika ragu, buang.", group="suhu"),
+    # 2. Analisis Waktu
+    Rule("kedaluwarsa", [("lama_simpan", ">", 24), ("bahan_baku", "contains", ("segar",))],
+         "⏳ **Kedaluwarsa**: Penyimpanan {lama_simpan} jam untuk bahan segar tanpa pembekuan menurunkan kualitas nutrisi secara drastis."),
+    # 3. Analisis pH
+    Rule("ph_asam", [("ph", "<", 4.6)],
+         "🧪 **Keasaman Tinggi**: pH rendah (<4.6) mengindikasikan fermentasi asam atau pembusukan (souring).", group="ph"),
+    Rule("ph_basa", [("ph", ">", 7.5)],
+         "🧪 **Kebasaan Tinggi**: pH basa (>7.5) adalah tanda pemecahan protein menjadi amonia (pembusukan lanjut).", group="ph"),
+    # 4. Analisis Fisik
+    Rule("bau_menyimpang", [("bau", "contains", ("busuk", "amis"))],
+         "🤢 **Indikator Bau**: Terdeteksi bau menyimpang (off-odor) akibat aktivitas mikroba pembusuk."),
+    Rule("berlendir", [("tekstur", "contains", ("lendir",))],
+         "🦠 **Biofilm Bakteri**: Tekstur berlendir menandakan koloni bakteri telah membentuk lapisan pelindung di permukaan."),
+])
+
+# Jika Aman dan tidak ada aturan yang terpicu
+NORMAL_REASON = "✅ **Parameter Normal**: Suhu, waktu, dan ciri fisik berada dalam batas aman standar keamanan pangan."
+NORMAL_RECOMMENDATION = "🍽️ **Saran**: Aman dikonsumsi. Pastikan dimasak dengan benar (min 75°C) untuk keamanan ekstra."
+
+RECOMMENDATION_RULES = RuleTable([
+    Rule("buang", [("prediksi", "==", LABEL_BAHAYA)],
+         "⛔ **TINDAKAN:** Segera pisahkan dan buang. Jangan berikan ke hewan ternak. Bersihkan area penyimpanan."),
+    # Jika Aman
+    Rule("hewani_hangat", [("kategori", "in", ("Daging", "Ikan")), ("suhu", ">", 4)],
+         "✅ **SARAN:** Segera masak atau simpan di freezer (-18°C) jika tidak langsung diolah."),
+    Rule("hewani_dingin", [("kategori", "in", ("Daging", "Ikan"))],
+         "✅ **SARAN:** Pertahankan suhu dingin. Masak hingga matang sempurna (min 75°C)."),
+    Rule("nabati", [("kategori", "in", ("Sayur", "Buah"))],
+         "✅ **SARAN:** Cuci bersih dengan air mengalir. Simpan di suhu sejuk (10-15°C) atau kulkas."),
+    Rule("susu", [("kategori", "==", "Susu")],
+         "✅ **SARAN:** Pastikan wadah tertutup rapat. Simpan di suhu < 4°C."),
+    Rule("nasi", [("kategori", "==", "Nasi")],
+         "✅ **SARAN:** Segera habiskan. Jangan simpan di suhu ruang > 4 jam (risiko B. cereus)."),
+], exclusive=True, default="✅ **SARAN:** Simpan di tempat kering dan sejuk. Cek tanggal kadaluarsa.")
+
+# --- API per sampel ---
+def get_recommendation(kategori, suhu, prediction_label):
+    return RECOMMENDATION_RULES.first({"kategori": kategori, "suhu": suhu, "prediksi": prediction_label})
+
+
+def estimate_shelf_life(kategori, suhu, lama_simpan_sekarang, ph=None):
+    # Model kinetika Q10/Arrhenius + koreksi pH (core/shelf_life.py); ph None -> pH khas kategori
+    model = get_shelf_life_model()
+    if ph is not None and np.isnan(ph): ph = None
+    sisa = model.hours_to_limit(kategori, suhu, ph) - lama_simpan_sekarang
+    if np.isnan(sisa): return "Tidak dapat diestimasi (suhu / lama simpan tidak valid)"
+    if sisa <= 0: return "0 jam (Sudah lewat batas aman)"
+    ph_text = f", pH {ph:g}" if ph is not None else ""
+    return f"{format_hours(sisa)} lagi (Estimasi pada suhu {suhu}°C{ph_text})"
+
+
+def explain(sample, prediction_label):
+    """Alasan & rekomendasi penjelasan offline untuk satu sampel. Return (list alasan, list rekomendasi)."""
+    matched = EXPLANATION_RULES.matches(sample)
+    reasons = [rule.value.format(**sample) for rule in matched]
+    recommendations = [rule.recommendation for rule in matched if rule.recommendation]
+    if prediction_label == LABEL_AMAN and not reasons:
+        reasons.append(NORMAL_REASON)
+        recommendations.append(NORMAL_RECOMMENDATION)
+    return reasons, recommendations
+
+
+# --- API per kolom ---
+def _join_names(masks, names):
+    # Kombinasi aturan per baris disandikan sebagai bitmask; nama dirangkai sekali per kombinasi unik
+    bits = (masks.astype(np.int64) << np.arange(len(names), dtype=np.int64)[:, None]).sum(axis=0)
+    uniques, inverse = np.unique(bits, return_inverse=True)
+    labels = np.array([";".join(n for i, n in enumerate(names) if u >> i & 1) for u in uniques], dtype=object)
+    return labels[inverse]
+
+
+def evaluate_frame(df):
+    """
+    Evaluasi semua tabel aturan untuk seluruh baris sekaligus (tanpa loop per baris).
+    df: kolom fitur + 'prediksi' (label teks, seperti di history_lab.csv).
+    Return DataFrame: alasan (nama aturan dipisah ';', 'normal' jika default aman),
+    rekomendasi (nama aturan, 'umum' jika default), batas_jam & sisa_jam (model kinetika, dipotong di 0).
+    """
+    import pandas as pd
+
+    columns = Columns(df)
+    names = [rule.name for rule in EXPLANATION_RULES.rules]
+    masks = EXPLANATION_RULES.masks(columns)
+    reasons = _join_names(masks, names)
+    normal = columns.mask("prediksi", "==", LABEL_AMAN) & ~masks.any(axis=0)
+    reasons[normal] = "normal"
+
+    rec_names = np.array([rule.name for rule in RECOMMENDATION_RULES.rules] + ["umum"], dtype=object)
+    rec_masks = RECOMMENDATION_RULES.masks(columns)
+    first = np.where(rec_masks.any(axis=0), rec_masks.argmax(axis=0), len(rec_names) - 1)
+
+    base_hours = get_shelf_life_model().hours_to_limit(np.asarray(df["kategori"]), columns.numeric("suhu"),
+                                                       columns.numeric("ph"))
+    return pd.DataFrame({
+        "alasan": reasons,
+        "rekomendasi": rec_names[first],
+        "batas_jam": base_hours,
+        "sisa_jam": np.maximum(base_hours - columns.numeric("lama_simpan"), 0),
+    }, index=df.index)
+
+
+def audit(path, output=None, verify=0):
+    """Jalankan ulang aturan atas seluruh log lab; ringkasan per aturan & konflik dengan prediksi model."""
+    import time
+
+    import pandas as pd
+
+    from core.features import FEATURE_COLUMNS
+
+    df = pd.read_csv(path, usecols=FEATURE_COLUMNS + ["prediksi"])
+    start = time.perf_counter()
+    result = evaluate_frame(df)
+    elapsed = time.perf_counter() - start
+    print(f"📋 {len(df)} baris dievaluasi dalam {elapsed:.3f}s ({len(df) / max(elapsed, 1e-9):,.0f} baris/detik)")
+
+    masks = EXPLANATION_RULES.masks(df)
+    aman = (df["prediksi"] == LABEL_AMAN).to_numpy()
+    print("Aturan penjelasan (jumlah baris | di antaranya diprediksi AMAN):")
+    for rule, mask in zip(EXPLANATION_RULES.rules, masks):
+        print(f"   {rule.name:<16} {int(mask.sum()):>10} | {int((mask & aman).sum())}")
+    print(f"   {'normal':<16} {int((result['alasan'] == 'normal').sum()):>10}")
+    print("Rekomendasi:")
+    for name, count in result["rekomendasi"].value_counts().items():
+        print(f"   {name:<16} {count:>10}")
+    expired = aman & (result["sisa_jam"].to_numpy() == 0)
+    print(f"⚠️ Diprediksi AMAN tapi sudah lewat estimasi umur simpan: {int(expired.sum())} baris")
+
+    if verify:
+        # Cocokkan hasil vektor dengan jalur per sampel (yang dipakai UI) pada sebagian baris
+        sample = df.sample(min(verify, len(df)), random_state=0) if len(df) > verify else df
+        by_name = {rule.name: rule for rule in EXPLANATION_RULES.rules + RECOMMENDATION_RULES.rules}
+        mismatches = 0
+        for idx, row in zip(sample.index, sample.to_dict("records")):
+            names = result.at[idx, "alasan"]
+            reasons = [NORMAL_REASON] if names == "normal" else [by_name[n].value.format(**row) for n in names.split(";") if n]
+            rec = result.at[idx, "rekomendasi"]
+            rec = RECOMMENDATION_RULES.default if rec == "umum" else by_name[rec].value
+            if (reasons != explain(row, row["prediksi"])[0]
+                    or rec != get_recommendation(row["kategori"], row["suhu"], row["prediksi"])
+                    or abs(result.at[idx, "batas_jam"] - get_shelf_life_model().hours_to_limit(
+                        row["kategori"], row["suhu"], row["ph"])) > 1e-9):
+                mismatches += 1
+        print(f"🔁 Verifikasi {len(sample)} baris terhadap jalur per sampel: {mismatches} berbeda")
+
+    if output:
+        pd.concat([df, result], axis=1).to_csv(output, index=False)
+        print(f"💾 {output}")
+    return result
+
+
+def main(argv):
+    import argparse
+
+    from core.features import BASE_DIR
+
+    parser = argparse.ArgumentParser(prog="python -m core.rules")
+    parser.add_argument("command", choices=["audit"])
+    parser.add_argument("path", nargs="?", default=f"{BASE_DIR}/history_lab.csv")
+    parser.add_argument("--output", default=None, help="Simpan hasil audit per baris ke CSV")
+    parser.add_argument("--verify", type=int, default=0, help="Cocokkan N baris acak dengan fungsi per sampel")
+    args = parser.parse_args(argv)
+    audit(args.path, args.output, args.verify)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
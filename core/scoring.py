@@ -0,0 +1,62 @@
+"""
+Prediksi + risk score (0-100) dari model apa pun yang punya predict_proba (pipeline sklearn,
+CompiledForest, student hasil distilasi), serta validasi & scoring batch CSV.
+"""
+import numpy as np
+import pandas as pd
+
+from core.features import FEATURE_COLUMNS, NUMERICAL_FEATURES, CATEGORICAL_FEATURES
+
+LABEL_AMAN = "AMAN DIMAKAN"
+LABEL_BAHAYA = "TIDAK AMAN / BERBAHAYA"
+
+
+def label_text(prediction):
+    return LABEL_AMAN if prediction == 1 else LABEL_BAHAYA
+
+
+def predict_with_risk(model, X):
+    """
+    Satu kali predict_proba untuk semua baris (forest cukup dijalankan sekali).
+    Label diturunkan dari probabilitas (sama persis dengan model.predict).
+    Return: (array prediksi 0/1, array risk_score 0-100)
+    """
+    proba = model.predict_proba(X)
+    classes = list(model.classes_)
+    prediction = np.asarray(model.classes_)[proba.argmax(axis=1)]
+    p_aman = proba[:, classes.index(1)]  # Probabilitas kelas 1 (Aman)
+    risk_score = (1 - p_aman) * 100      # Risk score adalah kebalikan dari aman
+    return prediction, risk_score
+
+
+def prepare_batch(df_raw):
+    """
+    Validasi CSV upload (format kolom dataset_pangan.csv).
+    Return: (DataFrame siap prediksi, DataFrame baris invalid)
+    """
+    missing = [c for c in FEATURE_COLUMNS if c not in df_raw.columns]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+
+    df = df_raw.copy()
+    for col in NUMERICAL_FEATURES:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in CATEGORICAL_FEATURES:
+        df[col] = df[col].astype(str).str.strip()
+
+    invalid_mask = df[NUMERICAL_FEATURES].isna().any(axis=1)
+    return df[~invalid_mask].reset_index(drop=True), df_raw[invalid_mask.values]
+
+
+def score_batch(model, df):
+    """Skor seluruh batch sekaligus, tambahkan kolom prediksi & risk_score."""
+    result = df.copy()
+    if result.empty:
+        result["prediksi"] = pd.Series(dtype=str)
+        result["risk_score"] = pd.Series(dtype=float)
+        return result
+
+    prediction, risk_score = predict_with_risk(model, result[FEATURE_COLUMNS])
+    result["prediksi"] = np.where(prediction == 1, LABEL_AMAN, LABEL_BAHAYA)
+    result["risk_score"] = risk_score
+    return result
@@ -0,0 +1,173 @@
+"""
+Estimasi umur simpan berbasis kinetika pertumbuhan mikroba per kategori.
+
+Model (per kategori, lihat KINETICS):
+- Suhu   : laju Arrhenius relatif terhadap T_REF (4°C). Energi aktivasi diturunkan dari Q10 di sekitar
+           T_REF, jadi parameter tetap dibaca sebagai "laju naik Q10 kali tiap 10°C".
+           Di atas GROWTH_MAX_TEMP laju tidak naik lagi; mulai HOT_HOLDING_TEMP (hot holding) bakteri
+           tidak tumbuh -> HOT_HOLDING_HOURS. Beku (<= FREEZE_TEMP) -> frozen_hours.
+- pH     : faktor gamma (model pH kardinal): 1 di ph_opt, turun linear ke 0 di ph_min / PH_MAX.
+           ref_hours dikalibrasi pada pH khas kategori (ref_ph), jadi pH lebih asam = umur lebih panjang.
+- Hasil  : jam sampai batas aman (dari kondisi segar) pada suhu & pH konstan, dibatasi MAX_HOURS.
+
+Kurva log(jam) dihitung sekali per proses di grid suhu x pH yang rapat; satu estimasi = interpolasi
+bilinear O(1), satu batch = satu panggilan NumPy.
+
+CLI:
+    python -m core.shelf_life Daging 25 6.0 [lama_simpan]
+"""
+import math
+import sys
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+T_REF = 4.0               # °C, suhu acuan ref_hours (kulkas)
+FREEZE_TEMP = -2.0        # °C, di bawah ini dianggap beku
+GROWTH_MAX_TEMP = 40.0    # °C, laju pertumbuhan tidak naik lagi di atas suhu ini
+HOT_HOLDING_TEMP = 60.0   # °C, hot holding: bakteri patogen tidak tumbuh
+HOT_HOLDING_HOURS = 12.0  # Batas mutu makanan yang dijaga panas
+PH_MAX = 9.5              # pH maksimum pertumbuhan (semua kategori)
+GAMMA_FLOOR = 0.02        # Batas bawah faktor pH (hindari umur tak hingga)
+MAX_HOURS = 24 * 365.0
+GAS_CONSTANT = 8.314      # J/(mol K)
+
+TEMP_GRID = np.arange(-30.0, 100.0 + 1e-9, 0.5)
+PH_GRID = np.arange(2.0, 10.0 + 1e-9, 0.02)
+
+Kinetics = namedtuple("Kinetics", ["ref_hours", "q10", "ref_ph", "ph_min", "ph_opt", "frozen_hours"])
+
+# Dikalibrasi ke heuristik lama (estimate_shelf_life bertingkat) pada pH khas kategori:
+# Daging/Ikan/Susu 48 jam di kulkas & ~4 jam di suhu ruang, Sayur/Buah 1 minggu sejuk & 2 hari di
+# suhu ruang, Nasi 24 jam di kulkas & ~6 jam di suhu ruang (B. cereus).
+KINETICS = {
+    "Daging": Kinetics(ref_hours=48, q10=3.2, ref_ph=6.0, ph_min=4.2, ph_opt=6.8, frozen_hours=720),
+    "Ikan": Kinetics(ref_hours=40, q10=3.2, ref_ph=6.5, ph_min=4.5, ph_opt=7.0, frozen_hours=720),
+    "Susu": Kinetics(ref_hours=48, q10=3.0, ref_ph=6.7, ph_min=4.0, ph_opt=6.8, frozen_hours=720),
+    "Sayur": Kinetics(ref_hours=168, q10=1.8, ref_ph=6.0, ph_min=3.5, ph_opt=6.5, frozen_hours=2160),
+    "Buah": Kinetics(ref_hours=168, q10=1.8, ref_ph=4.0, ph_min=2.5, ph_opt=5.0, frozen_hours=2160),
+    "Nasi": Kinetics(ref_hours=24, q10=1.95, ref_ph=6.5, ph_min=4.9, ph_opt=7.0, frozen_hours=720),
+}
+DEFAULT_KINETICS = Kinetics(ref_hours=48, q10=2.0, ref_ph=6.0, ph_min=4.0, ph_opt=7.0, frozen_hours=720)
+
+
+def activation_energy(q10, t_ref=T_REF):
+    """Ea (J/mol) yang memberi rasio laju Q10 antara t_ref dan t_ref + 10°C."""
+    t1 = t_ref + 273.15
+    return GAS_CONSTANT * math.log(q10) * t1 * (t1 + 10) / 10
+
+
+def ph_gamma(params, ph):
+    ph = np.asarray(ph, dtype=float)
+    below = (ph - params.ph_min) / (params.ph_opt - params.ph_min)
+    above = (PH_MAX - ph) / (PH_MAX - params.ph_opt)
+    return np.clip(np.where(ph < params.ph_opt, below, above), GAMMA_FLOOR, 1.0)
+
+
+def kinetic_hours(params, suhu, ph):
+    """Jam sampai batas aman, dihitung langsung dari model (tanpa grid). suhu & ph: skalar atau array."""
+    suhu = np.asarray(suhu, dtype=float)
+    t = np.minimum(suhu, GROWTH_MAX_TEMP) + 273.15
+    rate = np.exp(-activation_energy(params.q10) / GAS_CONSTANT * (1 / t - 1 / (T_REF + 273.15)))
+    hours = params.ref_hours * ph_gamma(params, params.ref_ph) / (rate * ph_gamma(params, ph))
+    hours = np.where(suhu <= FREEZE_TEMP, params.frozen_hours, hours)
+    hours = np.where(suhu >= HOT_HOLDING_TEMP, HOT_HOLDING_HOURS, hours)
+    return np.minimum(hours, MAX_HOURS)
+
+
+class ShelfLifeModel:
+    def __init__(self, kinetics=KINETICS, default=DEFAULT_KINETICS, temp_grid=TEMP_GRID, ph_grid=PH_GRID):
+        self.categories = list(kinetics)
+        self._index = {name: i for i, name in enumerate(self.categories)}
+        self.params = [kinetics[name] for name in self.categories] + [default]  # Index terakhir = default
+        self.temp_grid = temp_grid
+        self.ph_grid = ph_grid
+        self._t0, self._t_step = float(temp_grid[0]), float(temp_grid[1] - temp_grid[0])
+        self._p0, self._p_step = float(ph_grid[0]), float(ph_grid[1] - ph_grid[0])
+
+        # (kategori, suhu, pH) -> log(jam); interpolasi di ruang log karena laju Arrhenius eksponensial
+        t, p = np.meshgrid(temp_grid, ph_grid, indexing="ij")
+        self.log_hours = np.stack([np.log(kinetic_hours(params, t, p)) for params in self.params]).astype(np.float32)
+
+    def category_index(self, kategori):
+        """Nama kategori -> index grid (kategori tidak dikenal -> default). Skalar atau array."""
+        default = len(self.params) - 1
+        if np.ndim(kategori) == 0:
+            return self._index.get(kategori, default)
+        uniques, inverse = np.unique(np.asarray(kategori, dtype=str), return_inverse=True)
+        return np.array([self._index.get(u, default) for u in uniques], dtype=np.intp)[inverse]
+
+    def ref_ph(self, kategori):
+        return self.params[self.category_index(kategori)].ref_ph
+
+    def _position(self, value, start, step, size):
+        # NaN tidak boleh jadi index (astype(intp) -> INT_MIN); pemanggil yang menentukan hasil untuk NaN
+        pos = np.clip((np.nan_to_num(np.asarray(value, dtype=float), nan=start) - start) / step, 0, size - 1)
+        i = np.minimum(pos.astype(np.intp), size - 2)
+        return i, pos - i
+
+    def hours_to_limit(self, kategori, suhu, ph=None):
+        """
+        Jam sampai batas aman dari kondisi segar (interpolasi bilinear grid).
+        Semua argumen boleh skalar atau array (satu panggilan untuk seluruh batch).
+        ph None / NaN -> pH khas kategori; suhu NaN -> NaN jam.
+        """
+        c = self.category_index(kategori)
+        ref_ph = np.array([p.ref_ph for p in self.params])[c]
+        ph = ref_ph if ph is None else np.where(np.isnan(np.asarray(ph, dtype=float)), ref_ph, ph)
+        i, ft = self._position(suhu, self._t0, self._t_step, len(self.temp_grid))
+        j, fp = self._position(ph, self._p0, self._p_step, len(self.ph_grid))
+        grid = self.log_hours
+        log_h = ((1 - ft) * ((1 - fp) * grid[c, i, j] + fp * grid[c, i, j + 1])
+                 + ft * ((1 - fp) * grid[c, i + 1, j] + fp * grid[c, i + 1, j + 1]))
+        hours = np.where(np.isnan(np.asarray(suhu, dtype=float)), np.nan, np.exp(log_h, dtype=float))
+        return float(hours) if np.ndim(hours) == 0 else hours
+
+    def remaining_hours(self, kategori, suhu, ph, lama_simpan):
+        """Sisa jam (>= 0) jika sudah disimpan lama_simpan jam pada suhu & pH yang sama."""
+        remaining = np.maximum(self.hours_to_limit(kategori, suhu, ph) - np.asarray(lama_simpan, dtype=float), 0.0)
+        return float(remaining) if np.ndim(remaining) == 0 else remaining
+
+    def remaining_curve(self, kategori, ph, lama_simpan, temps=None):
+        """
+        Sisa jam untuk setiap suhu penyimpanan (default: titik grid -10..60°C), dengan pH & lama simpan
+        yang sama. Hanya membaca satu irisan grid, cukup murah untuk digambar ulang setiap rerun.
+        Return (array suhu, array sisa jam).
+        """
+        if temps is None:
+            temps = self.temp_grid[(self.temp_grid >= -10) & (self.temp_grid <= HOT_HOLDING_TEMP)]
+        return temps, self.remaining_hours(kategori, temps, np.full(len(temps), float(ph)), lama_simpan)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_shelf_life_model():
+    """Singleton per proses (grid dihitung sekali saat pertama dipakai)."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = ShelfLifeModel()
+        return _model
+
+
+def format_hours(hours):
+    if hours >= 48:
+        return f"{hours:.0f} jam (~{hours / 24:.1f} hari)"
+    return f"{hours:.1f} jam" if hours < 10 else f"{hours:.0f} jam"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Pemakaian: python -m core.shelf_life <kategori> <suhu> [ph] [lama_simpan]")
+        sys.exit(1)
+    model = get_shelf_life_model()
+    kategori, suhu = sys.argv[1], float(sys.argv[2])
+    ph = float(sys.argv[3]) if len(sys.argv) > 3 else model.ref_ph(kategori)
+    lama = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    params = model.params[model.category_index(kategori)]
+    print(f"⏳ {kategori} pada {suhu:g}°C, pH {ph:g}: batas aman {format_hours(model.hours_to_limit(kategori, suhu, ph))}, "
+          f"sisa {format_hours(model.remaining_hours(kategori, suhu, ph, lama))} "
+          f"(Q10 {params.q10}, Ea {activation_energy(params.q10) / 1000:.0f} kJ/mol)")
@@ -0,0 +1,59 @@
+"""
+Sweep what-if: satu sampel dievaluasi di seluruh grid suhu x lama simpan dalam SATU predict_proba.
+
+Dipakai panel what-if di app.py supaya user tidak perlu submit ulang sampel yang sama dengan suhu/jam
+berbeda (tanpa log ke history_lab.csv, tanpa panggilan Gemini).
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from core.features import CATEGORICAL_FEATURES, FEATURE_COLUMNS
+from core.scoring import predict_with_risk
+
+TEMPS = np.arange(-10, 101)  # Sama dengan rentang slider suhu di app.py
+HOUR_RANGES = [24, 72, 168, 720]  # Pilihan batas sumbu lama simpan (jam)
+N_HOURS = 49
+
+SweepResult = namedtuple("SweepResult", ["temps", "hours", "risk", "safe", "frontier", "seconds"])
+
+
+def hours_axis(max_hours, n=N_HOURS):
+    """Titik lama simpan 0..max_hours (jam bulat, tanpa duplikat)."""
+    return np.unique(np.round(np.linspace(0, max_hours, n)).astype(int))
+
+
+def sweep_frame(sample, temps, hours):
+    """DataFrame (len(hours) * len(temps) baris): fitur kategorikal & pH tetap, suhu x lama_simpan bervariasi."""
+    import pandas as pd
+
+    grid_t, grid_h = np.meshgrid(temps, hours)  # (n_hours, n_temps)
+    n = grid_t.size
+    data = {c: np.full(n, sample[c], dtype=object) for c in CATEGORICAL_FEATURES}
+    data.update(suhu=grid_t.ravel(), lama_simpan=grid_h.ravel(), ph=np.full(n, float(sample["ph"])))
+    return pd.DataFrame(data, columns=FEATURE_COLUMNS)
+
+
+def safe_frontier(safe, hours):
+    """
+    Per suhu: lama simpan terakhir yang masih aman sebelum prediksi pertama kali menjadi tidak aman
+    (dihitung dari jam 0). NaN jika sudah tidak aman sejak awal; hours[-1] jika aman di seluruh sumbu.
+    """
+    n_hours = safe.shape[0]
+    first_unsafe = np.where(safe.all(axis=0), n_hours, (~safe).argmax(axis=0))
+    frontier = np.full(safe.shape[1], np.nan)
+    ok = first_unsafe > 0
+    frontier[ok] = np.asarray(hours, dtype=float)[first_unsafe[ok] - 1]
+    return frontier
+
+
+def sweep(model, sample, temps=TEMPS, hours=None, max_hours=72):
+    """Risk score (n_hours, n_temps), mask aman, dan frontier aman/tidak aman untuk satu sampel."""
+    hours = hours_axis(max_hours) if hours is None else np.asarray(hours)
+    start = time.perf_counter()
+    prediction, risk_score = predict_with_risk(model, sweep_frame(sample, temps, hours))
+    shape = (len(hours), len(temps))
+    safe = (np.asarray(prediction) == 1).reshape(shape)
+    return SweepResult(np.asarray(temps), hours, np.asarray(risk_score).reshape(shape), safe,
+                       safe_frontier(safe, hours), time.perf_counter() - start)
@@ -1,92 +1,167 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.log_aggregates import LabAggregator, AccessAggregator, MetricsAggregator, read_tail_rows
+
+ACCESS_LOG = "../csv/access_log.csv"
+LAB_LOG = "../history_lab.csv"
+METRICS_LOG = "../csv/metrics.csv"
+LLM_STAGES = ["llm", "llm_stream"]
+TAIL_ROWS = 5000 # Jumlah baris terakhir untuk tabel mentah & scatter plot
 
 st.set_page_config(page_title="Admin Dashboard - Lab Pangan", layout="wide", page_icon="📊")
 
 st.title("📊 Dashboard Monitoring & Statistik")
 
-# 1. Load Data
-@st.cache_data(ttl=60) # Cache 1 menit biar update realtime
-def load_data():
-    access_log = None
-    lab_log = None
-    
-    if os.path.exists("../csv/access_log.csv"):
-        access_log = pd.read_csv("../csv/access_log.csv")
-        access_log['timestamp'] = pd.to_datetime(access_log['timestamp'])
-        
-    if os.path.exists("../history_lab.csv"):
-        lab_log = pd.read_csv("../history_lab.csv")
-        lab_log['timestamp'] = pd.to_datetime(lab_log['timestamp'])
-        
-    return access_log, lab_log
-
-df_access, df_lab = load_data()
+# 1. Load Data (Inkremental)
+# Aggregator disimpan per proses; state (offset + agregat) juga dipersist ke disk,
+# jadi setiap refresh hanya mem-parse baris yang baru di-append.
+@st.cache_resource
+def get_aggregators():
+    return (
+        AccessAggregator(ACCESS_LOG, "../csv/.agg_access_log.json"),
+        LabAggregator(LAB_LOG, "../csv/.agg_history_lab.json"),
+        MetricsAggregator(METRICS_LOG, "../csv/.agg_metrics.json"),
+    )
+
+@st.cache_data(ttl=60) # Baris mentah terakhir (untuk tabel & scatter), bukan seluruh file
+def load_tail(path, n_rows):
+    header, rows = read_tail_rows(path, n_rows)
+    if not rows:
+        return None
+    df = pd.DataFrame(rows, columns=header)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+def hourly_series(counter):
+    # Bucket per jam -> Series lengkap (jam tanpa data diisi 0)
+    if not counter:
+        return pd.Series(dtype=int)
+    series = pd.Series(counter)
+    series.index = pd.to_datetime(series.index)
+    series = series.sort_index()
+    full_index = pd.date_range(series.index.min(), series.index.max(), freq='h')
+    return series.reindex(full_index, fill_value=0)
+
+agg_access, agg_lab, agg_metrics = get_aggregators()
+agg_access.refresh()
+agg_lab.refresh()
+agg_metrics.refresh()
 
 # --- TABS ----
-tab1, tab2 = st.tabs(["👥 Traffic & Pengunjung", "🧪 Analisis Laboratorium (Data Pangan)"])
+tab1, tab2, tab3 = st.tabs(["👥 Traffic & Pengunjung", "🧪 Analisis Laboratorium (Data Pangan)", "⚡ Performance"])
 
 # TAB 1: TRAFFIC
 with tab1:
-    if df_access is not None and not df_access.empty:
+    if agg_access.total_hits > 0:
         # KPI Cards
-        total_visits = len(df_access)
-        unique_users = df_access['session_id'].nunique()
-        
+        total_visits = agg_access.total_hits
+        unique_users = agg_access.unique_sessions()
+
         col1, col2, col3 = st.columns(3)
         col1.metric("Total Kunjungan (Hits)", total_visits)
         col2.metric("User Unik (Estimasi)", unique_users)
-        
-        # Grafik Kunjungan per Waktu
-        # Resample per Jam
-        traffic_trend = df_access.set_index('timestamp').resample('H').count()
-        
+
+        # Grafik Kunjungan per Waktu (bucket per jam dari agregat)
         st.subheader("Tren Kunjungan (Per Jam)")
-        st.area_chart(traffic_trend['session_id'])
-        
+        st.area_chart(hourly_series(agg_access.hourly).rename('session_id'))
+
         # Tabel Log Terakhir
         with st.expander("Lihat Log Akses Mentah"):
-            st.dataframe(df_access.sort_values('timestamp', ascending=False))
-            
+            df_access = load_tail(ACCESS_LOG, TAIL_ROWS)
+            if df_access is not None:
+                st.caption(f"Menampilkan {len(df_access)} log terakhir.")
+                st.dataframe(df_access.sort_values('timestamp', ascending=False))
+
     else:
         st.warning("Belum ada data kunjungan. Buka Aplikasi Utama dulu untuk generate log.")
 
 # TAB 2: LAB STATS
 with tab2:
-    if df_lab is not None and not df_lab.empty:
+    if agg_lab.rows_seen > 0:
+        import plotly.express as px  # Hanya di-import jika ada data untuk digambar (cold start lebih cepat)
+
         st.header("Statistik Keamanan Pangan")
-        
+
         # 1. Distribusi Aman vs Bahaya
-        pie_data = df_lab['prediksi'].value_counts().reset_index()
-        pie_data.columns = ['Status', 'Jumlah']
-        
+        pie_data = pd.DataFrame(list(agg_lab.status_counts.items()), columns=['Status', 'Jumlah'])
+
         col_chart1, col_chart2 = st.columns(2)
-        
+
         with col_chart1:
             st.subheader("Rasio Keamanan")
             fig_pie = px.pie(pie_data, values='Jumlah', names='Status', color='Status',
                              color_discrete_map={'AMAN DIMAKAN':'green', 'TIDAK AMAN / BERBAHAYA':'red'})
             st.plotly_chart(fig_pie, use_container_width=True)
-            
+
         with col_chart2:
             st.subheader("Rata-rata Risk Score per Kategori")
-            risk_cat = df_lab.groupby('kategori')['risk_score'].mean().reset_index()
+            risk_cat = pd.DataFrame(sorted(agg_lab.category_mean_risk().items()), columns=['kategori', 'risk_score'])
             fig_bar = px.bar(risk_cat, x='kategori', y='risk_score', color='risk_score',
                              color_continuous_scale='RdYlGn_r') # Merah tinggi = bahaya
             st.plotly_chart(fig_bar, use_container_width=True)
-            
+
         # 2. Scatter Plot: Suhu vs Lama Simpan (Pewarnaan by Safe/Unsafe)
         st.subheader("Peta Persebaran Bahaya (Suhu vs Waktu)")
-        fig_scatter = px.scatter(df_lab, x='lama_simpan', y='suhu', color='prediksi',
-                                 hover_data=['bahan_baku'], symbol='kategori',
-                                 title="Apakah Lama Simpan & Suhu Mempengaruhi Keamanan?")
-        st.plotly_chart(fig_scatter, use_container_width=True)
-        
+        df_lab = load_tail(LAB_LOG, TAIL_ROWS)
+        if df_lab is not None:
+            df_lab[['suhu', 'lama_simpan']] = df_lab[['suhu', 'lama_simpan']].apply(pd.to_numeric, errors='coerce')
+            fig_scatter = px.scatter(df_lab, x='lama_simpan', y='suhu', color='prediksi',
+                                     hover_data=['bahan_baku'], symbol='kategori',
+                                     title=f"Apakah Lama Simpan & Suhu Mempengaruhi Keamanan? ({len(df_lab)} sampel terakhir)")
+            st.plotly_chart(fig_scatter, use_container_width=True)
+
         # 3. Word Cloud-ish (Frekuensi Bahan)
         st.subheader("Bahan Paling Sering Diuji")
-        st.bar_chart(df_lab['bahan_baku'].value_counts().head(10))
-        
+        st.bar_chart(pd.Series(dict(agg_lab.ingredient_counts.most_common(10)), name='count'))
+
     else:
         st.warning("Belum ada data laboratorium. Lakukan prediksi di aplikasi utama dulu.")
+
+# TAB 3: PERFORMANCE (timing span per tahap dari core.metrics)
+with tab3:
+    if agg_metrics.rows_seen > 0:
+        st.header("Latensi per Tahap")
+        st.caption("Percentile dihitung dari histogram logaritmik (resolusi ~12%), bukan dari baris mentah.")
+
+        summary = pd.DataFrame(agg_metrics.summary()).set_index('stage')
+        st.dataframe(summary.style.format({'p50_ms': '{:.2f}', 'p95_ms': '{:.2f}', 'p99_ms': '{:.2f}',
+                                           'fallback_rate': '{:.1%}', 'error_rate': '{:.1%}'}),
+                     use_container_width=True)
+
+        # Tren percentile per jam (satu garis per tahap)
+        st.subheader("Tren Latensi (Per Jam)")
+        hourly = pd.DataFrame(agg_metrics.hourly_rows())
+        hourly['hour'] = pd.to_datetime(hourly['hour'])
+        col_q, col_stage = st.columns([1, 3])
+        percentile = col_q.selectbox("Percentile", ['p50_ms', 'p95_ms', 'p99_ms'], index=1)
+        stages = col_stage.multiselect("Tahap", list(summary.index), default=list(summary.index))
+        if stages:
+            st.line_chart(hourly[hourly['stage'].isin(stages)]
+                          .pivot(index='hour', columns='stage', values=percentile))
+
+        # LLM: rasio fallback (model cadangan / penjelasan offline) & error
+        st.subheader("Fallback & Error LLM")
+        llm_stages = [s for s in LLM_STAGES + ["explanation"] if s in summary.index]
+        if llm_stages:
+            cols = st.columns(len(llm_stages))
+            for col, stage in zip(cols, llm_stages):
+                col.metric(f"{stage} (n={summary.loc[stage, 'count']})",
+                           f"fallback {summary.loc[stage, 'fallback_rate']:.1%}",
+                           f"error {summary.loc[stage, 'error_rate']:.1%}", delta_color="off")
+            llm_hourly = hourly[hourly['stage'].isin(llm_stages)]
+            st.line_chart(llm_hourly.pivot(index='hour', columns='stage', values='fallback_rate'))
+            st.line_chart(llm_hourly.pivot(index='hour', columns='stage', values='error_rate'))
+        else:
+            st.info("Belum ada panggilan LLM yang tercatat.")
+
+        # Label terbanyak per tahap (model, tier pH, hit/miss memo, model Gemini)
+        with st.expander("Label per Tahap"):
+            stage = st.selectbox("Tahap", list(summary.index), key='label_stage')
+            st.bar_chart(pd.Series(dict(agg_metrics.stages[stage]["labels"].most_common(10)), name='count'))
+
+    else:
+        st.warning("Belum ada data performa. Lakukan prediksi di aplikasi utama dulu.")
@@ -0,0 +1,219 @@
+"""
+Hyperparameter search paralel untuk pipeline RandomForest.
+
+- Setiap kandidat (n_estimators, max_depth, min_samples_leaf, max_features) dievaluasi dengan
+  StratifiedKFold di process pool terpisah (semua core terpakai).
+- Latency inference tiap kandidat ikut diukur: single-sample via engine compiled (yang dipakai app).
+  Worker hanya mengirim array compiled ke proses utama (bukan pipeline sklearn utuh); latency
+  pipeline sklearn diukur dengan fit ulang hanya untuk kandidat di dalam rentang toleransi.
+- Pemenang = kandidat TERCEPAT yang akurasinya masih dalam toleransi dari akurasi CV terbaik,
+  bukan sekadar akurasi tertinggi.
+
+Pemakaian (dari root repo):
+    python training/search.py [--folds 5] [--workers N] [--tolerance 0.01] [--save]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.features import BASE_DIR, CATEGORICAL_FEATURES, NUMERICAL_FEATURES, WARMUP_SAMPLE, to_frame
+from core.compiled_model import compile_pipeline
+from core.dataset_store import get_dataset_store
+from core.model_registry import ModelRegistry, atomic_dump
+
+RESULTS_PATH = os.path.join(BASE_DIR, "training", "search_results.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "model.pkl")
+
+PARAM_GRID = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_depth": [None, 6, 12],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", 0.5],
+}
+
+# Dataset dibagikan ke worker sekali lewat initializer (tidak di-pickle ulang per kandidat)
+_X = None
+_y = None
+
+
+def load_dataset(version=None):
+    # Versi terbaru dataset store (termasuk data hasil active learning), seed dari csv/dataset_pangan.csv
+    df = get_dataset_store().load(version)
+    return df.drop("aman_dimakan", axis=1), df["aman_dimakan"]
+
+
+def build_pipeline(n_estimators=100, max_depth=None, min_samples_leaf=1, max_features="sqrt", n_jobs=None):
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), NUMERICAL_FEATURES),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL_FEATURES),
+        ]
+    )
+    return Pipeline([
+        ("preprocessor", preprocessor),
+        ("classifier", RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                              min_samples_leaf=min_samples_leaf, max_features=max_features,
+                                              random_state=42, n_jobs=n_jobs)),
+    ])
+
+
+def candidates(grid=PARAM_GRID):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def n_folds(y, requested=5):
+    # StratifiedKFold butuh tiap kelas punya >= k sampel
+    return max(2, min(requested, int(y.value_counts().min())))
+
+
+def _median_latency(fn, n):
+    fn()
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def evaluate(params, folds):
+    """Jalan di worker: akurasi CV satu kandidat + array compiled model yang dilatih di seluruh data."""
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    scores = []
+    fit_seconds = 0.0
+    for train_idx, test_idx in cv.split(_X, _y):
+        # n_jobs=1 di dalam worker: paralelisme sudah di level process pool
+        pipeline = build_pipeline(**params, n_jobs=1)
+        start = time.perf_counter()
+        pipeline.fit(_X.iloc[train_idx], _y.iloc[train_idx])
+        fit_seconds += time.perf_counter() - start
+        scores.append(pipeline.score(_X.iloc[test_idx], _y.iloc[test_idx]))
+
+    # Latency diukur pada model yang dilatih di seluruh data (seperti yang akan di-deploy).
+    # Yang dikirim balik hanya array compiled: jauh lebih kecil daripada pickle pipeline sklearn.
+    compiled = compile_pipeline(build_pipeline(**params, n_jobs=1).fit(_X, _y))
+    return params, compiled, {
+        "cv_accuracy": float(np.mean(scores)),
+        "cv_std": float(np.std(scores)),
+        "fit_seconds_per_fold": fit_seconds / folds,
+    }
+
+
+def measure_latency(compiled, repeats=200):
+    """
+    Latency single-sample (median) engine compiled. Diukur di proses utama secara berurutan setelah
+    search, supaya tidak bercampur dengan beban fit kandidat lain di worker.
+    """
+    return {
+        "latency_compiled_ms": _median_latency(lambda: compiled.predict_proba(WARMUP_SAMPLE), repeats) * 1000,
+        "n_nodes": int(len(compiled.feature)),
+    }
+
+
+def measure_sklearn_latency(params, X, y, repeats=10):
+    """Latency single-sample pipeline sklearn (fit ulang di proses utama, hanya untuk kandidat terpilih)."""
+    pipeline = build_pipeline(**params, n_jobs=-1).fit(X, y)
+    pipeline.set_params(classifier__n_jobs=None)  # Seperti saat deploy: predict satu sampel tanpa thread pool
+    df_one = to_frame(WARMUP_SAMPLE)
+    return _median_latency(lambda: pipeline.predict_proba(df_one), repeats) * 1000
+
+
+def within_tolerance(results, tolerance=0.01):
+    return results["cv_accuracy"] >= results["cv_accuracy"].max() - tolerance
+
+
+def pick_winner(results, tolerance=0.01):
+    """Kandidat tercepat (latency compiled) di antara yang akurasinya >= akurasi terbaik - tolerance."""
+    eligible = results[within_tolerance(results, tolerance)]
+    return eligible.sort_values(["latency_compiled_ms", "cv_accuracy"], ascending=[True, False]).iloc[0]
+
+
+def run_search(folds=5, workers=None, tolerance=0.01, grid=PARAM_GRID, results_path=RESULTS_PATH):
+    X, y = load_dataset()
+    k = n_folds(y, folds)
+    grid_list = candidates(grid)
+    workers = workers or os.cpu_count()
+    print(f"🔎 {len(grid_list)} kandidat x {k}-fold CV, {workers} proses ({len(X)} baris)")
+
+    start = time.perf_counter()
+    evaluated = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = [pool.submit(evaluate, params, k) for params in grid_list]
+        for future in as_completed(futures):
+            evaluated.append(future.result())
+    print(f"⏱️ CV selesai dalam {time.perf_counter() - start:.1f}s")
+
+    rows = []
+    for params, compiled, scores in evaluated:
+        rows.append({**params, "max_depth": params["max_depth"] if params["max_depth"] is not None else "None",
+                     **scores, **measure_latency(compiled)})
+
+    results = pd.DataFrame(rows).sort_values(["cv_accuracy", "latency_compiled_ms"], ascending=[False, True])
+    # Pembanding sklearn hanya untuk kandidat yang bisa menang (sisanya NaN)
+    results["latency_sklearn_ms"] = np.nan
+    for idx in results.index[within_tolerance(results, tolerance)]:
+        results.loc[idx, "latency_sklearn_ms"] = measure_sklearn_latency(winner_params(results.loc[idx]), X, y)
+    winner = pick_winner(results, tolerance)
+    results["winner"] = results.index == winner.name
+    results.to_csv(results_path, index=False)
+    print(f"📄 Tabel hasil: {results_path}")
+    print(results.head(10).to_string(index=False))
+    return results, winner
+
+
+def winner_params(winner):
+    return {
+        "n_estimators": int(winner["n_estimators"]),
+        "max_depth": None if winner["max_depth"] == "None" else int(winner["max_depth"]),
+        "min_samples_leaf": int(winner["min_samples_leaf"]),
+        "max_features": winner["max_features"],
+    }
+
+
+def save_winner(winner, model_path=MODEL_PATH):
+    store = get_dataset_store()
+    X, y = load_dataset(store.current_version)
+    params = winner_params(winner)
+    start = time.perf_counter()
+    pipeline = build_pipeline(**params, n_jobs=-1).fit(X, y)
+    fit_seconds = time.perf_counter() - start
+    # Kembalikan ke single-thread: predict satu sampel di app lebih lambat jika memakai thread pool
+    pipeline.set_params(classifier__n_jobs=None)
+    version = ModelRegistry().publish(pipeline, metrics={"cv_accuracy": float(winner["cv_accuracy"])},
+                                      data_version=store.current_version, training_seconds=fit_seconds,
+                                      source=f"search {params}")
+    atomic_dump(pipeline, model_path)
+    print(f"💾 Model pemenang di-publish sebagai {version} (salinan di {model_path})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter search paralel (CV + latency)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Selisih akurasi CV yang masih diterima demi latency lebih rendah")
+    parser.add_argument("--save", action="store_true", help="Latih pemenang di seluruh data & publish ke model registry")
+    args = parser.parse_args()
+
+    results, winner = run_search(args.folds, args.workers, args.tolerance)
+    print(f"\n🏆 Pemenang: {winner_params(winner)} | akurasi CV {winner['cv_accuracy']:.2%} "
+          f"| latency {winner['latency_compiled_ms']:.3f} ms (compiled)")
+    if args.save:
+        save_winner(winner)
@@ -4,12 +4,21 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.pipeline import Pipeline
-import joblib
 import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.dataset_store import DatasetStore
+from core.model_registry import ModelRegistry, atomic_dump
 
 # Load dataset
+# Utamakan versi terbaru dataset store (berisi data hasil active learning)
+store = DatasetStore()
+if not store.is_empty():
+    df = store.load()
 # Cek path, jika tidak ada di csv/ coba cari di root atau parent
-if os.path.exists("csv/dataset_pangan.csv"):
+elif os.path.exists("csv/dataset_pangan.csv"):
     df = pd.read_csv("csv/dataset_pangan.csv")
 elif os.path.exists("../csv/dataset_pangan.csv"):
     df = pd.read_csv("../csv/dataset_pangan.csv")
@@ -35,12 +44,16 @@ preprocessor = ColumnTransformer(
 # Pipeline
 model = Pipeline([
     ("preprocessor", preprocessor),
-    ("classifier", RandomForestClassifier(n_estimators=100, random_state=42))
+    ("classifier", RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)) # Fit pakai semua core
 ])
 
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
+start = time.perf_counter()
 model.fit(X_train, y_train)
+fit_seconds = time.perf_counter() - start
+# Predict satu sampel di app lebih cepat tanpa thread pool
+model.set_params(classifier__n_jobs=None)
 
 # Simpan model (pipeline sudah termasuk preprocessor)
 # Simpan di folder model/ atau root jika tidak ada
@@ -48,6 +61,11 @@ output_path = "model.pkl"
 if os.path.exists("../model.pkl"): # Jika dijalankan dari folder training/
     output_path = "../model.pkl"
 
-joblib.dump(model, output_path)
+atomic_dump(model, output_path)
+
+# Publish ke registry: versi baru + array compiled (di-mmap oleh app), lalu pointer CURRENT ditukar
+version = ModelRegistry().publish(model, metrics={"accuracy": model.score(X_test, y_test)},
+                                  data_version=store.current_version, training_seconds=fit_seconds,
+                                  source="training.py", df_labeled=df)
 
-print(f"MODEL PIPELINE SUDAH DISIMPAN DI {output_path}")
+print(f"MODEL PIPELINE SUDAH DISIMPAN DI {output_path} (registry: {version})")